@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+"""Measure the cost of "import py_qualtrics_api" in fresh interpreters.
+
+Reports the median wall time over several runs, the slowest modules from
+``python -X importtime`` and any heavy dependency that got imported eagerly.
+With --max-ms, exits with status 1 when the median exceeds the budget:
+
+    python benchmarks/bench_import.py --runs 10 --max-ms 150
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+
+# Modules that must only be imported when a feature that needs them is used.
+HEAVY_MODULES = ['pandas', 'numpy', 'yaml', 'requests', 'urllib3', 'sqlite3',
+                 'pkg_resources']
+
+PROBE = ('import sys, time; t0 = time.perf_counter(); import py_qualtrics_api; '
+         'print(time.perf_counter() - t0); '
+         'print(",".join(m for m in {!r} if m in sys.modules))'.format(HEAVY_MODULES))
+
+
+def run_once():
+  out = subprocess.check_output([sys.executable, '-c', PROBE]).decode().split('\n')
+  return float(out[0]) * 1000.0, [m for m in out[1].split(',') if m]
+
+
+def slowest_modules(n):
+  """Return the n slowest (cumulative us, self us, module) rows of the
+  importtime tree below py_qualtrics_api, leaving out interpreter startup."""
+  err = subprocess.run([sys.executable, '-X', 'importtime', '-c',
+                        'import py_qualtrics_api'],
+                       stderr=subprocess.PIPE, check=True).stderr.decode()
+  rows = []
+  subtree = []
+  for line in err.splitlines()[1:]:
+    try:
+      _, self_us, cumulative_us, name = line.replace(':', '|', 1).split('|')
+      row = (int(cumulative_us), int(self_us), name.strip())
+    except ValueError:
+      continue
+    subtree.append(row)
+    # importtime prints children before their parent; a top-level module
+    # closes its subtree.
+    if not name.startswith('  '):
+      if row[2] == 'py_qualtrics_api':
+        rows = subtree
+      subtree = []
+  return sorted(rows, reverse=True)[:n]
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+  parser.add_argument('--runs', type=int, default=7)
+  parser.add_argument('--top', type=int, default=10)
+  parser.add_argument('--max-ms', type=float, default=None,
+                      help='fail if the median import time exceeds this')
+  args = parser.parse_args()
+
+  times = []
+  heavy = set()
+  for _ in range(args.runs):
+    ms, loaded = run_once()
+    times.append(ms)
+    heavy.update(loaded)
+  median = statistics.median(times)
+  print('import py_qualtrics_api: median {:.1f} ms, min {:.1f} ms over {} runs'
+        .format(median, min(times), args.runs))
+  print('\n{:>12} {:>12}  module'.format('cumul (us)', 'self (us)'))
+  for cumulative, self_us, name in slowest_modules(args.top):
+    print('{:>12} {:>12}  {}'.format(cumulative, self_us, name))
+  failed = False
+  if heavy:
+    print('\nHeavy modules imported eagerly: {}'.format(', '.join(sorted(heavy))))
+    failed = True
+  if args.max_ms is not None and median > args.max_ms:
+    print('\nMedian import time {:.1f} ms exceeds budget of {:.1f} ms'
+          .format(median, args.max_ms))
+    failed = True
+  if failed:
+    sys.exit(1)
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+"""Compare the available JSON codecs on a contactimports request body and a
+page of mailing list contacts.
+
+    python benchmarks/bench_json_codec.py --contacts 50000
+"""
+import argparse
+import time
+
+from py_qualtrics_api.codec import available_codecs, make_codec
+
+
+def contact_import_payload(n):
+  return {'contacts': [{'email': 'person{}@example.com'.format(i),
+                        'firstName': 'First{}'.format(i),
+                        'lastName': 'Last{}'.format(i),
+                        'externalReference': str(100000 + i),
+                        'unsubscribed': False,
+                        'language': 'en',
+                        'embeddedData': {'site': 'S{}'.format(i % 40),
+                                         'cohort': str(i % 7)}}
+                       for i in range(n)]}
+
+
+def contacts_page(n):
+  elements = []
+  for i in range(n):
+    elements.append({'id': 'MLRP_{:015d}'.format(i),
+                     'firstName': 'First{}'.format(i),
+                     'lastName': 'Last{}'.format(i),
+                     'email': 'person{}@example.com'.format(i),
+                     'externalDataReference': str(100000 + i),
+                     'embeddedData': {'site': 'S{}'.format(i % 40)},
+                     'language': 'en',
+                     'unsubscribed': False,
+                     'responseHistory': [],
+                     'emailHistory': []})
+  return {'meta': {'httpStatus': '200 - OK'},
+          'result': {'elements': elements, 'nextPage': None}}
+
+
+def best_of(fn, repeat):
+  times = []
+  for _ in range(repeat):
+    t0 = time.perf_counter()
+    fn()
+    times.append(time.perf_counter() - t0)
+  return min(times)
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+  parser.add_argument('--contacts', type=int, default=50000)
+  parser.add_argument('--repeat', type=int, default=5)
+  args = parser.parse_args()
+
+  payload = contact_import_payload(args.contacts)
+  page = contacts_page(args.contacts)
+  print('{:<8} {:>12} {:>12} {:>10}'.format('codec', 'dumps (s)', 'loads (s)', 'MB'))
+  for name in available_codecs():
+    codec = make_codec(name)
+    encoded = codec.dumps(payload)
+    page_bytes = codec.dumps(page)
+    t_dumps = best_of(lambda: codec.dumps(payload), args.repeat)
+    t_loads = best_of(lambda: codec.loads(page_bytes), args.repeat)
+    print('{:<8} {:>12.4f} {:>12.4f} {:>10.1f}'
+          .format(name, t_dumps, t_loads, len(encoded) / 1e6))
+
+
+if __name__ == '__main__':
+  main()
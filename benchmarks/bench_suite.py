@@ -0,0 +1,186 @@
+#!/usr/bin/env python
+"""Offline benchmarks for QualtricsAPI against a local mock Qualtrics server.
+
+Measures pagination throughput, bulk contact import rows/sec, response export
+download+parse MB/s and peak memory for each. Results are appended to a JSON
+lines history file and compared with the previous run that used the same
+parameters, so regressions show up:
+
+    python benchmarks/bench_suite.py --contacts 20000 --check
+"""
+import argparse
+import datetime
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+import zipfile
+
+import pandas as pd
+
+import py_qualtrics_api as pqa
+from py_qualtrics_api.testing import MockQualtrics, MockServer
+
+# metric name -> True if higher is better
+METRICS = {
+  'pagination_rows_per_sec': True,
+  'pagination_pages_per_sec': True,
+  'pagination_peak_mb': False,
+  'import_rows_per_sec': True,
+  'import_peak_mb': False,
+  'export_mb_per_sec': True,
+  'export_peak_mb': False,
+}
+
+
+def measure(fn):
+  """Run fn once for wall time and once under tracemalloc for peak memory.
+  Returns (seconds, peak MB, fn's return value)."""
+  t0 = time.perf_counter()
+  retval = fn()
+  elapsed = time.perf_counter() - t0
+  tracemalloc.start()
+  try:
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+  finally:
+    tracemalloc.stop()
+  return elapsed, peak / 1e6, retval
+
+
+def bench_pagination(api, app, n_contacts):
+  app.populate(mailing_lists=1, contacts_per_list=n_contacts)
+  ml_id = app.mailing_list_ids()[-1]
+  elapsed, peak, contacts = measure(lambda: api.get_contacts(ml_id, return_df=False))
+  rows = len(contacts) if contacts != () else 0
+  pages = -(-n_contacts // app.page_size)
+  return {'pagination_rows_per_sec': rows / elapsed,
+          'pagination_pages_per_sec': pages / elapsed,
+          'pagination_peak_mb': peak,
+          'pagination_rows': rows}
+
+
+def bench_import(api, app, n_rows):
+  app.populate(mailing_lists=1)
+  ml_id = app.mailing_list_ids()[-1]
+  df = pd.DataFrame.from_dict({
+    'email': ['person{}@example.com'.format(i) for i in range(n_rows)],
+    'firstName': ['First{}'.format(i) for i in range(n_rows)],
+    'lastName': ['Last{}'.format(i) for i in range(n_rows)],
+    'externalReference': [str(100000 + i) for i in range(n_rows)],
+    'site': ['S{}'.format(i % 40) for i in range(n_rows)]})
+  elapsed, peak, progress_id = measure(lambda: api.create_contacts_bulk(ml_id, df))
+  return {'import_rows_per_sec': n_rows / elapsed,
+          'import_peak_mb': peak,
+          'import_ok': progress_id != ()}
+
+
+def bench_export(api, app, n_responses):
+  app.populate(surveys=1, responses_per_survey=n_responses)
+  survey_id = app.survey_ids()[-1]
+  progress_id = api.create_response_export(survey_id)
+  status, file_id = 'inProgress', None
+  while status != 'complete':
+    status, file_id = api.get_response_export_progress(survey_id, progress_id)
+  elapsed, peak, df = measure(
+    lambda: api.get_response_export_file_as_dataframe(survey_id, file_id))
+  with zipfile.ZipFile(io.BytesIO(app.files[file_id])) as zf:
+    mb = sum(i.file_size for i in zf.infolist()) / 1e6
+  return {'export_mb_per_sec': mb / elapsed,
+          'export_peak_mb': peak,
+          'export_mb': mb,
+          'export_rows': df.shape[0] if hasattr(df, 'shape') else 0}
+
+
+def git_commit():
+  try:
+    return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                   stderr=subprocess.DEVNULL).decode().strip()
+  except (OSError, subprocess.CalledProcessError):
+    return None
+
+
+def compare(record, history, tolerance):
+  """Return a list of regression messages against the latest comparable
+  run in history."""
+  previous = [h for h in history if h['params'] == record['params']]
+  if not previous:
+    return []
+  base = previous[-1]
+  messages = []
+  for name, higher_is_better in METRICS.items():
+    old, new = base['metrics'].get(name), record['metrics'].get(name)
+    if not old or new is None:
+      continue
+    change = (new - old) / old
+    worse = change < -tolerance if higher_is_better else change > tolerance
+    if worse:
+      messages.append('{}: {:.4g} -> {:.4g} ({:+.0%}) vs {}'
+                      .format(name, old, new, change, base.get('commit')))
+  return messages
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+  parser.add_argument('--contacts', type=int, default=10000,
+                      help='contacts to page through')
+  parser.add_argument('--import-rows', type=int, default=10000,
+                      help='rows in the bulk contact import')
+  parser.add_argument('--responses', type=int, default=20000,
+                      help='responses in the export')
+  parser.add_argument('--page-size', type=int, default=100)
+  parser.add_argument('--latency', type=float, default=0.0,
+                      help='seconds the mock server waits before each response')
+  parser.add_argument('--throttle-rate', type=float, default=0.0,
+                      help='fraction of requests answered with 429')
+  parser.add_argument('--results', default=os.path.join(os.path.dirname(__file__),
+                                                        'results.jsonl'),
+                      help='JSON lines file the results are appended to')
+  parser.add_argument('--tolerance', type=float, default=0.2,
+                      help='relative change treated as a regression')
+  parser.add_argument('--check', action='store_true',
+                      help='exit with status 1 if a regression is found')
+  args = parser.parse_args()
+
+  params = {'contacts': args.contacts, 'import_rows': args.import_rows,
+            'responses': args.responses, 'page_size': args.page_size,
+            'latency': args.latency, 'throttle_rate': args.throttle_rate}
+  app = MockQualtrics(page_size=args.page_size, latency=args.latency,
+                      throttle_rate=args.throttle_rate)
+  metrics = {}
+  with MockServer(app) as server:
+    api = pqa.QualtricsAPI(server.config())
+    metrics.update(bench_pagination(api, app, args.contacts))
+    metrics.update(bench_import(api, app, args.import_rows))
+    metrics.update(bench_export(api, app, args.responses))
+  metrics['requests'] = app.request_count
+  metrics['throttled'] = app.throttled_count
+
+  record = {'timestamp': datetime.datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'params': params,
+            'metrics': metrics}
+  for k, v in metrics.items():
+    print('{:<28} {:>14.4g}'.format(k, v) if isinstance(v, float)
+          else '{:<28} {:>14}'.format(k, str(v)))
+
+  history = []
+  if os.path.exists(args.results):
+    with open(args.results) as f:
+      history = [json.loads(line) for line in f if line.strip()]
+  regressions = compare(record, history, args.tolerance)
+  with open(args.results, 'a') as f:
+    f.write(json.dumps(record) + '\n')
+  for msg in regressions:
+    print('REGRESSION {}'.format(msg))
+  if regressions and args.check:
+    sys.exit(1)
+
+
+if __name__ == '__main__':
+  main()
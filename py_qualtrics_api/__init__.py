@@ -1,27 +1,52 @@
 """
-Py_Qualtrics_API is comprised of two classes:
+Py_Qualtrics_API is comprised of the following classes:
 
 #. :class:`~py_qualtrics_api.QualtricsAPI`, which does blah;
-#. :class:`~py_qualtrics_api.APIConfig`, which does blah.
+#. :class:`~py_qualtrics_api.APIConfig`, which does blah;
+#. :class:`~py_qualtrics_api.ResponseStore`, a local SQLite store of survey
+   responses;
+#. :class:`~py_qualtrics_api.ContactMirror`, a local, indexed copy of mailing
+   list contacts;
+#. :class:`~py_qualtrics_api.ClientPool`, which spreads calls across several
+   API tokens;
+#. :class:`~py_qualtrics_api.Pipeline`, which runs dependent steps, such as a
+   campaign launch, concurrently.
 """
 
 from py_qualtrics_api.tools import *
+from py_qualtrics_api.result import ApiResult
+from py_qualtrics_api.records import Records
+from py_qualtrics_api.codec import set_json_codec, get_json_codec
+from py_qualtrics_api.instrument import Metrics, RequestInfo
+from py_qualtrics_api.journal import Journal
+from py_qualtrics_api.pool import ClientPool
+from py_qualtrics_api.pipeline import Pipeline, PipelineError, StepFailed
+from py_qualtrics_api.transport import (Transport, RequestsTransport,
+                                        InMemoryTransport, RecordingTransport,
+                                        ReplayTransport)
+from py_qualtrics_api._version import __version__
 name = "py_qualrics_api"
-from pkg_resources import get_distribution, DistributionNotFound
-from os.path import join
 
-__all__ = ['QualtricsAPI', 'APIConfig']
+__all__ = ['QualtricsAPI', 'APIConfig', 'ResponseStore',
+           'ContactMirror', 'ApiResult', 'Records', 'set_json_codec',
+           'get_json_codec', 'Metrics', 'RequestInfo', 'Transport', 'RequestsTransport',
+           'InMemoryTransport', 'RecordingTransport', 'ReplayTransport',
+           'Journal', 'ClientPool', 'Pipeline', 'PipelineError', 'StepFailed',
+           'ResponseEventReceiver', 'Profiler']
 
-# This approach to setting the __version__ attribute on the package
-# was stolen from:
-# http://stackoverflow.com/questions/17583443/what-is-the-correct-way-to-share-package-version-with-setup-py-and-the-package
-try:
-    _dist = get_distribution('py_qualtrics_api')
-    if not _dist:
-    # if not __file__.startswith(join(_dist.location, 'pyinter')):
-        # not installed, but there is another version that *is*
-        raise DistributionNotFound
-except DistributionNotFound:
-    __version__ = 'Please install this project with setup.py'
-else:
-    __version__ = _dist.version
+# Classes whose modules pull in extra dependencies (sqlite3, http.server,
+# tracemalloc) are
+# imported on first access.
+_lazy_attributes = {'ResponseStore': 'py_qualtrics_api.store',
+                    'ContactMirror': 'py_qualtrics_api.mirror',
+                    'ResponseEventReceiver': 'py_qualtrics_api.events',
+                    'Profiler': 'py_qualtrics_api.profiling'}
+
+
+def __getattr__(attr):
+  if attr in _lazy_attributes:
+    import importlib
+    value = getattr(importlib.import_module(_lazy_attributes[attr]), attr)
+    globals()[attr] = value
+    return value
+  raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, attr))
@@ -0,0 +1,27 @@
+#! /usr/local/bin python3
+import importlib
+
+
+class LazyModule:
+  """Stand-in for a module that is imported on first attribute access, so
+  heavy dependencies (pandas, PyYAML, ...) aren't loaded by
+  ``import py_qualtrics_api``."""
+
+  def __init__(self, name):
+    self.__dict__['_name'] = name
+    self.__dict__['_module'] = None
+
+  def _load(self):
+    if self._module is None:
+      self.__dict__['_module'] = importlib.import_module(self._name)
+    return self._module
+
+  def __getattr__(self, attr):
+    return getattr(self._load(), attr)
+
+  def __setattr__(self, attr, value):
+    setattr(self._load(), attr, value)
+
+  def __repr__(self):
+    return '<LazyModule {!r}{}>'.format(self._name,
+                                        '' if self._module is None else ' (loaded)')
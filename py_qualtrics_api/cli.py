@@ -0,0 +1,645 @@
+#! /usr/local/bin python3
+"""The py-qualtrics command: bulk exports, contact imports and syncs, dumps
+and deletes without writing a script. Files are read and written in chunks
+and listings page by page, so any number of rows fits in bounded memory::
+
+    py-qualtrics export SV_1 SV_2 -o exports --format parquet
+    py-qualtrics contacts import ML_1 contacts.csv --checkpoint import.jsonl
+    py-qualtrics contacts sync ML_1 contacts.csv --delete-missing
+    py-qualtrics dump users -o users.csv
+    py-qualtrics delete lists --where category=Test --yes
+
+Every command takes --config (default $QUALTRICS_CONFIG or config.yml),
+--workers, --chunk-size, --rate (requests per second), --checkpoint (a
+journal that lets an interrupted run be repeated without redoing finished
+work), --report (a CSV of per-item outcomes), --profile (a JSON or, for
+.folded files, flame-graph profile of the run) and --quiet. Progress goes to
+stderr. The exit status is 0 on success, 1 when anything failed and 2 for
+usage errors.
+"""
+import argparse
+import csv
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+
+from py_qualtrics_api.tools import QualtricsAPI, pd, _idempotency_key
+from py_qualtrics_api.concurrency import RateLimiter, run_streaming
+from py_qualtrics_api.journal import Journal
+
+
+class CliError(Exception):
+  """A problem reported to the user as an error message, not a traceback."""
+
+
+class Progress:
+  """Count done and failed items and report them on stderr: rewriting one
+  line on a terminal, and every few seconds otherwise (e.g. in a log)."""
+
+  def __init__(self, label, total=None, quiet=False, stream=None):
+    self.label = label
+    self.total = total
+    self.quiet = quiet
+    self.stream = stream if stream is not None else sys.stderr
+    self.tty = hasattr(self.stream, 'isatty') and self.stream.isatty()
+    self.interval = 0.1 if self.tty else 5.0
+    self.done = 0
+    self.failed = 0
+    self._lock = threading.Lock()
+    self._start = self._last = time.monotonic()
+
+  def line(self):
+    elapsed = max(time.monotonic() - self._start, 1e-9)
+    total = '' if self.total is None else '/{}'.format(self.total)
+    return '{}: {}{} done, {} failed ({:.1f}/s)'.format(
+      self.label, self.done, total, self.failed, self.done / elapsed)
+
+  def update(self, done=1, failed=0):
+    with self._lock:
+      self.done += done
+      self.failed += failed
+      now = time.monotonic()
+      if not self.quiet and now - self._last >= self.interval:
+        self._last = now
+        self.stream.write('\r' + self.line() if self.tty else self.line() + '\n')
+        self.stream.flush()
+
+  def close(self):
+    if not self.quiet:
+      self.stream.write(('\r' if self.tty else '') + self.line() + '\n')
+      self.stream.flush()
+
+
+class Report:
+  """Per-item outcomes written to a CSV file as they arrive (or nowhere)."""
+
+  def __init__(self, path, fields):
+    self._file = None
+    if path is not None:
+      self._file = open(path, 'w', newline='', encoding='utf-8')
+      self._writer = csv.DictWriter(self._file, fields, extrasaction='ignore')
+      self._writer.writeheader()
+
+  def write(self, row):
+    if self._file is not None:
+      self._writer.writerow(row)
+
+  def close(self):
+    if self._file is not None:
+      self._file.close()
+
+
+def _chunks(items, size):
+  chunk = []
+  for item in items:
+    chunk.append(item)
+    if len(chunk) >= size:
+      yield chunk
+      chunk = []
+  if chunk:
+    yield chunk
+
+
+def _read_ids(args):
+  """Ids given as arguments, then those in --ids-file (one per line, or a
+  CSV with an 'id' column)."""
+  ids = list(args.ids)
+  if args.ids_file is not None:
+    with open(args.ids_file, newline='', encoding='utf-8') as f:
+      first = f.readline().strip()
+      if first.lower() == 'id' or ',' in first:
+        f.seek(0)
+        ids += [row['id'] for row in csv.DictReader(f)]
+      else:
+        lines = [first] + [line.strip() for line in f]
+        ids += [i for i in lines if i and not i.startswith('#')]
+  return ids
+
+
+def _read_table(path, chunk_size):
+  """Yield DataFrames of up to chunk_size rows from a CSV, TSV or JSON lines
+  file. CSV values are all read as strings."""
+  if path.endswith(('.jsonl', '.ndjson')):
+    for chunk in pd.read_json(path, lines=True, dtype=False, chunksize=chunk_size):
+      yield chunk
+    return
+  sep = '\t' if path.endswith('.tsv') else ','
+  for chunk in pd.read_csv(path, sep=sep, dtype=str, chunksize=chunk_size):
+    yield chunk
+
+
+def _read_contacts(path, chunk_size):
+  for chunk in _read_table(path, chunk_size):
+    for col in chunk.columns:
+      if col.lower() == 'unsubscribed':
+        chunk[col] = (chunk[col].astype(str).str.strip().str.lower()
+                      .isin(['1', 'true', 'yes']))
+    yield chunk
+
+
+def _matches(value, text):
+  if isinstance(value, bool):
+    return str(value).lower() == text.lower()
+  return value is not None and str(value) == text
+
+
+def _select(api, path, where):
+  """Stream a listing and return the ids of the elements whose fields equal
+  every key=value in where."""
+  conditions = []
+  for cond in where:
+    if '=' not in cond:
+      raise CliError('--where expects field=value, not {!r}'.format(cond))
+    conditions.append(cond.split('=', 1))
+  ids = []
+
+  def on_page(elements):
+    ids.extend(e['id'] for e in elements
+               if all(_matches(e.get(k), v) for k, v in conditions))
+  if api.stream_pages(path, on_page) is None:
+    raise CliError('Listing {} failed; nothing was selected.'.format(path))
+  return ids
+
+
+def _csv_to_parquet(src, dest, chunk_size):
+  """Convert a Qualtrics CSV export (three header rows) to Parquet one chunk
+  at a time. Values are kept as strings so every chunk has the same schema."""
+  try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+  except ImportError:
+    raise CliError('Writing Parquet requires pyarrow (pip install pyarrow).')
+  writer = None
+  try:
+    for chunk in pd.read_csv(src, skiprows=[1, 2], dtype=str, chunksize=chunk_size):
+      table = pa.Table.from_pandas(chunk, preserve_index=False)
+      if writer is None:
+        writer = pq.ParquetWriter(dest + '.part', table.schema)
+      writer.write_table(table)
+    if writer is None:
+      header = pd.read_csv(src, skiprows=[1, 2], dtype=str, nrows=0)
+      pq.write_table(pa.Table.from_pandas(header, preserve_index=False), dest + '.part')
+  finally:
+    if writer is not None:
+      writer.close()
+  os.replace(dest + '.part', dest)
+
+
+def cmd_export(api, args, journal):
+  ids = _read_ids(args)
+  if args.all:
+    ids += _select(api, 'surveys', [])
+  if not ids:
+    raise CliError('No surveys given; pass survey ids, --ids-file or --all.')
+  api_format = 'csv' if args.format == 'parquet' else args.format
+  kwargs = dict((k, v) for k, v in [('start_date', args.start_date),
+                                    ('end_date', args.end_date)] if v is not None)
+  progress = Progress('export', len(ids), args.quiet)
+  report = Report(args.report, ['id', 'path', 'error'])
+
+  def export(survey_id):
+    done_key = _idempotency_key('parquet {}'.format(survey_id),
+                                dict(kwargs, output_dir=os.path.abspath(args.output_dir)))
+    if args.format == 'parquet' and journal is not None and done_key in journal:
+      return journal.get(done_key)
+    row = api.export_responses_bulk([survey_id], args.output_dir, api_format,
+                                    poll_interval=args.poll_interval,
+                                    max_workers=1, checkpoint=journal,
+                                    return_df=False, **kwargs)[0]
+    if row['error'] is not None:
+      raise RuntimeError(row['error'])
+    if args.format != 'parquet':
+      return row['path']
+    path = os.path.splitext(row['path'])[0] + '.parquet'
+    _csv_to_parquet(row['path'], path, args.chunk_size)
+    # Journal the parquet file before removing the CSV the export's own
+    # journal entry points at, so a crash in between can't strand a resume.
+    if journal is not None:
+      journal.record(done_key, path)
+    os.remove(row['path'])
+    return path
+
+  def on_result(survey_id, path, exc):
+    report.write({'id': survey_id, 'path': path,
+                  'error': None if exc is None else '{}: {}'.format(type(exc).__name__, exc)})
+    progress.update(1, exc is not None)
+
+  try:
+    run_streaming(export, ids, args.workers, on_result=on_result)
+  finally:
+    report.close()
+    progress.close()
+  return progress.failed
+
+
+def cmd_contacts_import(api, args, journal):
+  prefix = 'POST mailinglists/{}/contactimports'.format(args.list_id)
+  progress = Progress('import', None, args.quiet)
+  report = Report(args.report, ['chunk', 'rows', 'progress_id', 'error'])
+
+  def load(item):
+    i, chunk = item
+    digest = hashlib.sha1(chunk.to_json(orient='records').encode('utf-8')).hexdigest()
+    key = '{} {} {}'.format(prefix, i, digest)
+    if journal is not None and key in journal:
+      return journal.get(key)
+    progress_id = api.create_contacts_bulk(args.list_id, chunk)
+    if progress_id == ():
+      raise RuntimeError('contact import request failed')
+    if journal is not None:
+      journal.record(key, progress_id)
+    return progress_id
+
+  def on_result(item, progress_id, exc):
+    i, chunk = item
+    report.write({'chunk': i, 'rows': len(chunk), 'progress_id': progress_id,
+                  'error': None if exc is None else '{}: {}'.format(type(exc).__name__, exc)})
+    progress.update(len(chunk), len(chunk) if exc is not None else 0)
+
+  try:
+    run_streaming(load, enumerate(_read_contacts(args.file, args.chunk_size)),
+                  args.workers, on_result=on_result)
+  finally:
+    report.close()
+    progress.close()
+  return progress.failed
+
+
+# Payload fields filled with defaults by _prep_mailing_list_data; a sync only
+# compares and sends them when the file has the column.
+_DEFAULTED_CONTACT_FIELDS = {'externalReference': 'externalreference',
+                             'unsubscribed': 'unsubscribed',
+                             'language': 'language'}
+
+
+def _contact_changes(current, payload):
+  """Return the fields of payload that differ from the contact record."""
+  changes = {}
+  for field, value in payload.items():
+    if field == 'embeddedData':
+      have = current.get('embeddedData') or {}
+      embedded = dict((k, v) for k, v in value.items() if have.get(k) != v)
+      if embedded:
+        changes['embeddedData'] = embedded
+      continue
+    old = current.get('externalDataReference' if field == 'externalReference' else field)
+    if old != value and not (old in (None, '') and value in (None, '')):
+      changes[field] = value
+  return changes
+
+
+def cmd_contacts_sync(api, args, journal):
+  from py_qualtrics_api.mirror import ContactMirror
+  list_id = args.list_id
+  mirror = ContactMirror(args.mirror)
+  api.attach_contact_mirror(mirror)
+  if api.refresh_contact_mirror(mirror, list_id) == ():
+    raise CliError('Could not read mailing list {}.'.format(list_id))
+  prefix = 'sync mailinglists/{}'.format(list_id)
+  progress = Progress('sync', None, args.quiet)
+  report = Report(args.report, ['email', 'externalReference', 'id', 'action', 'error'])
+  counts = dict.fromkeys(['created', 'updated', 'unchanged', 'deleted'], 0)
+  seen = set()
+
+  def payloads():
+    for chunk in _read_contacts(args.file, args.chunk_size):
+      columns = set(c.lower() for c in chunk.columns)
+      for payload in api._prep_mailing_list_data(chunk):
+        payload = dict((k, None if isinstance(v, float) and v != v else v)
+                       for k, v in payload.items())
+        for field, column in _DEFAULTED_CONTACT_FIELDS.items():
+          if column not in columns:
+            payload.pop(field, None)
+        yield payload
+
+  def sync(payload):
+    key = _idempotency_key(prefix, payload)
+    if journal is not None and key in journal:
+      return journal.get(key)
+    if args.match_on == 'email':
+      found = mirror.find(list_id, email=payload['email'])
+    else:
+      found = mirror.find(list_id, external_reference=payload.get('externalReference'))
+    if len(found) > 1:
+      raise ValueError('{} contacts match'.format(len(found)))
+    if not found:
+      contact_id = api.create_contact(list_id, payload)
+      if contact_id == ():
+        raise RuntimeError('create failed')
+      result = {'id': contact_id, 'action': 'created'}
+    else:
+      result = {'id': found[0]['id'], 'action': 'unchanged'}
+      changes = _contact_changes(found[0], payload)
+      if changes:
+        if api.update_contact(list_id, result['id'], changes) == ():
+          raise RuntimeError('update failed')
+        result['action'] = 'updated'
+    if journal is not None:
+      journal.record(key, result)
+    return result
+
+  def on_result(payload, result, exc):
+    row = {'email': payload.get('email'),
+           'externalReference': payload.get('externalReference')}
+    if exc is None:
+      seen.add(result['id'])
+      counts[result['action']] += 1
+      row.update(result)
+    else:
+      row['error'] = '{}: {}'.format(type(exc).__name__, exc)
+    report.write(row)
+    progress.update(1, exc is not None)
+
+  try:
+    total = run_streaming(sync, payloads(), args.workers, on_result=on_result)
+    if args.delete_missing:
+      if total == 0 or progress.failed:
+        raise CliError('Not deleting missing contacts: the file was empty or '
+                       'some rows failed.')
+      missing = [c['id'] for c in mirror.contacts(list_id) if c['id'] not in seen]
+      for chunk in _chunks(missing, args.chunk_size):
+        for row in api.delete_contacts_bulk(list_id, chunk, max_workers=args.workers,
+                                            checkpoint=journal, return_df=False):
+          if row['error'] is None:
+            counts['deleted'] += 1
+          report.write({'id': row['id'], 'action': 'deleted', 'error': row['error']})
+          progress.update(1, row['error'] is not None)
+  finally:
+    report.close()
+    progress.close()
+    mirror.close()
+  print(', '.join('{} {}'.format(v, k) for k, v in counts.items()))
+  return progress.failed
+
+
+_LISTINGS = {'surveys': 'surveys', 'lists': 'mailinglists', 'users': 'users'}
+
+
+def _open_writer(f, fmt):
+  """Return write(elements) writing JSON lines or CSV (columns from the
+  first page; nested values as JSON) to f."""
+  state = {}
+
+  def write(elements):
+    if fmt == 'jsonl':
+      for e in elements:
+        f.write(json.dumps(e) + '\n')
+      return
+    if not elements:
+      return
+    if 'writer' not in state:
+      state['writer'] = csv.DictWriter(f, list(elements[0]), extrasaction='ignore')
+      state['writer'].writeheader()
+    state['writer'].writerows(
+      dict((k, json.dumps(v) if isinstance(v, (dict, list)) else v) for k, v in e.items())
+      for e in elements)
+  return write
+
+
+def _dump_to(api, path, target, fmt, progress):
+  """Stream the listing at path into the file target ('-' is stdout),
+  writing via a .part file so a complete file is never half-written."""
+  if target == '-':
+    f = sys.stdout
+  else:
+    f = open(target + '.part', 'w', newline='', encoding='utf-8')
+  write = _open_writer(f, fmt)
+  try:
+    count = api.stream_pages(path, lambda elements: (write(elements),
+                                                     progress.update(len(elements))))
+  finally:
+    if f is not sys.stdout:
+      f.close()
+  if count is None:
+    raise CliError('Listing {} failed.'.format(path))
+  if f is not sys.stdout:
+    os.replace(target + '.part', target)
+  return count
+
+
+def cmd_dump(api, args, journal):
+  fmt = args.format
+  if fmt is None:
+    fmt = 'jsonl' if (args.output or '').endswith(('.jsonl', '.ndjson')) else 'csv'
+  if args.what != 'contacts':
+    if args.ids or args.ids_file:
+      raise CliError('Only "dump contacts" takes mailing list ids.')
+    progress = Progress('dump ' + args.what, None, args.quiet)
+    try:
+      _dump_to(api, _LISTINGS[args.what], args.output or '-', fmt, progress)
+    finally:
+      progress.close()
+    return 0
+  ids = _read_ids(args)
+  if args.all:
+    ids += _select(api, 'mailinglists', [])
+  if not ids:
+    raise CliError('No mailing lists given; pass list ids, --ids-file or --all.')
+  output_dir = args.output or '.'
+  os.makedirs(output_dir, exist_ok=True)
+  progress = Progress('dump contacts', None, args.quiet)
+  report = Report(args.report, ['id', 'path', 'contacts', 'error'])
+
+  def dump(list_id):
+    key = 'dump contacts {}'.format(list_id)
+    if journal is not None and key in journal:
+      return journal.get(key)
+    path = os.path.join(output_dir, '{}.{}'.format(list_id, fmt))
+    result = {'path': path,
+              'contacts': _dump_to(api, 'mailinglists/{}/contacts'.format(list_id),
+                                   path, fmt, progress)}
+    if journal is not None:
+      journal.record(key, result)
+    return result
+
+  def on_result(list_id, result, exc):
+    row = dict(result or {}, id=list_id)
+    if exc is not None:
+      row['error'] = '{}: {}'.format(type(exc).__name__, exc)
+      progress.update(0, 1)
+    report.write(row)
+
+  try:
+    run_streaming(dump, ids, args.workers, on_result=on_result)
+  finally:
+    report.close()
+    progress.close()
+  return progress.failed
+
+
+def cmd_delete(api, args, journal):
+  if args.what == 'contacts':
+    if args.list_id is None:
+      raise CliError('Deleting contacts needs --list LIST_ID.')
+    listing = 'mailinglists/{}/contacts'.format(args.list_id)
+
+    def delete(ids):
+      return api.delete_contacts_bulk(args.list_id, ids, max_workers=args.workers,
+                                      checkpoint=journal, return_df=False)
+  else:
+    listing = _LISTINGS[args.what]
+    method = {'surveys': api.delete_surveys_bulk,
+              'lists': api.delete_mailing_lists_bulk}[args.what]
+
+    def delete(ids):
+      return method(ids, max_workers=args.workers, checkpoint=journal,
+                    return_df=False)
+  ids = _read_ids(args)
+  if args.where:
+    ids += _select(api, listing, args.where)
+  elif not ids:
+    raise CliError('Nothing selected; pass ids, --ids-file or --where.')
+  if args.dry_run:
+    for i in ids:
+      print(i)
+    return 0
+  if not args.yes:
+    if not sys.stdin.isatty():
+      raise CliError('Refusing to delete {} {} without --yes.'.format(len(ids), args.what))
+    answer = input('Delete {} {}? [y/N] '.format(len(ids), args.what))
+    if answer.strip().lower() not in ('y', 'yes'):
+      return 0
+  progress = Progress('delete ' + args.what, len(ids), args.quiet)
+  report = Report(args.report, ['id', 'outcome', 'error'])
+  try:
+    for chunk in _chunks(ids, args.chunk_size):
+      for row in delete(chunk):
+        report.write(row)
+        progress.update(1, row['error'] is not None)
+  finally:
+    report.close()
+    progress.close()
+  return progress.failed
+
+
+def _add_ids(parser):
+  parser.add_argument('ids', nargs='*', metavar='ID')
+  parser.add_argument('--ids-file', default=None,
+                      help="file of ids, one per line or a CSV with an 'id' column")
+
+
+def build_parser():
+  common = argparse.ArgumentParser(add_help=False)
+  common.add_argument('--config', default=os.environ.get('QUALTRICS_CONFIG', 'config.yml'),
+                      help='YAML config file (default: $QUALTRICS_CONFIG or config.yml)')
+  common.add_argument('--workers', type=int, default=8,
+                      help='concurrent requests or jobs (default: 8)')
+  common.add_argument('--chunk-size', type=int, default=1000,
+                      help='rows read, sent or written at a time (default: 1000)')
+  common.add_argument('--rate', type=float, default=None,
+                      help='maximum requests per second')
+  common.add_argument('--checkpoint', default=None,
+                      help='journal file recording finished work; rerun with the '
+                           'same file to resume')
+  common.add_argument('--report', default=None,
+                      help='write per-item outcomes to this CSV file')
+  common.add_argument('--profile', default=None,
+                      help='write a time and memory profile of the run: JSON, or '
+                           'folded stacks for flame graphs if the name ends .folded')
+  common.add_argument('--quiet', action='store_true', help='no progress output')
+
+  parser = argparse.ArgumentParser(
+    prog='py-qualtrics',
+    description='Bulk exports, contact imports and syncs, dumps and deletes.')
+  commands = parser.add_subparsers(dest='command', metavar='COMMAND')
+
+  p = commands.add_parser('export', parents=[common],
+                          help='export survey responses to files')
+  _add_ids(p)
+  p.add_argument('--all', action='store_true', help='export every survey')
+  p.add_argument('-o', '--output-dir', default='.')
+  p.add_argument('--format', default='csv',
+                 choices=['csv', 'tsv', 'json', 'ndjson', 'xml', 'spss', 'parquet'])
+  p.add_argument('--start-date', default=None, help='e.g. 2020-01-01T00:00:00Z')
+  p.add_argument('--end-date', default=None)
+  p.add_argument('--poll-interval', type=float, default=1.0)
+  p.set_defaults(run=cmd_export)
+
+  contacts = commands.add_parser('contacts', help='load a contacts file into a mailing list')
+  actions = contacts.add_subparsers(dest='action', metavar='ACTION')
+  p = actions.add_parser('import', parents=[common],
+                         help='add every row of a CSV/TSV/JSON lines file')
+  p.add_argument('list_id')
+  p.add_argument('file')
+  p.set_defaults(run=cmd_contacts_import)
+  p = actions.add_parser('sync', parents=[common],
+                         help='create missing and update changed contacts')
+  p.add_argument('list_id')
+  p.add_argument('file')
+  p.add_argument('--match-on', default='email', choices=['email', 'externalReference'])
+  p.add_argument('--delete-missing', action='store_true',
+                 help='also delete contacts that are not in the file')
+  p.add_argument('--mirror', default=':memory:',
+                 help='ContactMirror database to reuse between runs')
+  p.set_defaults(run=cmd_contacts_sync)
+
+  p = commands.add_parser('dump', parents=[common],
+                          help='write surveys, lists, users or contacts to files')
+  p.add_argument('what', choices=['surveys', 'lists', 'users', 'contacts'])
+  _add_ids(p)
+  p.add_argument('--all', action='store_true', help='dump contacts of every list')
+  p.add_argument('-o', '--output', default=None,
+                 help='output file (default: stdout); for contacts, a directory')
+  p.add_argument('--format', default=None, choices=['csv', 'jsonl'])
+  p.set_defaults(run=cmd_dump)
+
+  p = commands.add_parser('delete', parents=[common],
+                          help='delete surveys, lists or contacts')
+  p.add_argument('what', choices=['surveys', 'lists', 'contacts'])
+  _add_ids(p)
+  p.add_argument('--list', dest='list_id', default=None,
+                 help='mailing list of the contacts to delete')
+  p.add_argument('--where', action='append', default=[], metavar='FIELD=VALUE',
+                 help='select from the current listing (repeatable)')
+  p.add_argument('--dry-run', action='store_true', help='print the selected ids only')
+  p.add_argument('--yes', action='store_true', help='do not ask for confirmation')
+  p.set_defaults(run=cmd_delete)
+  return parser
+
+
+def main(argv=None, api=None):
+  """Run the command line; api replaces the client built from --config."""
+  parser = build_parser()
+  args = parser.parse_args(argv)
+  if not hasattr(args, 'run'):
+    parser.print_help(sys.stderr)
+    return 2
+  if args.workers < 1 or args.chunk_size < 1:
+    parser.error('--workers and --chunk-size must be at least 1')
+  journal = None
+  try:
+    if api is None:
+      if not os.path.exists(args.config):
+        raise CliError('Config file {} not found.'.format(args.config))
+      api = QualtricsAPI(args.config)
+    if args.rate is not None:
+      limiter = RateLimiter(args.rate)
+      api.add_request_hook(pre=lambda info: limiter.acquire())
+    if args.checkpoint is not None:
+      journal = Journal(args.checkpoint)
+    if args.profile is not None:
+      api.enable_profiling()
+    failed = args.run(api, args, journal)
+  except CliError as e:
+    print('py-qualtrics: error: {}'.format(e), file=sys.stderr)
+    return 1
+  except KeyboardInterrupt:
+    print('py-qualtrics: interrupted', file=sys.stderr)
+    return 130
+  finally:
+    if journal is not None:
+      journal.close()
+    if args.profile is not None and api is not None and api.profiler is not None:
+      profiler = api.disable_profiling()
+      if args.profile.endswith('.folded'):
+        profiler.write_folded(args.profile)
+      else:
+        profiler.write_json(args.profile)
+  return 1 if failed else 0
+
+
+if __name__ == '__main__':
+  sys.exit(main())
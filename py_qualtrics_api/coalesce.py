@@ -0,0 +1,81 @@
+#! /usr/local/bin python3
+"""Single-flight execution: concurrent identical calls share one result."""
+import threading
+import time
+
+
+class _Call:
+
+  __slots__ = ('done', 'value', 'error')
+
+  def __init__(self):
+    self.done = threading.Event()
+    self.value = None
+    self.error = None
+
+
+class SingleFlight:
+  """Run at most one call per key at a time. Callers that ask for a key
+  while its call is in flight wait for it and receive the same value (or
+  exception) instead of making their own call. With ttl > 0, values for
+  which cacheable(value) is true are also kept for ttl seconds and returned
+  to later callers without a call. Shared values must not be modified."""
+
+  def __init__(self, ttl=0.0):
+    self.ttl = ttl
+    self._lock = threading.Lock()
+    self._calls = {}
+    self._cache = {}
+    self._generation = 0
+    self.calls = 0
+    self.shared = 0
+    self.cache_hits = 0
+
+  def do(self, key, fn, cacheable=None):
+    """Return fn() for key, sharing the call with concurrent callers."""
+    with self._lock:
+      if self.ttl and key in self._cache:
+        expires, value = self._cache[key]
+        if expires > time.monotonic():
+          self.cache_hits += 1
+          return value
+        del self._cache[key]
+      call = self._calls.get(key)
+      leader = call is None
+      if leader:
+        call = self._calls[key] = _Call()
+        generation = self._generation
+        self.calls += 1
+      else:
+        self.shared += 1
+    if not leader:
+      call.done.wait()
+      if call.error is not None:
+        raise call.error
+      return call.value
+    try:
+      call.value = fn()
+    except BaseException as e:
+      call.error = e
+      raise
+    finally:
+      with self._lock:
+        del self._calls[key]
+        # A value fetched across a clear() may be stale, so isn't cached.
+        if (call.error is None and self.ttl and generation == self._generation
+            and (cacheable is None or cacheable(call.value))):
+          self._cache[key] = (time.monotonic() + self.ttl, call.value)
+      call.done.set()
+    return call.value
+
+  def clear(self):
+    """Drop all cached values. Calls already in flight still complete and
+    are shared, but their values aren't cached."""
+    with self._lock:
+      self._cache.clear()
+      self._generation += 1
+
+  def stats(self):
+    with self._lock:
+      return {'calls': self.calls, 'shared': self.shared,
+              'cache_hits': self.cache_hits, 'cached': len(self._cache)}
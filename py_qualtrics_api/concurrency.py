@@ -0,0 +1,102 @@
+#! /usr/local/bin python3
+"""Helpers for running many API calls concurrently within rate limits."""
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, as_completed, wait
+
+
+class RateLimiter:
+  """Token bucket allowing `rate` acquisitions per second on average, with
+  bursts of up to `burst`. Safe to share between threads."""
+
+  def __init__(self, rate, burst=None):
+    if rate <= 0:
+      raise ValueError('rate must be positive')
+    self.rate = float(rate)
+    self.burst = float(burst if burst is not None else max(1.0, rate))
+    self._tokens = self.burst
+    self._updated = time.monotonic()
+    self._lock = threading.Lock()
+
+  def acquire(self):
+    while True:
+      with self._lock:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        if self._tokens >= 1.0:
+          self._tokens -= 1.0
+          return
+        wait = (1.0 - self._tokens) / self.rate
+      time.sleep(wait)
+
+
+def run_concurrently(fn, items, max_workers=8, rate_limiter=None, on_result=None):
+  """Call fn(item) for every item on a thread pool. Returns a list of
+  (item, result, exception) tuples in input order; exceptions are captured
+  rather than raised. on_result, if given, is called with each tuple as it
+  completes (from the calling thread)."""
+  items = list(items)
+  results = [None] * len(items)
+
+  def call(item):
+    if rate_limiter is not None:
+      rate_limiter.acquire()
+    try:
+      return (item, fn(item), None)
+    except Exception as e:
+      return (item, None, e)
+
+  if max_workers <= 1:
+    for i, item in enumerate(items):
+      results[i] = call(item)
+      if on_result is not None:
+        on_result(*results[i])
+    return results
+  with ThreadPoolExecutor(max_workers=max_workers) as executor:
+    # Each call runs in a copy of the caller's context, so context variables
+    # (e.g. the profiler's current operation) carry over to the workers.
+    futures = dict((executor.submit(contextvars.copy_context().run, call, item), i)
+                   for i, item in enumerate(items))
+    for future in as_completed(futures):
+      i = futures[future]
+      results[i] = future.result()
+      if on_result is not None:
+        on_result(*results[i])
+  return results
+
+
+def run_streaming(fn, items, max_workers=8, rate_limiter=None, on_result=None,
+                  max_pending=None):
+  """Like run_concurrently, but items may be a generator of any length: it
+  is consumed lazily with at most max_pending (default 2 * max_workers)
+  items in flight, and results are only passed to on_result, in completion
+  order, rather than collected. Returns the number of items processed."""
+  if max_pending is None:
+    max_pending = 2 * max(1, max_workers)
+  count = 0
+
+  def call(item):
+    if rate_limiter is not None:
+      rate_limiter.acquire()
+    try:
+      return (item, fn(item), None)
+    except Exception as e:
+      return (item, None, e)
+
+  def finish(futures):
+    for future in futures:
+      if on_result is not None:
+        on_result(*future.result())
+
+  with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+    pending = set()
+    for item in items:
+      if len(pending) >= max_pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        finish(done)
+      pending.add(executor.submit(contextvars.copy_context().run, call, item))
+      count += 1
+    finish(as_completed(pending))
+  return count
@@ -0,0 +1,377 @@
+#! /usr/local/bin python3
+"""Near-real-time response ingestion from Qualtrics event subscriptions.
+
+Instead of exporting on a schedule, ResponseEventReceiver subscribes to
+completed-response events, listens for Qualtrics' callbacks on a small HTTP
+server and loads just the responses it is told about into a ResponseStore::
+
+    store = ResponseStore('responses.db')
+    with ResponseEventReceiver(q, store, port=8080,
+                               public_url='https://hooks.example.com') as rx:
+        rx.subscribe([survey_id])
+        ...  # responses arrive in the store within seconds
+
+No API calls are made while no events arrive.
+"""
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+from py_qualtrics_api.concurrency import run_concurrently
+from py_qualtrics_api.instrument import logger
+
+COMPLETED_RESPONSE_TOPIC = 'surveyengine.completedResponse.{}'
+
+# Single-response API field -> response export column.
+_EXPORT_COLUMNS = {
+  'startDate': 'StartDate', 'endDate': 'EndDate', 'status': 'Status',
+  'ipAddress': 'IPAddress', 'progress': 'Progress',
+  'duration': 'Duration (in seconds)', 'finished': 'Finished',
+  'recordedDate': 'RecordedDate', 'recipientLastName': 'RecipientLastName',
+  'recipientFirstName': 'RecipientFirstName', 'recipientEmail': 'RecipientEmail',
+  'externalDataReference': 'ExternalReference',
+  'locationLatitude': 'LocationLatitude', 'locationLongitude': 'LocationLongitude',
+  'distributionChannel': 'DistributionChannel', 'userLanguage': 'UserLanguage'}
+_QID = re.compile(r'^(QID\d+)(.*)$')
+_TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def question_tags(questions):
+  """Map question ids to export tags from a list_questions result."""
+  if isinstance(questions, dict):
+    questions = questions.get('elements', list(questions.values()))
+  return dict((q['QuestionID'], q.get('DataExportTag') or q['QuestionID'])
+              for q in questions if isinstance(q, dict) and 'QuestionID' in q)
+
+
+def response_row(result, tags=None):
+  """Convert a get_response result into a row with the column names and
+  date format of a CSV response export, so both can go in one store."""
+  tags = tags or {}
+  row = {'ResponseId': result['responseId']}
+  for key, value in result.get('values', {}).items():
+    if key.startswith('_'):
+      continue
+    if key in _EXPORT_COLUMNS:
+      key = _EXPORT_COLUMNS[key]
+      if key.endswith('Date') and isinstance(value, str):
+        value = value.replace('T', ' ').rstrip('Z')[:19]
+    else:
+      match = _QID.match(key)
+      if match:
+        key = tags.get(match.group(1), match.group(1)) + match.group(2)
+    row[key] = value
+  return row
+
+
+def _parse_time(value):
+  for fmt in (_TIME_FORMAT, "%Y-%m-%dT%H:%M:%SZ"):
+    try:
+      return datetime.strptime(value, fmt)
+    except (TypeError, ValueError):
+      pass
+  return None
+
+
+class _EventHandler(BaseHTTPRequestHandler):
+
+  def do_POST(self):
+    receiver = self.server.receiver
+    parts = urlsplit(self.path)
+    query = parse_qs(parts.query)
+    length = int(self.headers.get('Content-Length') or 0)
+    body = self.rfile.read(length).decode('utf-8', 'replace')
+    if parts.path != receiver.path:
+      status = 404
+    elif receiver.secret is not None and query.get('key', [None])[0] != receiver.secret:
+      status = 403
+    else:
+      if 'json' in (self.headers.get('Content-Type') or ''):
+        try:
+          event = json.loads(body or '{}')
+        except ValueError:
+          event = None
+      else:
+        event = dict((k, v[0]) for k, v in parse_qs(body).items())
+      status = 200 if isinstance(event, dict) and receiver.receive(event) else 400
+    self.send_response(status)
+    self.send_header('Content-Length', '0')
+    self.end_headers()
+
+  def log_message(self, format, *args):
+    pass
+
+
+class ResponseEventReceiver:
+  """Receive completed-response events and load those responses into a
+  ResponseStore.
+
+  Events are queued and handled in batches by a background thread, once
+  batch_size have arrived or the oldest has waited max_delay seconds.
+  Each batch is handled per survey: up to export_threshold responses are
+  fetched one by one with get_response (max_workers at a time); more than
+  that triggers a response export covering the batch instead, starting
+  export_margin before its earliest completion time. Responses that can't
+  be fetched are retried in later batches, up to max_attempts times, and
+  then listed in self.failed.
+
+  The server listens on host:port at path. Qualtrics must be able to reach
+  it, so pass public_url (e.g. 'https://hooks.example.com') when it is
+  behind a proxy or tunnel. With secret set, the subscription URL carries
+  it as a 'key' query parameter and callbacks without it are rejected.
+  on_batch, if given, is called with (survey_id, upsert counts) after each
+  survey's responses are stored."""
+
+  def __init__(self, api, store, host='127.0.0.1', port=0,
+               path='/qualtrics/events', public_url=None, secret=None,
+               batch_size=50, max_delay=2.0, export_threshold=200,
+               export_margin=timedelta(days=1), export_poll_interval=2.0,
+               max_workers=4, max_attempts=3, on_batch=None):
+    self.api = api
+    self.store = store
+    self.path = path
+    self.secret = secret
+    self.public_url = public_url
+    self.batch_size = batch_size
+    self.max_delay = max_delay
+    self.export_threshold = export_threshold
+    self.export_margin = export_margin
+    self.export_poll_interval = export_poll_interval
+    self.max_workers = max_workers
+    self.max_attempts = max_attempts
+    self.on_batch = on_batch
+    self.subscriptions = []
+    self.failed = []
+    self._counts = {'received': 0, 'fetched': 0, 'exported': 0, 'batches': 0,
+                    'errors': 0}
+    self._pending = OrderedDict()
+    self._attempts = {}
+    self._tags = {}
+    self._cond = threading.Condition()
+    self._busy = False
+    self._flush_now = False
+    self._stopping = False
+    self._httpd = ThreadingHTTPServer((host, port), _EventHandler)
+    self._httpd.daemon_threads = True
+    self._httpd.receiver = self
+    self._threads = []
+
+  @property
+  def url(self):
+    """The URL Qualtrics is asked to POST events to."""
+    if self.public_url is not None:
+      base = self.public_url.rstrip('/')
+    else:
+      host, port = self._httpd.server_address[:2]
+      base = 'http://{}:{}'.format(host, port)
+    url = base + self.path
+    if self.secret is not None:
+      url += '?key={}'.format(self.secret)
+    return url
+
+  def start(self):
+    self._threads = [threading.Thread(target=self._httpd.serve_forever, daemon=True),
+                     threading.Thread(target=self._work, daemon=True)]
+    for t in self._threads:
+      t.start()
+    return self
+
+  def stop(self, unsubscribe=True):
+    """Stop listening, process events already received and (by default)
+    delete the subscriptions this receiver created."""
+    if unsubscribe:
+      self.unsubscribe()
+    if self._threads:
+      self._httpd.shutdown()
+    self._httpd.server_close()
+    with self._cond:
+      self._stopping = True
+      self._cond.notify_all()
+    for t in self._threads:
+      t.join()
+
+  def __enter__(self):
+    return self.start()
+
+  def __exit__(self, *exc):
+    self.stop()
+
+  def subscribe(self, survey_ids):
+    """Subscribe this receiver to completed responses for each survey.
+    Returns the new subscription ids."""
+    if isinstance(survey_ids, str):
+      survey_ids = [survey_ids]
+    new = []
+    for survey_id in survey_ids:
+      sub_id = self.api.create_event_subscription(
+        COMPLETED_RESPONSE_TOPIC.format(survey_id), self.url)
+      if sub_id == ():
+        raise RuntimeError('Subscribing to {} failed'.format(survey_id))
+      new.append(sub_id)
+    self.subscriptions += new
+    return new
+
+  def unsubscribe(self):
+    while self.subscriptions:
+      self.api.delete_event_subscription(self.subscriptions.pop())
+
+  def receive(self, event):
+    """Queue one event (a dict of the callback's fields). Returns False if
+    it isn't a response event."""
+    survey_id, response_id = event.get('SurveyID'), event.get('ResponseID')
+    if not survey_id or not response_id:
+      return False
+    with self._cond:
+      self._counts['received'] += 1
+      key = (survey_id, response_id)
+      if key not in self._pending:
+        self._pending[key] = (time.monotonic(), event.get('CompletedDate'))
+        self._cond.notify_all()
+    return True
+
+  def flush(self, timeout=None):
+    """Wait until every event received so far has been processed. Returns
+    False if timeout seconds pass first."""
+    deadline = None if timeout is None else time.monotonic() + timeout
+    with self._cond:
+      self._flush_now = True
+      self._cond.notify_all()
+      while self._pending or self._busy:
+        remaining = None if deadline is None else deadline - time.monotonic()
+        if remaining is not None and remaining <= 0:
+          return False
+        self._cond.wait(remaining)
+    return True
+
+  def stats(self):
+    with self._cond:
+      retval = dict(self._counts)
+      retval['pending'] = len(self._pending)
+      retval['failed'] = len(self.failed)
+    return retval
+
+  def _work(self):
+    while True:
+      with self._cond:
+        while True:
+          if self._pending:
+            age = time.monotonic() - next(iter(self._pending.values()))[0]
+            if (self._stopping or self._flush_now or age >= self.max_delay or
+                len(self._pending) >= self.batch_size):
+              break
+            self._cond.wait(self.max_delay - age)
+          elif self._stopping:
+            return
+          else:
+            self._flush_now = False
+            self._cond.wait()
+        batch = self._pending
+        self._pending = OrderedDict()
+        self._busy = True
+      try:
+        self._process(batch)
+      except Exception:
+        logger.exception('Processing response events failed')
+        with self._cond:
+          self._counts['errors'] += 1
+      finally:
+        with self._cond:
+          self._busy = False
+          if not self._pending:
+            self._flush_now = False
+          self._cond.notify_all()
+
+  def _process(self, batch):
+    by_survey = OrderedDict()
+    for (survey_id, response_id), (_, completed) in batch.items():
+      by_survey.setdefault(survey_id, []).append((response_id, completed))
+    for survey_id, events in by_survey.items():
+      try:
+        if len(events) > self.export_threshold:
+          ok = self._export(survey_id, events)
+          retry = [] if ok else events
+        else:
+          retry = self._fetch(survey_id, events)
+      except Exception:
+        logger.exception('Loading responses for %s failed', survey_id)
+        with self._cond:
+          self._counts['errors'] += 1
+        retry = events
+      self._retry(survey_id, retry)
+    with self._cond:
+      self._counts['batches'] += 1
+
+  def _retry(self, survey_id, events):
+    with self._cond:
+      for response_id, completed in events:
+        key = (survey_id, response_id)
+        self._attempts[key] = self._attempts.get(key, 0) + 1
+        if self._attempts[key] >= self.max_attempts:
+          self.failed.append(key)
+          del self._attempts[key]
+        elif key not in self._pending:
+          # Wait a full max_delay before trying again.
+          self._pending[key] = (time.monotonic(), completed)
+
+  def _question_tags(self, survey_id):
+    if survey_id not in self._tags:
+      questions = self.api.list_questions(survey_id)
+      if questions == ():
+        return None
+      if self.store.get_meta(survey_id) is None:
+        self.store.create_survey_table(survey_id, questions)
+      self._tags[survey_id] = question_tags(questions)
+    return self._tags[survey_id]
+
+  def _fetch(self, survey_id, events):
+    """Fetch and store responses one by one. Returns the events to retry."""
+    tags = self._question_tags(survey_id)
+    if tags is None:
+      return events
+    results = run_concurrently(
+      lambda ev: self.api.get_response(survey_id, ev[0]), events,
+      self.max_workers)
+    rows, retry = [], []
+    for ev, result, exc in results:
+      if exc is not None or result == () or result is None:
+        retry.append(ev)
+      else:
+        rows.append(response_row(result, tags))
+    if rows:
+      counts = self.store.upsert(survey_id, rows)
+      with self._cond:
+        self._counts['fetched'] += len(rows)
+      self._clear_attempts(survey_id, [r['ResponseId'] for r in rows])
+      if self.on_batch is not None:
+        self.on_batch(survey_id, counts)
+    return retry
+
+  def _export(self, survey_id, events):
+    """Load the batch's responses with one export. Returns True on success."""
+    if self._question_tags(survey_id) is None:
+      return False
+    kwargs = {}
+    completed = [_parse_time(c) for _, c in events]
+    if completed and all(c is not None for c in completed):
+      start = min(completed) - self.export_margin
+      kwargs['start_date'] = start.strftime("%Y-%m-%dT%H:%M:%SZ")
+    counts = self.api.load_responses_to_store(self.store, survey_id,
+                                              self.export_poll_interval, **kwargs)
+    if counts == ():
+      return False
+    with self._cond:
+      self._counts['exported'] += len(events)
+    self._clear_attempts(survey_id, [rid for rid, _ in events])
+    if self.on_batch is not None:
+      self.on_batch(survey_id, counts)
+    return True
+
+  def _clear_attempts(self, survey_id, response_ids):
+    with self._cond:
+      for rid in response_ids:
+        self._attempts.pop((survey_id, rid), None)
@@ -0,0 +1,183 @@
+#! /usr/local/bin python3
+"""Request instrumentation: per-request records passed to hooks, in-process
+metrics and helpers for logging requests without leaking API tokens."""
+import bisect
+import json
+import logging
+import re
+import threading
+import time
+
+logger = logging.getLogger('py_qualtrics_api')
+
+# Latency histogram bucket upper bounds, in milliseconds.
+LATENCY_BUCKETS_MS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000,
+                      30000, float('inf')]
+
+_SENSITIVE_HEADERS = {'x-api-token', 'authorization', 'cookie'}
+_SENSITIVE_FIELDS = {'password'}
+_ID_SEGMENT = re.compile(r'^([A-Z]{1,6}_[A-Za-z0-9]+|[0-9a-fA-F-]{16,})$')
+
+
+def endpoint_name(method, url):
+  """Return a low-cardinality name for a request, e.g.
+  'GET /surveys/{id}/export-responses/{id}'."""
+  path = url.split('?', 1)[0]
+  if '/API/v3' in path:
+    path = path.split('/API/v3', 1)[1]
+  segments = ['{id}' if _ID_SEGMENT.match(seg) else seg
+              for seg in path.split('/')]
+  return '{} {}'.format(method.upper(), '/'.join(segments) or '/')
+
+
+def redact_headers(headers):
+  """Return a copy of headers with credentials masked."""
+  if headers is None:
+    return {}
+  return dict((k, '<redacted>' if k.lower() in _SENSITIVE_HEADERS else v)
+              for k, v in headers.items())
+
+
+def _mask_fields(value):
+  """Mask sensitive fields of decoded JSON in place; return whether any
+  were found."""
+  found = False
+  if isinstance(value, dict):
+    for k, v in value.items():
+      if k.lower() in _SENSITIVE_FIELDS:
+        value[k] = '<redacted>'
+        found = True
+      else:
+        found = _mask_fields(v) or found
+  elif isinstance(value, list):
+    for v in value:
+      found = _mask_fields(v) or found
+  return found
+
+
+def redact_body(body):
+  """Return a JSON request body (bytes or str) with passwords masked.
+  Bodies that aren't JSON, or have nothing to mask, are returned as is."""
+  try:
+    payload = json.loads(body)
+  except (TypeError, ValueError):
+    return body
+  if not _mask_fields(payload):
+    return body
+  return json.dumps(payload).encode('utf-8')
+
+
+class RequestInfo:
+  """What a request hook sees. Pre-request hooks receive it with the request
+  fields filled in; post-request hooks also get status, latency and
+  bytes_received (or error, if the request raised)."""
+
+  __slots__ = ('endpoint', 'method', 'url', 'page', 'retries', 'bytes_sent',
+               'status', 'latency', 'bytes_received', 'error', 'started')
+
+  def __init__(self, method, url, bytes_sent=0, page=None):
+    self.endpoint = endpoint_name(method, url)
+    self.method = method
+    self.url = url
+    self.page = page
+    self.retries = 0
+    self.bytes_sent = bytes_sent
+    self.status = None
+    self.latency = None
+    self.bytes_received = 0
+    self.error = None
+    self.started = time.time()
+
+  def as_dict(self):
+    return dict((k, getattr(self, k)) for k in self.__slots__)
+
+  def __repr__(self):
+    return '<RequestInfo {} status={} latency={}>'.format(self.endpoint,
+                                                          self.status,
+                                                          self.latency)
+
+
+class _EndpointStats:
+
+  __slots__ = ('count', 'errors', 'total_latency', 'max_latency',
+               'bytes_sent', 'bytes_received', 'buckets')
+
+  def __init__(self):
+    self.count = 0
+    self.errors = 0
+    self.total_latency = 0.0
+    self.max_latency = 0.0
+    self.bytes_sent = 0
+    self.bytes_received = 0
+    self.buckets = [0] * len(LATENCY_BUCKETS_MS)
+
+
+class Metrics:
+  """Thread-safe per-endpoint counters and latency histograms."""
+
+  def __init__(self):
+    self._lock = threading.Lock()
+    self.reset()
+
+  def reset(self):
+    with self._lock:
+      self._stats = {}
+      self.started = time.time()
+
+  def record(self, info):
+    latency = info.latency or 0.0
+    idx = bisect.bisect_left(LATENCY_BUCKETS_MS, latency * 1000.0)
+    with self._lock:
+      st = self._stats.get(info.endpoint)
+      if st is None:
+        st = self._stats[info.endpoint] = _EndpointStats()
+      st.count += 1
+      if info.error is not None or info.status is None or info.status >= 400:
+        st.errors += 1
+      st.total_latency += latency
+      st.max_latency = max(st.max_latency, latency)
+      st.bytes_sent += info.bytes_sent
+      st.bytes_received += info.bytes_received
+      st.buckets[idx] += 1
+
+  @staticmethod
+  def _percentile(st, q):
+    target = q * st.count
+    seen = 0
+    for bound, n in zip(LATENCY_BUCKETS_MS, st.buckets):
+      seen += n
+      if seen >= target and n:
+        return bound / 1000.0 if bound != float('inf') else st.max_latency
+    return st.max_latency
+
+  def snapshot(self):
+    """Return a dict of endpoint -> stats (latencies in seconds, p50/p95/p99
+    are histogram bucket upper bounds)."""
+    elapsed = max(time.time() - self.started, 1e-9)
+    retval = {}
+    with self._lock:
+      for endpoint, st in self._stats.items():
+        retval[endpoint] = {
+          'count': st.count,
+          'errors': st.errors,
+          'requests_per_sec': st.count / elapsed,
+          'mean_latency': st.total_latency / st.count if st.count else 0.0,
+          'max_latency': st.max_latency,
+          'p50_latency': self._percentile(st, 0.50),
+          'p95_latency': self._percentile(st, 0.95),
+          'p99_latency': self._percentile(st, 0.99),
+          'bytes_sent': st.bytes_sent,
+          'bytes_received': st.bytes_received,
+          'histogram': dict(zip(LATENCY_BUCKETS_MS, st.buckets))}
+    return(retval)
+
+  def summary(self):
+    """Return snapshot rows sorted by total time spent, slowest first."""
+    rows = []
+    for endpoint, st in self.snapshot().items():
+      row = {'endpoint': endpoint}
+      row.update(dict((k, v) for k, v in st.items() if k != 'histogram'))
+      row['total_latency'] = st['mean_latency'] * st['count']
+      rows.append(row)
+    rows.sort(key=lambda r: r['total_latency'], reverse=True)
+    return(rows)
@@ -0,0 +1,75 @@
+#! /usr/local/bin python3
+"""Append-only progress log that lets long bulk jobs resume after a crash."""
+import json
+import os
+import threading
+
+
+class Journal:
+  """Durable record of completed units of work, kept as a JSON lines file.
+
+  Each line holds a unit's key and its result. Opening an existing file
+  loads what was already done, so a rerun can skip those units; a truncated
+  last line (from a crash mid-write) is ignored. Only completed units
+  should be recorded, so failed ones are retried next time::
+
+      with Journal('cleanup.jsonl') as journal:
+          if key not in journal:
+              journal.record(key, do_work())
+  """
+
+  def __init__(self, path, sync=False):
+    self.path = path
+    self.sync = sync
+    self._lock = threading.Lock()
+    self._done = {}
+    complete = True
+    if os.path.exists(path):
+      with open(path, encoding='utf-8') as f:
+        for line in f:
+          complete = line.endswith('\n')
+          try:
+            rec = json.loads(line)
+          except ValueError:
+            continue
+          self._done[rec['key']] = rec.get('result')
+    self._file = open(path, 'a', encoding='utf-8')
+    if not complete:
+      self._file.write('\n')
+
+  def __contains__(self, key):
+    return key in self._done
+
+  def __len__(self):
+    return len(self._done)
+
+  def get(self, key, default=None):
+    """Return the result recorded for key."""
+    return self._done.get(key, default)
+
+  def record(self, key, result=None):
+    """Mark key as completed with a JSON-serializable result."""
+    line = json.dumps({'key': key, 'result': result}) + '\n'
+    with self._lock:
+      self._file.write(line)
+      self._file.flush()
+      if self.sync:
+        os.fsync(self._file.fileno())
+      self._done[key] = result
+
+  def close(self):
+    self._file.close()
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *exc):
+    self.close()
+
+
+def open_journal(checkpoint):
+  """Return (journal, owned) for a checkpoint argument: None, a path or an
+  open Journal. owned is True when the caller should close the journal."""
+  if checkpoint is None or isinstance(checkpoint, Journal):
+    return checkpoint, False
+  return Journal(checkpoint), True
@@ -0,0 +1,220 @@
+#! /usr/local/bin python3
+import sqlite3
+import json
+import threading
+from datetime import datetime
+
+
+def _xref(rec):
+  if rec.get('externalDataReference') is not None:
+    return rec['externalDataReference']
+  return rec.get('externalReference')
+
+
+def _email_key(email):
+  if email is None:
+    return None
+  return str(email).strip().lower()
+
+
+class _ListIndex:
+
+  def __init__(self, last_modified=None, refreshed_at=None):
+    self.last_modified = last_modified
+    self.refreshed_at = refreshed_at
+    self.by_id = {}
+    self.by_email = {}
+    self.by_xref = {}
+
+  def add(self, rec):
+    cid = rec['id']
+    self.by_id[cid] = rec
+    email = _email_key(rec.get('email'))
+    if email:
+      self.by_email.setdefault(email, set()).add(cid)
+    xref = _xref(rec)
+    if xref:
+      self.by_xref.setdefault(xref, set()).add(cid)
+
+  def remove(self, cid):
+    rec = self.by_id.pop(cid, None)
+    if rec is None:
+      return
+    for index, key in [[self.by_email, _email_key(rec.get('email'))],
+                       [self.by_xref, _xref(rec)]]:
+      if key in index:
+        index[key].discard(cid)
+        if not index[key]:
+          del index[key]
+
+
+class ContactMirror:
+  """Persistent local copy of mailing list contacts, indexed in memory by
+  contact id, email (case-insensitive) and externalReference so lookups
+  need no network calls. Attach it to a QualtricsAPI instance with
+  attach_contact_mirror to have successful create/update/delete calls
+  applied in place, and call QualtricsAPI.refresh_contact_mirror to bring a
+  list up to date."""
+
+  def __init__(self, path=':memory:'):
+    self.path = path
+    self._lock = threading.RLock()
+    self._lists = {}
+    self.conn = sqlite3.connect(path, check_same_thread=False)
+    with self.conn:
+      self.conn.execute(
+        'CREATE TABLE IF NOT EXISTS mailing_lists ('
+        'list_id TEXT PRIMARY KEY, last_modified TEXT, refreshed_at TEXT)')
+      self.conn.execute(
+        'CREATE TABLE IF NOT EXISTS contacts ('
+        'list_id TEXT NOT NULL, id TEXT NOT NULL, data TEXT NOT NULL, '
+        'PRIMARY KEY (list_id, id))')
+    for list_id, last_modified, refreshed_at in self.conn.execute(
+        'SELECT list_id, last_modified, refreshed_at FROM mailing_lists'):
+      self._lists[list_id] = _ListIndex(last_modified, refreshed_at)
+    for list_id, data in self.conn.execute('SELECT list_id, data FROM contacts'):
+      if list_id in self._lists:
+        self._lists[list_id].add(json.loads(data))
+
+  def close(self):
+    self.conn.close()
+
+  def lists(self):
+    """Return the ids of the mailing lists held in the mirror."""
+    return(list(self._lists))
+
+  def __contains__(self, list_id):
+    return list_id in self._lists
+
+  def last_modified(self, list_id):
+    idx = self._lists.get(list_id)
+    return None if idx is None else idx.last_modified
+
+  def contacts(self, list_id):
+    """Return a list of the mirrored contact records for list_id."""
+    return(list(self._index(list_id).by_id.values()))
+
+  def get(self, list_id, contact_id):
+    return(self._index(list_id).by_id.get(contact_id))
+
+  def find(self, list_id, email=None, external_reference=None):
+    """Return the contacts in list_id matching the given email and/or
+    externalReference."""
+    idx = self._index(list_id)
+    ids = None
+    if email is not None:
+      ids = set(idx.by_email.get(_email_key(email), ()))
+    if external_reference is not None:
+      xids = idx.by_xref.get(external_reference, set())
+      ids = set(xids) if ids is None else ids & xids
+    if ids is None:
+      raise ValueError('Supply email and/or external_reference.')
+    return([idx.by_id[i] for i in ids])
+
+  def find_contact_id(self, list_id, email=None, external_reference=None):
+    """Return the id of the single contact matching email and/or
+    externalReference."""
+    found = self.find(list_id, email, external_reference)
+    if len(found) == 1:
+      return(found[0]['id'])
+    elif len(found) > 1:
+      raise ValueError('Your search returned multiple contacts:\n {}'
+                       .format([c['id'] for c in found]))
+    else:
+      raise ValueError('No contacts matched your search.')
+
+  def _index(self, list_id):
+    try:
+      return self._lists[list_id]
+    except KeyError:
+      raise ValueError('Mailing list {} is not mirrored.'.format(list_id))
+
+  def replace_list(self, list_id, contacts, last_modified=None):
+    """Bring list_id in line with a full contact listing. Only contacts that
+    were added, changed or removed are written to disk. Returns a dict with
+    'added', 'updated' and 'removed' counts. last_modified is stored as a
+    string."""
+    if last_modified is not None:
+      last_modified = str(last_modified)
+    counts = {'added': 0, 'updated': 0, 'removed': 0}
+    refreshed_at = datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")
+    with self._lock, self.conn:
+      idx = self._lists.get(list_id)
+      if idx is None:
+        idx = self._lists[list_id] = _ListIndex()
+      incoming = dict((rec['id'], rec) for rec in contacts)
+      for cid in [c for c in idx.by_id if c not in incoming]:
+        idx.remove(cid)
+        self.conn.execute('DELETE FROM contacts WHERE list_id = ? AND id = ?',
+                          (list_id, cid))
+        counts['removed'] += 1
+      writes = []
+      for cid, rec in incoming.items():
+        old = idx.by_id.get(cid)
+        if old == rec:
+          continue
+        counts['updated' if old is not None else 'added'] += 1
+        idx.remove(cid)
+        idx.add(rec)
+        writes.append((list_id, cid, json.dumps(rec)))
+      self.conn.executemany('INSERT OR REPLACE INTO contacts (list_id, id, data) '
+                            'VALUES (?, ?, ?)', writes)
+      idx.last_modified = last_modified
+      idx.refreshed_at = refreshed_at
+      self.conn.execute('INSERT OR REPLACE INTO mailing_lists '
+                        '(list_id, last_modified, refreshed_at) VALUES (?, ?, ?)',
+                        (list_id, last_modified, refreshed_at))
+    return(counts)
+
+  def invalidate(self, list_id):
+    """Force the next refresh of list_id to re-read its contacts, e.g. after
+    an asynchronous contact import."""
+    with self._lock, self.conn:
+      idx = self._lists.get(list_id)
+      if idx is not None:
+        idx.last_modified = None
+        self.conn.execute('UPDATE mailing_lists SET last_modified = NULL '
+                          'WHERE list_id = ?', (list_id,))
+
+  def drop_list(self, list_id):
+    with self._lock, self.conn:
+      self._lists.pop(list_id, None)
+      self.conn.execute('DELETE FROM contacts WHERE list_id = ?', (list_id,))
+      self.conn.execute('DELETE FROM mailing_lists WHERE list_id = ?', (list_id,))
+
+  def apply_create(self, list_id, contact_id, json_rec):
+    """Record a contact created through the API. Lists that aren't mirrored
+    are left alone so a partial list is never mistaken for a complete one."""
+    if list_id not in self._lists:
+      return
+    rec = dict(json_rec)
+    if 'externalReference' in rec:
+      rec['externalDataReference'] = rec.pop('externalReference')
+    rec['id'] = contact_id
+    self._write(list_id, rec)
+
+  def apply_update(self, list_id, contact_id, json_rec):
+    idx = self._lists.get(list_id)
+    if idx is None or contact_id not in idx.by_id:
+      return
+    rec = dict(idx.by_id[contact_id])
+    for k, v in json_rec.items():
+      rec['externalDataReference' if k == 'externalReference' else k] = v
+    self._write(list_id, rec)
+
+  def apply_delete(self, list_id, contact_id):
+    with self._lock, self.conn:
+      idx = self._lists.get(list_id)
+      if idx is None:
+        return
+      idx.remove(contact_id)
+      self.conn.execute('DELETE FROM contacts WHERE list_id = ? AND id = ?',
+                        (list_id, contact_id))
+
+  def _write(self, list_id, rec):
+    with self._lock, self.conn:
+      idx = self._lists[list_id]
+      idx.remove(rec['id'])
+      idx.add(rec)
+      self.conn.execute('INSERT OR REPLACE INTO contacts (list_id, id, data) '
+                        'VALUES (?, ?, ?)', (list_id, rec['id'], json.dumps(rec)))
@@ -0,0 +1,257 @@
+#! /usr/local/bin python3
+"""Run multi-step jobs, such as launching a survey campaign, as a graph of
+dependent steps executed concurrently."""
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from py_qualtrics_api.instrument import logger
+
+
+class StepFailed(Exception):
+  """A step raised, or returned a value its check rejected."""
+
+  def __init__(self, step, message):
+    super().__init__('{}: {}'.format(step, message))
+    self.step = step
+
+
+class PipelineError(Exception):
+  """Raised by Pipeline.run when any step failed. results maps every step
+  name to its StepResult; the first failure is chained as __cause__."""
+
+  def __init__(self, results):
+    failed = [r for r in results.values() if r.status == 'failed']
+    skipped = sum(1 for r in results.values() if r.status == 'skipped')
+    super().__init__('{} step(s) failed ({}); {} skipped'.format(
+      len(failed), ', '.join(r.name for r in failed), skipped))
+    self.results = results
+
+
+def returned_failure(value):
+  """Default step check: the () or False that QualtricsAPI methods return
+  when a request fails."""
+  return value is False or (isinstance(value, tuple) and value == ())
+
+
+class StepResult:
+
+  __slots__ = ('name', 'status', 'value', 'error', 'started', 'finished')
+
+  def __init__(self, name):
+    self.name = name
+    self.status = 'pending'
+    self.value = None
+    self.error = None
+    self.started = None
+    self.finished = None
+
+  @property
+  def duration(self):
+    if self.started is None or self.finished is None:
+      return None
+    return self.finished - self.started
+
+  def as_dict(self):
+    retval = dict((k, getattr(self, k)) for k in self.__slots__)
+    retval['duration'] = self.duration
+    return retval
+
+  def __repr__(self):
+    return '<StepResult {} {}>'.format(self.name, self.status)
+
+
+class _Step:
+
+  __slots__ = ('name', 'fn', 'requires', 'after', 'check')
+
+  def __init__(self, name, fn, requires, after, check):
+    self.name = name
+    self.fn = fn
+    self.requires = list(requires)
+    self.after = list(after)
+    self.check = check
+
+
+class Pipeline:
+  """A set of named steps with dependencies, run on a thread pool.
+
+  Each step is fn(*values), called with the values returned by the steps
+  named in requires, in order; steps named in after must also finish first
+  but their values aren't passed. A step fails if it raises or its value
+  fails check (by default, () or False), and every step that depends on it,
+  directly or not, is skipped. Independent steps keep running::
+
+      p = Pipeline()
+      p.add('survey', lambda: q.copy_survey(template_id, 'Site A'))
+      p.add('active', q.activate_survey, requires=['survey'])
+      p.add('list', lambda: q.create_mailing_list('Site A', df))
+      p.add('send', lambda s, ml: q.send_survey(s, msg_id, ml, ...),
+            requires=['survey', 'list'], after=['active'])
+      results = p.run()
+      results['send'].value, results['survey'].duration
+  """
+
+  def __init__(self, max_workers=8):
+    self.max_workers = max_workers
+    self._steps = OrderedDict()
+
+  def add(self, name, fn, requires=(), after=(), check=returned_failure):
+    """Add a step and return its name. Pass check=None to accept any value."""
+    if name in self._steps:
+      raise ValueError('Duplicate step name {!r}'.format(name))
+    self._steps[name] = _Step(name, fn, requires, after, check)
+    return name
+
+  @property
+  def steps(self):
+    return list(self._steps)
+
+  def _dependencies(self, step):
+    return step.requires + [a for a in step.after if a not in step.requires]
+
+  def _validate(self):
+    for step in self._steps.values():
+      for dep in self._dependencies(step):
+        if dep not in self._steps:
+          raise ValueError('Step {!r} depends on unknown step {!r}'.format(step.name, dep))
+    state = {}
+
+    def visit(name, path):
+      if state.get(name) == 'done':
+        return
+      if state.get(name) == 'active':
+        raise ValueError('Dependency cycle: {}'.format(' -> '.join(path + [name])))
+      state[name] = 'active'
+      for dep in self._dependencies(self._steps[name]):
+        visit(dep, path + [name])
+      state[name] = 'done'
+
+    for name in self._steps:
+      visit(name, [])
+
+  def _call(self, step, result, args):
+    result.started = time.time()
+    try:
+      value = step.fn(*args)
+      if step.check is not None and step.check(value):
+        raise StepFailed(step.name, 'returned {!r}'.format(value))
+      return value
+    finally:
+      result.finished = time.time()
+
+  def run(self, raise_on_error=True, fail_fast=False):
+    """Run every step, each as soon as its dependencies have succeeded.
+    Returns an ordered dict of step name -> StepResult (status 'ok',
+    'failed' or 'skipped'). If a step failed, PipelineError is raised
+    instead unless raise_on_error is False. With fail_fast, no new steps
+    are started after the first failure."""
+    self._validate()
+    results = OrderedDict((name, StepResult(name)) for name in self._steps)
+    waiting = dict((name, set(self._dependencies(step)))
+                   for name, step in self._steps.items())
+    dependents = dict((name, []) for name in self._steps)
+    for name, deps in waiting.items():
+      for dep in deps:
+        dependents[dep].append(name)
+    first_error = None
+    stop = False
+
+    def skip(name, reason):
+      for child in dependents[name]:
+        if results[child].status == 'pending':
+          results[child].status = 'skipped'
+          results[child].error = reason
+          waiting.pop(child, None)
+          skip(child, reason)
+
+    with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+      running = {}
+
+      def submit_ready():
+        for name in [n for n, deps in waiting.items() if not deps]:
+          del waiting[name]
+          step = self._steps[name]
+          args = [results[r].value for r in step.requires]
+          results[name].status = 'running'
+          running[executor.submit(self._call, step, results[name], args)] = name
+
+      submit_ready()
+      while running:
+        done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+        for future in done:
+          name = running.pop(future)
+          result = results[name]
+          try:
+            result.value = future.result()
+          except Exception as e:
+            result.status = 'failed'
+            result.error = e if isinstance(e, StepFailed) else StepFailed(
+              name, '{}: {}'.format(type(e).__name__, e))
+            if result.error is not e:
+              result.error.__cause__ = e
+            first_error = first_error or result.error
+            stop = stop or fail_fast
+            skip(name, 'depends on failed step {!r}'.format(name))
+            logger.debug('pipeline step %s failed: %s', name, result.error)
+          else:
+            result.status = 'ok'
+            for child in dependents[name]:
+              if child in waiting:
+                waiting[child].discard(name)
+            logger.debug('pipeline step %s finished in %.3f s', name, result.duration)
+        if stop:
+          for name in list(waiting):
+            results[name].status = 'skipped'
+            results[name].error = 'not started after an earlier failure'
+            del waiting[name]
+        else:
+          submit_ready()
+    if first_error is not None and raise_on_error:
+      raise PipelineError(results) from first_error
+    return results
+
+
+def campaign_pipeline(api, sites, template_survey_id, messages, from_email,
+                      from_name, subject, survey_name='{site} survey',
+                      list_name='{site} contacts', list_category=None,
+                      message_description='Campaign invitation',
+                      send_time=None, expiration_time=None,
+                      import_poll_interval=1.0, import_timeout=600,
+                      max_workers=8):
+  """Build a Pipeline that launches template_survey_id at every site.
+  sites maps a site name to a DataFrame of its contacts. For each site the
+  template is copied and activated while a mailing list is created and
+  its contacts imported; one library message (messages as for
+  create_library_message) is shared by all sites; then the survey is sent
+  to the site's list once the contact import has completed (polled every
+  import_poll_interval seconds for up to import_timeout). Step names are
+  '<site>/survey', '<site>/activate', '<site>/list', '<site>/contacts',
+  '<site>/imported', '<site>/send' and 'message'. Call run() on the
+  result."""
+  p = Pipeline(max_workers)
+  message = p.add('message', lambda: api.create_library_message(message_description,
+                                                                 messages))
+  for site, contacts in sites.items():
+    survey = p.add('{}/survey'.format(site),
+                   lambda site=site: api.copy_survey(template_survey_id,
+                                                     survey_name.format(site=site)))
+    active = p.add('{}/activate'.format(site), api.activate_survey,
+                   requires=[survey])
+    mlist = p.add('{}/list'.format(site),
+                  lambda site=site: api.create_mailing_list(
+                    list_name.format(site=site), list_category=list_category))
+    started = p.add('{}/contacts'.format(site),
+                    lambda list_id, contacts=contacts: api.create_contacts_bulk(
+                      list_id, contacts),
+                    requires=[mlist])
+    imported = p.add('{}/imported'.format(site),
+                     lambda list_id, import_id: api.wait_for_contact_import(
+                       list_id, import_id, import_poll_interval, import_timeout),
+                     requires=[mlist, started])
+    p.add('{}/send'.format(site),
+          lambda survey_id, message_id, list_id: api.send_survey(
+            survey_id, message_id, list_id, from_email, from_name, subject,
+            send_time=send_time, expiration_time=expiration_time),
+          requires=[survey, message, mlist], after=[active, imported])
+  return p
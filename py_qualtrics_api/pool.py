@@ -0,0 +1,156 @@
+#! /usr/local/bin python3
+"""Spread API traffic across several tokens or data centers."""
+import threading
+import time
+
+from py_qualtrics_api.tools import QualtricsAPI
+from py_qualtrics_api.concurrency import run_concurrently
+
+# Methods that only read, or that create nothing another token would need to
+# own, so any client in the pool may serve them. Multi-step exports are
+# included only as the self-contained calls, because an export's progress
+# and file must be fetched with the token that created it.
+READ_ONLY_METHODS = frozenset([
+  'list_surveys', 'find_survey_id', 'get_survey', 'list_questions',
+  'list_mailing_lists', 'find_mailing_list_id', 'get_mailing_list',
+  'get_contacts', 'list_users', 'get_user', 'get_distribution',
+  'list_links_for_distribution', 'get_response_as_dataframe',
+  'get_response_as_string', 'export_responses_bulk'])
+
+
+class _ClientState:
+
+  def __init__(self, name, client):
+    self.name = name
+    self.client = client
+    self.active = 0
+    self.calls = 0
+    self.requests = 0
+    self.throttled = 0
+    self.errors = 0
+    self.consecutive_failures = 0
+    self.available_at = 0.0
+
+
+class ClientPool:
+  """A set of QualtricsAPI clients, one per token (or data center), used as
+  a single client.
+
+  configs is a list of configs (dicts or YAML paths, as for QualtricsAPI)
+  or QualtricsAPI instances, or a dict mapping names to them. Methods in
+  READ_ONLY_METHODS are sent to the least-loaded available client: the one
+  with the fewest calls in progress among those that are neither cooling
+  down after being throttled (a 429, even one retried successfully) nor
+  after max_failures consecutive failed requests.
+  Every other method is pinned to one client, the first unless pin names
+  another, so objects are always created by the same owner::
+
+      pool = ClientPool({'main': 'main.yml', 'brand_b': 'brand_b.yml'})
+      surveys = pool.list_surveys()            # any token
+      pool.create_mailing_list('New', df)      # always 'main'
+      pool.client('brand_b').create_user(...)  # explicitly pinned
+  """
+
+  def __init__(self, configs, transport=None, pin=None,
+               throttle_cooldown=5.0, max_failures=3, failure_cooldown=30.0):
+    if not isinstance(configs, dict):
+      configs = dict((str(i), c) for i, c in enumerate(configs))
+    if not configs:
+      raise ValueError('ClientPool needs at least one config')
+    self.throttle_cooldown = throttle_cooldown
+    self.max_failures = max_failures
+    self.failure_cooldown = failure_cooldown
+    self._lock = threading.Lock()
+    self._states = []
+    for name, config in configs.items():
+      client = config if isinstance(config, QualtricsAPI) else QualtricsAPI(config, transport)
+      state = _ClientState(name, client)
+      client.add_request_hook(post=lambda info, state=state: self._observe(state, info))
+      self._states.append(state)
+    self._pinned = self._state(pin) if pin is not None else self._states[0]
+
+  @property
+  def clients(self):
+    return [s.client for s in self._states]
+
+  def _state(self, pin):
+    for i, state in enumerate(self._states):
+      if pin == state.name or pin == i or pin is state.client:
+        return state
+    raise KeyError('No client {!r} in the pool'.format(pin))
+
+  def client(self, pin=None):
+    """Return the named (or indexed) client, or the pinned client."""
+    return self._pinned.client if pin is None else self._state(pin).client
+
+  def _observe(self, state, info):
+    now = time.monotonic()
+    with self._lock:
+      state.requests += 1
+      if info.status == 429 or info.retries:
+        state.throttled += 1
+        state.available_at = max(state.available_at, now + self.throttle_cooldown)
+      elif info.error is not None or (info.status is not None and info.status >= 500):
+        state.errors += 1
+        state.consecutive_failures += 1
+        if state.consecutive_failures >= self.max_failures:
+          state.available_at = max(state.available_at, now + self.failure_cooldown)
+      else:
+        state.consecutive_failures = 0
+
+  def _acquire(self):
+    now = time.monotonic()
+    with self._lock:
+      ready = [s for s in self._states if s.available_at <= now]
+      if ready:
+        state = min(ready, key=lambda s: (s.active, s.calls))
+      else:
+        state = min(self._states, key=lambda s: s.available_at)
+      state.active += 1
+      state.calls += 1
+      return state
+
+  def _release(self, state):
+    with self._lock:
+      state.active -= 1
+
+  def call(self, method, *args, **kwargs):
+    """Call a QualtricsAPI method on the least-loaded available client."""
+    state = self._acquire()
+    try:
+      return getattr(state.client, method)(*args, **kwargs)
+    finally:
+      self._release(state)
+
+  def map(self, fn, items, max_workers=None, rate_limiter=None):
+    """Call fn(client, item) for every item concurrently, each on the
+    least-loaded client at the time. max_workers defaults to four per
+    client. Returns (item, result, exception) tuples in input order."""
+    def call(item):
+      state = self._acquire()
+      try:
+        return fn(state.client, item)
+      finally:
+        self._release(state)
+    if max_workers is None:
+      max_workers = 4 * len(self._states)
+    return run_concurrently(call, items, max_workers, rate_limiter)
+
+  def __getattr__(self, attr):
+    if attr.startswith('_') or not hasattr(QualtricsAPI, attr):
+      raise AttributeError(attr)
+    if attr in READ_ONLY_METHODS:
+      return lambda *args, **kwargs: self.call(attr, *args, **kwargs)
+    return getattr(self._pinned.client, attr)
+
+  def health(self):
+    """Return one dict per client with its load, request, throttling and
+    failure counts and whether it is currently taking traffic."""
+    now = time.monotonic()
+    with self._lock:
+      return [{'name': s.name, 'data_center': s.client.config.data_center,
+               'active': s.active, 'calls': s.calls, 'requests': s.requests,
+               'throttled': s.throttled, 'errors': s.errors,
+               'available': s.available_at <= now,
+               'available_in': max(0.0, s.available_at - now)}
+              for s in self._states]
@@ -0,0 +1,217 @@
+#! /usr/local/bin python3
+"""Opt-in profiling of QualtricsAPI calls: where each call's time went, by
+phase, and how much memory it needed. See QualtricsAPI.enable_profiling."""
+import contextvars
+import json
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+# Phases marked inside QualtricsAPI. Time in a call that falls in none of
+# them (and in no nested call) is reported as 'other'.
+PHASES = ('build', 'serialize', 'network', 'wait', 'download', 'decompress',
+          'parse')
+
+
+class _Frame:
+
+  __slots__ = ('name', 'path', 'target', 'thread', 'started', 'duration',
+               'phases', 'child_time', 'requests', 'bytes_sent',
+               'bytes_received', 'mem_start', 'peak', 'error')
+
+  def __init__(self, name, parent, target):
+    self.name = name
+    self.path = (parent.path if parent is not None else ()) + (name,)
+    self.target = target
+    self.thread = threading.current_thread().name
+    self.started = time.time()
+    self.duration = None
+    self.phases = {}
+    self.child_time = 0.0
+    self.requests = 0
+    self.bytes_sent = 0
+    self.bytes_received = 0
+    self.mem_start = 0
+    self.peak = 0
+    self.error = None
+
+  def as_dict(self, trace_memory):
+    phases = dict(self.phases)
+    phases['other'] = max(0.0, self.duration - sum(phases.values()) - self.child_time)
+    return {'operation': self.name, 'path': ';'.join(self.path),
+            'target': self.target, 'thread': self.thread,
+            'started': self.started, 'duration': self.duration,
+            'phases': phases, 'requests': self.requests,
+            'bytes_sent': self.bytes_sent, 'bytes_received': self.bytes_received,
+            'peak_memory': self.peak if trace_memory else None,
+            'error': self.error}
+
+
+class Profiler:
+  """Per-call phase timings and peak memory for one QualtricsAPI client.
+
+  Every public method call is recorded as an operation, nested under the
+  call that made it (also across the worker threads of bulk methods), with
+  its duration split into PHASES: building payloads, serializing them,
+  network round trips, waiting (export and link polling, retry backoff),
+  downloading files, decompressing them and parsing JSON or CSV. Time in
+  nested calls is reported under them; concurrent work is summed, so phase
+  totals of a bulk call can exceed its wall-clock duration.
+
+  With trace_memory, allocations are traced with tracemalloc and each
+  operation reports the peak traced memory above its starting point. The
+  peak is process-wide, so it includes whatever ran concurrently.
+  Tracing slows Python code down noticeably; timings of CPU-bound phases
+  are inflated accordingly::
+
+      prof = q.enable_profiling()
+      q.export_responses_bulk(survey_ids, 'out')
+      prof.summary()                     # per method, slowest first
+      prof.write_json('profile.json')
+      prof.write_folded('profile.folded')  # for flamegraph.pl / speedscope
+  """
+
+  def __init__(self, trace_memory=True):
+    self.trace_memory = trace_memory
+    self._lock = threading.Lock()
+    self._current = contextvars.ContextVar('profiler_operation_{}'.format(id(self)),
+                                           default=None)
+    self._phase = contextvars.ContextVar('profiler_phase_{}'.format(id(self)),
+                                         default=None)
+    self._active = set()
+    self._started_tracing = False
+    if trace_memory and not tracemalloc.is_tracing():
+      tracemalloc.start()
+      self._started_tracing = True
+    self.reset()
+
+  def reset(self):
+    """Forget all recorded operations."""
+    with self._lock:
+      self._records = []
+
+  def close(self):
+    """Stop tracing allocations if this profiler started it."""
+    if self._started_tracing:
+      tracemalloc.stop()
+      self._started_tracing = False
+
+  def _sample_memory(self):
+    """Credit the peak since the last sample to every running operation and
+    return the current traced size. Call with the lock held."""
+    if not self.trace_memory or not tracemalloc.is_tracing():
+      return 0
+    current, peak = tracemalloc.get_traced_memory()
+    for frame in self._active:
+      frame.peak = max(frame.peak, peak - frame.mem_start)
+    if hasattr(tracemalloc, 'reset_peak'):
+      tracemalloc.reset_peak()
+    return current
+
+  @contextmanager
+  def operation(self, name, target=None):
+    """Record the enclosed code as an operation called name."""
+    parent = self._current.get()
+    frame = _Frame(name, parent, target)
+    token = self._current.set(frame)
+    with self._lock:
+      frame.mem_start = self._sample_memory()
+      self._active.add(frame)
+    t0 = time.perf_counter()
+    try:
+      yield frame
+    except BaseException as e:
+      frame.error = '{}: {}'.format(type(e).__name__, e)
+      raise
+    finally:
+      frame.duration = time.perf_counter() - t0
+      self._current.reset(token)
+      with self._lock:
+        self._sample_memory()
+        self._active.discard(frame)
+        if parent is not None:
+          parent.child_time += frame.duration
+        self._records.append(frame)
+
+  @contextmanager
+  def phase(self, name):
+    """Add the enclosed code's duration to the current operation's phase.
+    A phase entered inside another counts as part of the outer one."""
+    frame = self._current.get()
+    if frame is None or self._phase.get() is not None:
+      yield
+      return
+    token = self._phase.set(name)
+    t0 = time.perf_counter()
+    try:
+      yield
+    finally:
+      elapsed = time.perf_counter() - t0
+      self._phase.reset(token)
+      with self._lock:
+        frame.phases[name] = frame.phases.get(name, 0.0) + elapsed
+
+  def on_request(self, info):
+    """Post-request hook counting requests and bytes per operation."""
+    frame = self._current.get()
+    if frame is not None:
+      with self._lock:
+        frame.requests += 1
+        frame.bytes_sent += info.bytes_sent
+        frame.bytes_received += info.bytes_received
+
+  def operations(self):
+    """Return one dict per finished operation, in order of completion."""
+    with self._lock:
+      frames = list(self._records)
+    return [f.as_dict(self.trace_memory) for f in frames]
+
+  def summary(self):
+    """Return one row per method: call and error counts, total and mean
+    duration, summed phases, requests, bytes and the largest peak memory,
+    sorted by total duration, slowest first."""
+    rows = {}
+    for op in self.operations():
+      row = rows.get(op['operation'])
+      if row is None:
+        row = rows[op['operation']] = {
+          'operation': op['operation'], 'count': 0, 'errors': 0,
+          'total_duration': 0.0, 'phases': dict.fromkeys(PHASES + ('other',), 0.0),
+          'requests': 0, 'bytes_received': 0, 'peak_memory': None}
+      row['count'] += 1
+      row['errors'] += op['error'] is not None
+      row['total_duration'] += op['duration']
+      for phase, seconds in op['phases'].items():
+        row['phases'][phase] = row['phases'].get(phase, 0.0) + seconds
+      row['requests'] += op['requests']
+      row['bytes_received'] += op['bytes_received']
+      if op['peak_memory'] is not None:
+        row['peak_memory'] = max(row['peak_memory'] or 0, op['peak_memory'])
+    for row in rows.values():
+      row['mean_duration'] = row['total_duration'] / row['count']
+    return sorted(rows.values(), key=lambda r: r['total_duration'], reverse=True)
+
+  def report(self):
+    return {'trace_memory': self.trace_memory, 'summary': self.summary(),
+            'operations': self.operations()}
+
+  def write_json(self, path):
+    with open(path, 'w', encoding='utf-8') as f:
+      json.dump(self.report(), f, indent=2, default=str)
+
+  def folded(self):
+    """Return the profile in the folded-stack format read by flamegraph.pl,
+    speedscope and similar tools: one 'call;nested call;phase microseconds'
+    line per stack."""
+    totals = {}
+    for op in self.operations():
+      for phase, seconds in op['phases'].items():
+        key = '{};{}'.format(op['path'], phase)
+        totals[key] = totals.get(key, 0.0) + seconds
+    return ''.join('{} {}\n'.format(k, int(round(v * 1e6)))
+                   for k, v in sorted(totals.items()) if v >= 5e-7)
+
+  def write_folded(self, path):
+    with open(path, 'w', encoding='utf-8') as f:
+      f.write(self.folded())
@@ -0,0 +1,93 @@
+#! /usr/local/bin python3
+from collections import namedtuple
+
+
+class Records:
+  """A lightweight, column-oriented table of API elements.
+
+  Values are held as one list per column, so no pandas import or DataFrame
+  construction is needed; call to_dataframe() when one is wanted. Iterating
+  yields namedtuple rows, and indexing by column name returns that column::
+
+      surveys = q.list_surveys(as_records=True)
+      ids = surveys['id']
+      for s in surveys:
+          print(s.id, s.name)
+  """
+
+  __slots__ = ('columns', '_data', '_row_type')
+
+  def __init__(self, elements=(), columns=None):
+    if columns is None:
+      columns = []
+      seen = set()
+      for el in elements:
+        for k in el:
+          if k not in seen:
+            seen.add(k)
+            columns.append(k)
+    self.columns = list(columns)
+    self._data = dict((c, []) for c in self.columns)
+    appenders = [(c, self._data[c].append) for c in self.columns]
+    for el in elements:
+      for c, append in appenders:
+        append(el.get(c))
+    self._row_type = None
+
+  @classmethod
+  def from_columns(cls, data, columns=None):
+    retval = cls(columns=list(columns if columns is not None else data))
+    retval._data = dict((c, list(data[c])) for c in retval.columns)
+    return retval
+
+  @property
+  def shape(self):
+    return (len(self), len(self.columns))
+
+  def __len__(self):
+    if not self.columns:
+      return 0
+    return len(self._data[self.columns[0]])
+
+  def _rows(self):
+    if self._row_type is None:
+      self._row_type = namedtuple('Record', self.columns, rename=True)
+    return self._row_type
+
+  def __iter__(self):
+    row = self._rows()
+    return (row._make(values) for values in zip(*[self._data[c] for c in self.columns]))
+
+  def __getitem__(self, key):
+    if isinstance(key, str):
+      return self._data[key]
+    return self._rows()._make(self._data[c][key] for c in self.columns)
+
+  def column(self, name):
+    return self._data[name]
+
+  def where(self, predicate=None, **equals):
+    """Return the rows for which predicate(row) is true and every keyword
+    column equals the given value, e.g. where(category='Test'). A column
+    no row has is treated as all None."""
+    n = len(self)
+    columns = dict((k, self._data.get(k, [None] * n)) for k in equals)
+    keep = []
+    for i in range(n):
+      if all(columns[k][i] == v for k, v in equals.items()) and (
+          predicate is None or predicate(self[i])):
+        keep.append(i)
+    return Records.from_columns(dict((c, [self._data[c][i] for i in keep])
+                                     for c in self.columns), self.columns)
+
+  def to_dicts(self):
+    return [dict(zip(self.columns, values))
+            for values in zip(*[self._data[c] for c in self.columns])]
+
+  def to_dataframe(self):
+    import pandas as pd
+    return pd.DataFrame(self._data, columns=self.columns)
+
+  def __repr__(self):
+    return '<Records {} rows x {} columns: {}>'.format(len(self), len(self.columns),
+                                                      ', '.join(self.columns))
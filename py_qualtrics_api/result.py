@@ -0,0 +1,73 @@
+#! /usr/local/bin python3
+
+
+class ApiResult:
+  """A Qualtrics API response whose JSON body is decoded at most once.
+
+  The envelope exposes the parts of the v3 response layout that callers
+  need (``meta``, ``result``, ``elements``, ``next_page``) and keeps a
+  ``json()`` method so code written against ``requests.Response`` still
+  works."""
+
+  __slots__ = ('status_code', 'content', 'headers', 'raw', '_codec', '_payload')
+
+  def __init__(self, status_code, content, headers=None, codec=None, raw=None):
+    self.status_code = status_code
+    self.content = content
+    self.headers = headers if headers is not None else {}
+    self.raw = raw
+    self._codec = codec
+    self._payload = None
+
+  def copy(self):
+    """Return a result sharing this one's raw response but decoding its own
+    payload, so callers can modify what they get without affecting others."""
+    return ApiResult(self.status_code, self.content, self.headers, self._codec,
+                     self.raw)
+
+  def json(self):
+    if self._payload is None:
+      if self._codec is None:
+        from py_qualtrics_api.codec import get_json_codec
+        self._codec = get_json_codec()
+      self._payload = self._codec.loads(self.content)
+    return self._payload
+
+  @property
+  def meta(self):
+    return self.json().get('meta', {})
+
+  @property
+  def http_status(self):
+    return self.meta.get('httpStatus')
+
+  @property
+  def success(self):
+    return self.http_status == '200 - OK'
+
+  @property
+  def result(self):
+    return self.json().get('result')
+
+  @property
+  def elements(self):
+    result = self.result
+    if isinstance(result, dict):
+      return result.get('elements', [])
+    return []
+
+  @property
+  def next_page(self):
+    result = self.result
+    if isinstance(result, dict):
+      return result.get('nextPage')
+    return None
+
+  @property
+  def text(self):
+    if isinstance(self.content, (bytes, bytearray)):
+      return self.content.decode('utf-8', 'replace')
+    return self.content
+
+  def __repr__(self):
+    return '<ApiResult [{}]>'.format(self.status_code)
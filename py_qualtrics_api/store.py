@@ -0,0 +1,261 @@
+#! /usr/local/bin python3
+import sqlite3
+import hashlib
+import json
+import re
+from datetime import datetime
+
+
+# Export columns whose SQLite type is known up front; everything else that
+# isn't a numeric question type is stored as TEXT.
+_METADATA_COLUMNS = [
+  ['ResponseId', 'TEXT'],
+  ['StartDate', 'TEXT'],
+  ['EndDate', 'TEXT'],
+  ['Status', 'TEXT'],
+  ['IPAddress', 'TEXT'],
+  ['Progress', 'INTEGER'],
+  ['Duration (in seconds)', 'INTEGER'],
+  ['Finished', 'INTEGER'],
+  ['RecordedDate', 'TEXT'],
+  ['RecipientLastName', 'TEXT'],
+  ['RecipientFirstName', 'TEXT'],
+  ['RecipientEmail', 'TEXT'],
+  ['ExternalReference', 'TEXT'],
+  ['LocationLatitude', 'REAL'],
+  ['LocationLongitude', 'REAL'],
+  ['DistributionChannel', 'TEXT'],
+  ['UserLanguage', 'TEXT'],
+]
+
+_NUMERIC_QUESTION_TYPES = {'Slider': 'REAL', 'CS': 'REAL'}
+
+_HASH_COLUMN = '_row_hash'
+_LOADED_COLUMN = '_loaded_at'
+
+
+def _quote(identifier):
+  return '"{}"'.format(str(identifier).replace('"', '""'))
+
+
+def _sql_value(value):
+  """Coerce pandas/numpy scalars into something sqlite3 can bind."""
+  if value is None:
+    return None
+  if isinstance(value, float) and value != value:
+    return None
+  if isinstance(value, (str, int, float, bytes)):
+    return value
+  if hasattr(value, 'item'):
+    try:
+      return _sql_value(value.item())
+    except (TypeError, ValueError):
+      pass
+  if hasattr(value, 'isoformat'):
+    try:
+      return value.isoformat()
+    except ValueError:
+      # NaT
+      return None
+  return str(value)
+
+
+def _iter_records(records):
+  """Yield (columns, row tuple) pairs from a DataFrame or iterable of dicts."""
+  if hasattr(records, 'itertuples') and hasattr(records, 'columns'):
+    columns = [str(c) for c in records.columns]
+    for row in records.itertuples(index=False, name=None):
+      yield columns, row
+  else:
+    for rec in records:
+      columns = list(rec.keys())
+      yield columns, tuple(rec[c] for c in columns)
+
+
+class ResponseStore:
+  """Local SQLite store of survey responses, one table per survey, upserted
+  on ``ResponseId``. A metadata table records the schema and the latest
+  ``RecordedDate`` loaded for each survey so refreshes can be incremental."""
+
+  META_TABLE = '_survey_meta'
+
+  def __init__(self, path=':memory:', batch_size=1000):
+    self.path = path
+    self.batch_size = batch_size
+    self.conn = sqlite3.connect(path, check_same_thread=False)
+    if path != ':memory:':
+      self.conn.execute('PRAGMA journal_mode=WAL')
+    with self.conn:
+      self.conn.execute(
+        'CREATE TABLE IF NOT EXISTS {} ('
+        'survey_id TEXT PRIMARY KEY, table_name TEXT NOT NULL, '
+        'columns TEXT NOT NULL, last_recorded_date TEXT, '
+        'last_refresh TEXT, row_count INTEGER NOT NULL DEFAULT 0)'
+        .format(self.META_TABLE))
+
+  def close(self):
+    self.conn.close()
+
+  @staticmethod
+  def table_name(survey_id):
+    return 'responses_{}'.format(re.sub(r'\W', '_', survey_id))
+
+  def get_meta(self, survey_id):
+    """Return the metadata dict for survey_id, or None if it isn't stored."""
+    cur = self.conn.execute(
+      'SELECT table_name, columns, last_recorded_date, last_refresh, '
+      'row_count FROM {} WHERE survey_id = ?'.format(self.META_TABLE),
+      (survey_id,))
+    row = cur.fetchone()
+    if row is None:
+      return None
+    return {'survey_id': survey_id,
+            'table_name': row[0],
+            'columns': json.loads(row[1]),
+            'last_recorded_date': row[2],
+            'last_refresh': row[3],
+            'row_count': row[4]}
+
+  def create_survey_table(self, survey_id, questions=None):
+    """Create the response table for survey_id. Parameter 'questions' is the
+    result of QualtricsAPI.list_questions; each question's DataExportTag
+    becomes a column. Columns not known in advance (e.g. matrix sub-questions)
+    are added on the first upsert that contains them."""
+    if questions is None:
+      questions = []
+    elif isinstance(questions, dict):
+      questions = questions.get('elements', list(questions.values()))
+    columns = [list(c) for c in _METADATA_COLUMNS]
+    known = set(c[0] for c in columns)
+    for q in questions:
+      if not isinstance(q, dict):
+        continue
+      tag = q.get('DataExportTag') or q.get('QuestionID')
+      if tag is None or tag in known:
+        continue
+      columns.append([tag, _NUMERIC_QUESTION_TYPES.get(q.get('QuestionType'),
+                                                       'TEXT')])
+      known.add(tag)
+    table = self.table_name(survey_id)
+    col_sql = ['{} {}'.format(_quote(n), t) for n, t in columns]
+    col_sql[0] += ' PRIMARY KEY'
+    col_sql += ['{} TEXT'.format(_HASH_COLUMN), '{} TEXT'.format(_LOADED_COLUMN)]
+    with self.conn:
+      self.conn.execute('CREATE TABLE IF NOT EXISTS {} ({})'
+                        .format(_quote(table), ', '.join(col_sql)))
+      self.conn.execute(
+        'INSERT OR REPLACE INTO {} (survey_id, table_name, columns, row_count) '
+        'VALUES (?, ?, ?, 0)'.format(self.META_TABLE),
+        (survey_id, table, json.dumps(columns)))
+    return(self.get_meta(survey_id))
+
+  def _add_columns(self, meta, names):
+    known = set(c[0] for c in meta['columns'])
+    new = [n for n in names if n not in known]
+    if not new:
+      return
+    with self.conn:
+      for n in new:
+        self.conn.execute('ALTER TABLE {} ADD COLUMN {} TEXT'
+                          .format(_quote(meta['table_name']), _quote(n)))
+        meta['columns'].append([n, 'TEXT'])
+      self.conn.execute('UPDATE {} SET columns = ? WHERE survey_id = ?'
+                        .format(self.META_TABLE),
+                        (json.dumps(meta['columns']), meta['survey_id']))
+
+  def upsert(self, survey_id, records):
+    """Insert or update responses from a DataFrame or iterable of dicts.
+    Rows whose content is unchanged since the last load are skipped. Returns
+    a dict with 'inserted', 'updated' and 'unchanged' counts."""
+    meta = self.get_meta(survey_id)
+    if meta is None:
+      meta = self.create_survey_table(survey_id)
+    counts = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+    max_recorded = meta['last_recorded_date']
+    batch = []
+    batch_columns = None
+    for columns, row in _iter_records(records):
+      if columns != batch_columns:
+        if batch:
+          self._upsert_batch(meta, batch_columns, batch, counts)
+          batch = []
+        if 'ResponseId' not in columns:
+          raise ValueError('"ResponseId" is a required column for every response')
+        self._add_columns(meta, columns)
+        batch_columns = columns
+      values = tuple(_sql_value(v) for v in row)
+      rec = dict(zip(columns, values))
+      recorded = rec.get('RecordedDate')
+      if recorded is not None and (max_recorded is None or str(recorded) > max_recorded):
+        max_recorded = str(recorded)
+      batch.append(values)
+      if len(batch) >= self.batch_size:
+        self._upsert_batch(meta, batch_columns, batch, counts)
+        batch = []
+    if batch:
+      self._upsert_batch(meta, batch_columns, batch, counts)
+    table = _quote(meta['table_name'])
+    with self.conn:
+      row_count = self.conn.execute('SELECT COUNT(*) FROM {}'.format(table)).fetchone()[0]
+      self.conn.execute(
+        'UPDATE {} SET last_recorded_date = ?, last_refresh = ?, row_count = ? '
+        'WHERE survey_id = ?'.format(self.META_TABLE),
+        (max_recorded, datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"),
+         row_count, survey_id))
+    return(counts)
+
+  def _upsert_batch(self, meta, columns, rows, counts):
+    table = _quote(meta['table_name'])
+    id_idx = columns.index('ResponseId')
+    hashed = []
+    for values in rows:
+      digest = hashlib.sha1(json.dumps(sorted(zip(columns, values)),
+                                       default=str).encode('utf-8')).hexdigest()
+      hashed.append((values, digest))
+    ids = [v[id_idx] for v, _ in hashed]
+    existing = {}
+    # Stay well below SQLite's bound-parameter limit.
+    for i in range(0, len(ids), 500):
+      chunk = ids[i:i + 500]
+      cur = self.conn.execute(
+        'SELECT ResponseId, {} FROM {} WHERE ResponseId IN ({})'
+        .format(_HASH_COLUMN, table, ', '.join('?' * len(chunk))), chunk)
+      existing.update(cur.fetchall())
+    to_write = []
+    for values, digest in hashed:
+      rid = values[id_idx]
+      if rid in existing:
+        if existing[rid] == digest:
+          counts['unchanged'] += 1
+          continue
+        counts['updated'] += 1
+      else:
+        counts['inserted'] += 1
+      to_write.append(values + (digest,))
+    if not to_write:
+      return
+    all_cols = list(columns) + [_HASH_COLUMN, _LOADED_COLUMN]
+    loaded_at = datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")
+    sql = ('INSERT INTO {0} ({1}) VALUES ({2}) ON CONFLICT(ResponseId) '
+           'DO UPDATE SET {3}'
+           .format(table,
+                   ', '.join(_quote(c) for c in all_cols),
+                   ', '.join('?' * len(all_cols)),
+                   ', '.join('{0} = excluded.{0}'.format(_quote(c))
+                             for c in all_cols if c != 'ResponseId')))
+    with self.conn:
+      self.conn.executemany(sql, [v + (loaded_at,) for v in to_write])
+
+  def query(self, sql, params=()):
+    """Run a read query against the store and return a list of row tuples."""
+    return(self.conn.execute(sql, params).fetchall())
+
+  def read_dataframe(self, survey_id):
+    """Return the stored responses for survey_id as a pandas DataFrame."""
+    import pandas as pd
+    meta = self.get_meta(survey_id)
+    if meta is None:
+      raise ValueError('No responses stored for survey {}'.format(survey_id))
+    cols = ', '.join(_quote(c[0]) for c in meta['columns'])
+    return(pd.read_sql_query('SELECT {} FROM {}'.format(cols, _quote(meta['table_name'])),
+                             self.conn))
@@ -0,0 +1,652 @@
+#! /usr/local/bin python3
+"""A local stand-in for the Qualtrics v3 endpoints used by QualtricsAPI.
+
+MockQualtrics holds the fake account state and answers requests; MockServer
+serves it over HTTP on localhost so an unmodified client can talk to it::
+
+    from py_qualtrics_api.testing import MockQualtrics, MockServer
+
+    app = MockQualtrics(page_size=100)
+    app.populate(surveys=5, mailing_lists=2, contacts_per_list=1000)
+    with MockServer(app) as server:
+        q = QualtricsAPI(server.config())
+        contacts = q.get_contacts(app.mailing_list_ids()[0])
+"""
+import io
+import json
+import random
+import re
+import threading
+import time
+import uuid
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs, urlencode, urlunsplit
+from urllib.request import Request, urlopen
+
+
+def _ok(result=None):
+  body = {'meta': {'httpStatus': '200 - OK', 'requestId': str(uuid.uuid4())}}
+  if result is not None:
+    body['result'] = result
+  return 200, body
+
+
+def _error(status, message):
+  return status, {'meta': {'httpStatus': '{} - {}'.format(status, message),
+                           'error': {'errorMessage': message},
+                           'requestId': str(uuid.uuid4())}}
+
+
+class MockQualtrics:
+  """Fake Qualtrics account. Listing endpoints are paged with page_size
+  elements per page; every request sleeps for latency seconds first, and a
+  throttle_rate fraction of requests is answered with 429. Response exports
+  report 'inProgress' for export_polls progress checks before completing,
+  and contact imports only add their contacts on the import_polls-th status
+  check (at once when 0).
+  Links for a new link distribution become available gradually over
+  link_polls reads of the distribution (immediately when 0), starting after
+  link_delay reads that still report none."""
+
+  def __init__(self, page_size=100, latency=0.0, throttle_rate=0.0,
+               export_polls=1, questions_per_survey=10, seed=0, link_polls=0,
+               link_delay=0, import_polls=0):
+    self.page_size = page_size
+    self.latency = latency
+    self.throttle_rate = throttle_rate
+    self.export_polls = export_polls
+    self.link_polls = link_polls
+    self.link_delay = link_delay
+    self.import_polls = import_polls
+    self.questions_per_survey = questions_per_survey
+    self._rng = random.Random(seed)
+    self._lock = threading.RLock()
+    self._counter = 0
+    self.request_count = 0
+    self.throttled_count = 0
+    self.surveys = {}
+    self.responses = {}
+    self.mailing_lists = {}
+    self.contacts = {}
+    self.users = {}
+    self.messages = {}
+    self.distributions = {}
+    self.links = {}
+    self._links_ready = {}
+    self._link_reads = {}
+    self.exports = {}
+    self.imports = {}
+    self.files = {}
+    self.subscriptions = {}
+    self._routes = [
+      ('GET', r'/surveys', self._list_surveys),
+      ('POST', r'/surveys', self._copy_survey),
+      ('GET', r'/surveys/(?P<sid>[^/]+)', self._get_survey),
+      ('PUT', r'/surveys/(?P<sid>[^/]+)', self._update_survey),
+      ('DELETE', r'/surveys/(?P<sid>[^/]+)', self._delete_survey),
+      ('GET', r'/surveys/(?P<sid>[^/]+)/responses/(?P<rid>[^/]+)', self._get_response),
+      ('GET', r'/survey-definitions/(?P<sid>[^/]+)/questions', self._list_questions),
+      ('POST', r'/surveys/(?P<sid>[^/]+)/export-responses', self._create_export),
+      ('GET', r'/surveys/(?P<sid>[^/]+)/export-responses/(?P<fid>[^/]+)/file',
+       self._export_file),
+      ('GET', r'/surveys/(?P<sid>[^/]+)/export-responses/(?P<pid>[^/]+)',
+       self._export_progress),
+      ('GET', r'/mailinglists', self._list_mailing_lists),
+      ('POST', r'/mailinglists', self._create_mailing_list),
+      ('GET', r'/mailinglists/(?P<mlid>[^/]+)', self._get_mailing_list),
+      ('DELETE', r'/mailinglists/(?P<mlid>[^/]+)', self._delete_mailing_list),
+      ('GET', r'/mailinglists/(?P<mlid>[^/]+)/contacts', self._list_contacts),
+      ('POST', r'/mailinglists/(?P<mlid>[^/]+)/contacts', self._create_contact),
+      ('PUT', r'/mailinglists/(?P<mlid>[^/]+)/contacts/(?P<cid>[^/]+)',
+       self._update_contact),
+      ('DELETE', r'/mailinglists/(?P<mlid>[^/]+)/contacts/(?P<cid>[^/]+)',
+       self._delete_contact),
+      ('POST', r'/mailinglists/(?P<mlid>[^/]+)/contactimports', self._import_contacts),
+      ('GET', r'/mailinglists/(?P<mlid>[^/]+)/contactimports/(?P<iid>[^/]+)',
+       self._import_progress),
+      ('POST', r'/libraries/(?P<lid>[^/]+)/messages', self._create_message),
+      ('POST', r'/distributions', self._create_distribution),
+      ('GET', r'/distributions/(?P<did>[^/]+)', self._get_distribution),
+      ('GET', r'/distributions/(?P<did>[^/]+)/links', self._list_links),
+      ('POST', r'/distributions/(?P<did>[^/]+)/reminders', self._create_reminder),
+      ('POST', r'/eventsubscriptions', self._create_subscription),
+      ('DELETE', r'/eventsubscriptions/(?P<subid>[^/]+)', self._delete_subscription),
+      ('GET', r'/users', self._list_users),
+      ('POST', r'/users', self._create_user),
+      ('GET', r'/users/(?P<uid>[^/]+)', self._get_user),
+      ('PUT', r'/users/(?P<uid>[^/]+)', self._update_user),
+    ]
+    self._routes = [(m, re.compile('^' + p + '$'), fn) for m, p, fn in self._routes]
+
+  def _new_id(self, prefix):
+    with self._lock:
+      self._counter += 1
+      return '{}_{:015d}'.format(prefix, self._counter)
+
+  # -- fixtures --------------------------------------------------------------
+
+  def populate(self, surveys=0, responses_per_survey=0, mailing_lists=0,
+               contacts_per_list=0, users=0):
+    """Create fake surveys (with responses), mailing lists (with contacts)
+    and users."""
+    for i in range(surveys):
+      sid = self._new_id('SV')
+      self.surveys[sid] = {'id': sid, 'name': 'Survey {}'.format(i),
+                           'ownerId': 'UR_1', 'isActive': False,
+                           'lastModified': '2020-01-01T00:00:00Z',
+                           'creationDate': '2020-01-01T00:00:00Z'}
+      self.add_responses(sid, responses_per_survey)
+    for i in range(mailing_lists):
+      mlid = self._new_id('ML')
+      self.mailing_lists[mlid] = {'id': mlid, 'name': 'List {}'.format(i),
+                                  'libraryId': 'UR_1', 'category': 'Test',
+                                  'folder': None,
+                                  'lastModifiedDate': 1577836800000}
+      self.contacts[mlid] = {}
+      self.add_contacts(mlid, contacts_per_list)
+    for i in range(users):
+      uid = self._new_id('UR')
+      self.users[uid] = {'id': uid, 'username': 'user{}'.format(i),
+                         'email': 'user{}@example.com'.format(i),
+                         'firstName': 'First{}'.format(i),
+                         'lastName': 'Last{}'.format(i),
+                         'userType': 'UT_BASIC', 'divisionId': None,
+                         'accountStatus': 'active'}
+
+  def add_responses(self, survey_id, n):
+    """Add n responses to a survey and return their ids."""
+    rows = self.responses.setdefault(survey_id, [])
+    start = len(rows)
+    for i in range(start, start + n):
+      row = {'StartDate': '2020-01-01 00:00:00', 'EndDate': '2020-01-01 00:05:00',
+             'Status': 'IP Address', 'IPAddress': '127.0.0.1', 'Progress': 100,
+             'Duration (in seconds)': 300, 'Finished': 1,
+             'RecordedDate': '2020-01-01 00:{:02d}:{:02d}'.format((i // 60) % 60, i % 60),
+             'ResponseId': 'R_{:015d}'.format(i)}
+      for q in range(1, self.questions_per_survey + 1):
+        row['Q{}'.format(q)] = 'Answer {} to question {}'.format(i % 5, q)
+      rows.append(row)
+    return [r['ResponseId'] for r in rows[start:]]
+
+  def complete_responses(self, survey_id, n):
+    """Add n responses and, like Qualtrics, POST a completed-response event
+    for each to every subscription to the survey's topic. Returns the new
+    response ids."""
+    ids = self.add_responses(survey_id, n)
+    rows = self.responses[survey_id][-n:] if n else []
+    topic = 'surveyengine.completedResponse.{}'.format(survey_id)
+    with self._lock:
+      urls = [sub['publicationUrl'] for sub in self.subscriptions.values()
+              if topic in sub['topics'].split(',')]
+    for url in urls:
+      for row in rows:
+        send_event(url, survey_id, row['ResponseId'],
+                   completed_date=row['RecordedDate'])
+    return ids
+
+  def add_contacts(self, ml_id, n):
+    cs = self.contacts[ml_id]
+    start = len(cs)
+    for i in range(start, start + n):
+      cid = self._new_id('MLRP')
+      cs[cid] = {'id': cid, 'firstName': 'First{}'.format(i),
+                 'lastName': 'Last{}'.format(i),
+                 'email': 'person{}@example.com'.format(i),
+                 'externalDataReference': str(100000 + i),
+                 'embeddedData': {}, 'language': 'en', 'unsubscribed': False,
+                 'responseHistory': [], 'emailHistory': []}
+    self._touch(ml_id)
+
+  def _touch(self, ml_id):
+    if ml_id in self.mailing_lists:
+      self.mailing_lists[ml_id]['lastModifiedDate'] = int(time.time() * 1000)
+
+  def survey_ids(self):
+    return list(self.surveys)
+
+  def mailing_list_ids(self):
+    return list(self.mailing_lists)
+
+  # -- dispatch --------------------------------------------------------------
+
+  def handle(self, method, url, headers=None, body=None):
+    """Answer one request. Returns (status code, headers dict, body bytes)."""
+    headers = dict((k.lower(), v) for k, v in (headers or {}).items())
+    with self._lock:
+      self.request_count += 1
+      throttled = self.throttle_rate and self._rng.random() < self.throttle_rate
+      if throttled:
+        self.throttled_count += 1
+    if self.latency:
+      time.sleep(self.latency)
+    if throttled:
+      status, payload = _error(429, 'Too Many Requests')
+      return status, {'Content-Type': 'application/json'}, \
+          json.dumps(payload).encode('utf-8')
+    parts = urlsplit(url)
+    path = parts.path.split('/API/v3', 1)[-1].rstrip('/') or '/'
+    query = dict((k, v[0]) for k, v in parse_qs(parts.query).items())
+    data = None
+    if body:
+      data = json.loads(body.decode('utf-8') if isinstance(body, bytes) else body)
+    for m, pattern, fn in self._routes:
+      match = pattern.match(path)
+      if m == method.upper() and match:
+        with self._lock:
+          retval = fn(url=url, query=query, headers=headers, data=data,
+                      **match.groupdict())
+        break
+    else:
+      retval = _error(404, 'Not Found')
+    if isinstance(retval[1], (bytes, bytearray)):
+      return retval[0], {'Content-Type': 'application/octet-stream'}, retval[1]
+    return retval[0], {'Content-Type': 'application/json'}, \
+        json.dumps(retval[1]).encode('utf-8')
+
+  def _page(self, url, query, elements):
+    offset = int(query.get('offset', 0))
+    page = elements[offset:offset + self.page_size]
+    next_page = None
+    if offset + self.page_size < len(elements):
+      parts = urlsplit(url)
+      q = dict(query)
+      q['offset'] = offset + self.page_size
+      next_page = urlunsplit((parts.scheme, parts.netloc, parts.path,
+                              urlencode(q), ''))
+    return _ok({'elements': page, 'nextPage': next_page})
+
+  # -- surveys ---------------------------------------------------------------
+
+  def _list_surveys(self, url, query, **kw):
+    return self._page(url, query, list(self.surveys.values()))
+
+  def _get_survey(self, sid, **kw):
+    if sid not in self.surveys:
+      return _error(404, 'Not Found')
+    return _ok(self.surveys[sid])
+
+  def _copy_survey(self, headers, data, **kw):
+    src = headers.get('x-copy-source')
+    if src not in self.surveys:
+      return _error(400, 'Bad Request')
+    sid = self._new_id('SV')
+    self.surveys[sid] = dict(self.surveys[src], id=sid, name=data['projectName'],
+                             ownerId=headers.get('x-copy-destination-owner'),
+                             isActive=False)
+    self.responses[sid] = []
+    return _ok({'id': sid})
+
+  def _update_survey(self, sid, data, **kw):
+    if sid not in self.surveys:
+      return _error(404, 'Not Found')
+    self.surveys[sid].update(data)
+    return _ok()
+
+  def _delete_survey(self, sid, **kw):
+    if self.surveys.pop(sid, None) is None:
+      return _error(404, 'Not Found')
+    self.responses.pop(sid, None)
+    return _ok()
+
+  def _get_response(self, sid, rid, **kw):
+    row = next((r for r in self.responses.get(sid, []) if r['ResponseId'] == rid), None)
+    if row is None:
+      return _error(404, 'Not Found')
+    fields = {'StartDate': 'startDate', 'EndDate': 'endDate', 'Status': 'status',
+              'IPAddress': 'ipAddress', 'Progress': 'progress',
+              'Duration (in seconds)': 'duration', 'Finished': 'finished',
+              'RecordedDate': 'recordedDate'}
+    values = {'_recordId': rid}
+    for k, v in row.items():
+      if k in fields:
+        if k.endswith('Date'):
+          v = v.replace(' ', 'T') + 'Z'
+        values[fields[k]] = v
+      elif re.match(r'^Q\d+$', k):
+        values['QID' + k[1:]] = v
+    return _ok({'responseId': rid, 'values': values, 'labels': {},
+                'displayedFields': [], 'displayedValues': {}})
+
+  def _list_questions(self, sid, **kw):
+    if sid not in self.surveys:
+      return _error(404, 'Not Found')
+    return _ok({'elements': [{'QuestionID': 'QID{}'.format(q),
+                              'DataExportTag': 'Q{}'.format(q),
+                              'QuestionType': 'TE',
+                              'QuestionText': 'Question {}'.format(q)}
+                             for q in range(1, self.questions_per_survey + 1)]})
+
+  # -- response exports ------------------------------------------------------
+
+  def _create_export(self, sid, data, **kw):
+    if sid not in self.surveys:
+      return _error(404, 'Not Found')
+    pid = self._new_id('ES')
+    self.exports[pid] = {'survey_id': sid, 'polls': 0, 'format': data.get('format'),
+                         'limit': data.get('limit'), 'start_date': data.get('startDate')}
+    return _ok({'progressId': pid, 'percentComplete': 0.0, 'status': 'inProgress'})
+
+  def _export_progress(self, sid, pid, **kw):
+    export = self.exports.get(pid)
+    if export is None:
+      return _error(404, 'Not Found')
+    export['polls'] += 1
+    if export['polls'] < self.export_polls:
+      return _ok({'percentComplete': 50.0, 'status': 'inProgress'})
+    if 'file_id' not in export:
+      export['file_id'] = '{}-file'.format(uuid.uuid4())
+      self.files[export['file_id']] = self._build_export(export)
+    return _ok({'percentComplete': 100.0, 'status': 'complete',
+                'fileId': export['file_id']})
+
+  def _build_export(self, export):
+    rows = self.responses.get(export['survey_id'], [])
+    if export['start_date']:
+      start = export['start_date'].replace('T', ' ').rstrip('Z')
+      rows = [r for r in rows if r['RecordedDate'] >= start]
+    if export['limit']:
+      rows = rows[:export['limit']]
+    buf = io.StringIO()
+    if export['format'] == 'xml':
+      buf.write('<?xml version="1.0" encoding="UTF-8"?>\n<Responses>')
+      for r in rows:
+        buf.write('<Response>{}</Response>'.format(
+          ''.join('<{0}>{1}</{0}>'.format(re.sub(r'\W', '', k), v)
+                  for k, v in r.items())))
+      buf.write('</Responses>')
+      name = 'responses.xml'
+    else:
+      cols = list(rows[0]) if rows else ['ResponseId', 'RecordedDate']
+      buf.write(','.join('"{}"'.format(c) for c in cols) + '\n')
+      buf.write(','.join('"{}"'.format(c) for c in cols) + '\n')
+      buf.write(','.join('"{{""ImportId"":""{}""}}"'.format(c) for c in cols) + '\n')
+      for r in rows:
+        buf.write(','.join('"{}"'.format(r.get(c, '')) for c in cols) + '\n')
+      name = 'responses.csv'
+    out = io.BytesIO()
+    with zipfile.ZipFile(out, 'w', zipfile.ZIP_DEFLATED) as zf:
+      zf.writestr(name, buf.getvalue())
+    return out.getvalue()
+
+  def _export_file(self, sid, fid, **kw):
+    if fid not in self.files:
+      return _error(404, 'Not Found')
+    return 200, self.files[fid]
+
+  # -- mailing lists and contacts --------------------------------------------
+
+  def _list_mailing_lists(self, url, query, **kw):
+    return self._page(url, query, list(self.mailing_lists.values()))
+
+  def _create_mailing_list(self, data, **kw):
+    mlid = self._new_id('ML')
+    self.mailing_lists[mlid] = {'id': mlid, 'name': data['name'],
+                                'libraryId': data.get('libraryId'),
+                                'category': data.get('category'),
+                                'folder': None,
+                                'lastModifiedDate': int(time.time() * 1000)}
+    self.contacts[mlid] = {}
+    return _ok({'id': mlid})
+
+  def _get_mailing_list(self, mlid, **kw):
+    if mlid not in self.mailing_lists:
+      return _error(404, 'Not Found')
+    return _ok(self.mailing_lists[mlid])
+
+  def _delete_mailing_list(self, mlid, **kw):
+    if self.mailing_lists.pop(mlid, None) is None:
+      return _error(404, 'Not Found')
+    self.contacts.pop(mlid, None)
+    return _ok()
+
+  def _list_contacts(self, mlid, url, query, **kw):
+    if mlid not in self.contacts:
+      return _error(404, 'Not Found')
+    return self._page(url, query, list(self.contacts[mlid].values()))
+
+  def _contact_from_payload(self, cid, data):
+    rec = {'id': cid, 'firstName': data.get('firstName'),
+           'lastName': data.get('lastName'), 'email': data.get('email'),
+           'externalDataReference': data.get('externalReference'),
+           'embeddedData': data.get('embeddedData', {}),
+           'language': data.get('language'),
+           'unsubscribed': data.get('unsubscribed', False),
+           'responseHistory': [], 'emailHistory': []}
+    return rec
+
+  def _create_contact(self, mlid, data, **kw):
+    if mlid not in self.contacts:
+      return _error(404, 'Not Found')
+    cid = self._new_id('MLRP')
+    self.contacts[mlid][cid] = self._contact_from_payload(cid, data)
+    self._touch(mlid)
+    return _ok({'id': cid})
+
+  def _update_contact(self, mlid, cid, data, **kw):
+    rec = self.contacts.get(mlid, {}).get(cid)
+    if rec is None:
+      return _error(404, 'Not Found')
+    for k, v in data.items():
+      rec['externalDataReference' if k == 'externalReference' else k] = v
+    self._touch(mlid)
+    return _ok()
+
+  def _delete_contact(self, mlid, cid, **kw):
+    if self.contacts.get(mlid, {}).pop(cid, None) is None:
+      return _error(404, 'Not Found')
+    self._touch(mlid)
+    return _ok()
+
+  def _import_contacts(self, mlid, data, **kw):
+    if mlid not in self.contacts:
+      return _error(404, 'Not Found')
+    iid = self._new_id('PGRS')
+    self.imports[iid] = {'mlid': mlid, 'contacts': data['contacts'], 'polls': 0,
+                         'done': False}
+    if not self.import_polls:
+      self._finish_import(self.imports[iid])
+    return _ok({'id': iid, 'tracking': {}})
+
+  def _finish_import(self, imp):
+    for rec in imp['contacts']:
+      cid = self._new_id('MLRP')
+      self.contacts[imp['mlid']][cid] = self._contact_from_payload(cid, rec)
+    imp['done'] = True
+    self._touch(imp['mlid'])
+
+  def _import_progress(self, mlid, iid, **kw):
+    imp = self.imports.get(iid)
+    if imp is None or imp['mlid'] != mlid:
+      return _error(404, 'Not Found')
+    imp['polls'] += 1
+    if not imp['done'] and imp['polls'] >= self.import_polls:
+      self._finish_import(imp)
+    if not imp['done']:
+      return _ok({'percentComplete': 50.0, 'status': 'inProgress'})
+    added = len(imp['contacts'])
+    return _ok({'percentComplete': 100.0, 'status': 'complete',
+                'contacts': {'count': {'added': added, 'updated': 0, 'failed': 0}}})
+
+  # -- messages and distributions --------------------------------------------
+
+  def _create_message(self, lid, data, **kw):
+    msg_id = self._new_id('MS')
+    self.messages[msg_id] = dict(data, libraryId=lid)
+    return _ok({'id': msg_id})
+
+  def _create_distribution(self, data, **kw):
+    recipients = data.get('recipients', {}).get('mailingListId')
+    if recipients is not None and recipients not in self.contacts:
+      return _error(400, 'Bad Request')
+    did = self._new_id('EMD')
+    if data.get('action') == 'CreateDistribution':
+      mlid = data['mailingListId']
+      if mlid not in self.contacts:
+        return _error(404, 'Not Found')
+      self.links[did] = [
+        {'contactId': c['id'], 'transactionId': None,
+         'link': 'https://mock.qualtrics.com/jfe/form/{}?Q_CHL=gl&Q_DL={}_{}'
+                 .format(data['surveyId'], did, c['id']),
+         'exceededContactFrequency': False,
+         'linkExpiration': data.get('expirationDate'), 'status': 'Email not sent',
+         'lastName': c['lastName'], 'firstName': c['firstName'],
+         'externalDataReference': c['externalDataReference'],
+         'email': c['email'], 'unsubscribed': c['unsubscribed']}
+        for c in self.contacts[mlid].values()]
+      self._links_ready[did] = (0 if self.link_polls or self.link_delay
+                                else len(self.links[did]))
+    self.distributions[did] = dict(data, id=did, parentDistributionId=None,
+                                   stats={'sent': self._links_ready.get(did, 0),
+                                          'failed': 0, 'skipped': 0})
+    return _ok({'id': did})
+
+  def _get_distribution(self, did, **kw):
+    if did not in self.distributions:
+      return _error(404, 'Not Found')
+    if did in self.links:
+      self._link_reads[did] = self._link_reads.get(did, 0) + 1
+      if self._link_reads[did] <= self.link_delay:
+        return _ok(self.distributions[did])
+      total = len(self.links[did])
+      step = -(-total // self.link_polls) if self.link_polls else total
+      self._links_ready[did] = min(total, self._links_ready[did] + step)
+      self.distributions[did]['stats']['sent'] = self._links_ready[did]
+    return _ok(self.distributions[did])
+
+  def _list_links(self, did, url, query, **kw):
+    if did not in self.links:
+      return _error(404, 'Not Found')
+    return self._page(url, query, self.links[did][:self._links_ready[did]])
+
+  def _create_reminder(self, did, data, **kw):
+    if did not in self.distributions:
+      return _error(404, 'Not Found')
+    rid = self._new_id('EMD')
+    self.distributions[rid] = dict(data, id=rid, parentDistributionId=did,
+                                   stats={'sent': 0, 'failed': 0, 'skipped': 0})
+    return _ok({'distributionId': rid})
+
+  # -- event subscriptions ---------------------------------------------------
+
+  def _create_subscription(self, data, **kw):
+    subid = self._new_id('SUB')
+    self.subscriptions[subid] = dict(data, id=subid)
+    return _ok({'id': subid})
+
+  def _delete_subscription(self, subid, **kw):
+    if self.subscriptions.pop(subid, None) is None:
+      return _error(404, 'Not Found')
+    return _ok()
+
+  # -- users -----------------------------------------------------------------
+
+  def _list_users(self, url, query, **kw):
+    return self._page(url, query, list(self.users.values()))
+
+  def _create_user(self, data, **kw):
+    if any(u['username'] == data.get('username') for u in self.users.values()):
+      return _error(400, 'Bad Request')
+    uid = self._new_id('UR')
+    rec = dict((k, v) for k, v in data.items() if k != 'password')
+    rec['id'] = uid
+    rec['accountStatus'] = 'active'
+    self.users[uid] = rec
+    return _ok({'id': uid})
+
+  def _get_user(self, uid, **kw):
+    if uid not in self.users:
+      return _error(404, 'Not Found')
+    return _ok(self.users[uid])
+
+  def _update_user(self, uid, data, **kw):
+    if uid not in self.users:
+      return _error(404, 'Not Found')
+    self.users[uid].update(data)
+    return _ok()
+
+
+def send_event(url, survey_id, response_id, topic=None, completed_date=None,
+               timeout=10):
+  """POST a completed-response event to url the way Qualtrics does (a form
+  encoded body). Returns the HTTP status of the reply."""
+  if topic is None:
+    topic = 'surveyengine.completedResponse.{}'.format(survey_id)
+  if completed_date is None:
+    completed_date = time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime())
+  body = urlencode({'Topic': topic, 'Status': 'Complete', 'SurveyID': survey_id,
+                    'ResponseID': response_id, 'CompletedDate': completed_date,
+                    'BrandID': 'mock'}).encode('utf-8')
+  request = Request(url, data=body, method='POST',
+                    headers={'Content-Type': 'application/x-www-form-urlencoded'})
+  with urlopen(request, timeout=timeout) as response:
+    return response.status
+
+
+class _Handler(BaseHTTPRequestHandler):
+
+  protocol_version = 'HTTP/1.1'
+  # Headers and body go out in separate writes; with Nagle's algorithm on,
+  # the body waits for the client's delayed ACK (~40 ms per request).
+  disable_nagle_algorithm = True
+
+  def _dispatch(self):
+    length = int(self.headers.get('Content-Length') or 0)
+    body = self.rfile.read(length) if length else None
+    url = 'http://{}:{}{}'.format(self.server.server_address[0],
+                                  self.server.server_address[1], self.path)
+    status, headers, content = self.server.app.handle(self.command, url,
+                                                      dict(self.headers), body)
+    self.send_response(status)
+    for k, v in headers.items():
+      self.send_header(k, v)
+    self.send_header('Content-Length', str(len(content)))
+    self.end_headers()
+    self.wfile.write(content)
+
+  do_GET = do_POST = do_PUT = do_DELETE = _dispatch
+
+  def log_message(self, format, *args):
+    pass
+
+
+class MockServer:
+  """Serve a MockQualtrics app over HTTP on localhost in a background thread."""
+
+  def __init__(self, app=None, host='127.0.0.1', port=0):
+    self.app = app if app is not None else MockQualtrics()
+    self._httpd = ThreadingHTTPServer((host, port), _Handler)
+    self._httpd.daemon_threads = True
+    self._httpd.app = self.app
+    self._thread = None
+
+  @property
+  def base_url(self):
+    host, port = self._httpd.server_address[:2]
+    return 'http://{}:{}/API/v3'.format(host, port)
+
+  def config(self, **overrides):
+    """Return a QualtricsAPI config dict pointing at this server."""
+    cfg = {'api_token': 'x' * 40, 'data_center': 'mock',
+           'default_survey_owner': 'UR_1', 'default_library_owner': 'UR_1',
+           'base_url': self.base_url}
+    cfg.update(overrides)
+    return cfg
+
+  def start(self):
+    self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+    self._thread.start()
+    return self
+
+  def stop(self):
+    if self._thread is not None:
+      self._httpd.shutdown()
+      self._thread.join()
+      self._thread = None
+    self._httpd.server_close()
+
+  def __enter__(self):
+    return self.start()
+
+  def __exit__(self, *exc):
+    self.stop()
@@ -1,17 +1,165 @@
 #! /usr/local/bin python3
-import yaml
-import pandas as pd
-import requests
 from getpass import getpass
 from datetime import datetime, timedelta
-import zipfile
+import contextlib
+import csv
+import hashlib
 import io
+import json
+import os
+import re
+import shutil
 import time
+import logging
+import threading
+from py_qualtrics_api.codec import get_json_codec, make_codec
+from py_qualtrics_api.result import ApiResult
+from py_qualtrics_api.instrument import Metrics, RequestInfo, redact_headers, logger
+from py_qualtrics_api.transport import RequestsTransport
+from py_qualtrics_api.records import Records
+from py_qualtrics_api.concurrency import RateLimiter, run_concurrently
+from py_qualtrics_api.journal import open_journal
+from py_qualtrics_api.coalesce import SingleFlight
+from py_qualtrics_api._lazy import LazyModule
+
+# Loaded on first use to keep "import py_qualtrics_api" fast.
+pd = LazyModule('pandas')
+yaml = LazyModule('yaml')
+zipfile = LazyModule('zipfile')
+tempfile = LazyModule('tempfile')
+
+_API_TIME_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+# Returned by QualtricsAPI._phase while profiling is off.
+_NO_PHASE = contextlib.nullcontext()
+
+
+def _api_time(value, default_offset=timedelta(0)):
+  """Format a schedule value for the API. None means now plus default_offset
+  and a timedelta is relative to now, both evaluated at call time; datetimes
+  are formatted and strings are passed through."""
+  if value is None:
+    value = default_offset
+  if isinstance(value, timedelta):
+    value = datetime.utcnow() + value
+  if isinstance(value, datetime):
+    return value.strftime(_API_TIME_FORMAT)
+  return value
+
+
+def _table_rows(table):
+  """Return the rows of a DataFrame, Records or iterable of dicts as a list of
+  dicts, with missing (NaN) values as None."""
+  if hasattr(table, 'to_dict') and hasattr(table, 'columns'):
+    rows = table.to_dict('records')
+  elif hasattr(table, 'to_dicts'):
+    rows = table.to_dicts()
+  else:
+    rows = [dict(r) for r in table]
+  return [dict((k, None if isinstance(v, float) and v != v else v)
+               for k, v in r.items()) for r in rows]
+
+
+def _table_ids(ids, id_column='id'):
+  """Return a list of ids from a single id, an iterable of ids, or the
+  id_column of a DataFrame, Records or iterable of dicts."""
+  if isinstance(ids, str):
+    return [ids]
+  if isinstance(ids, Records):
+    return list(ids.column(id_column))
+  if hasattr(ids, 'columns'):
+    return ids[id_column].tolist()
+  return [i[id_column] if isinstance(i, dict) else i for i in ids]
+
+
+def _idempotency_key(prefix, row, key_column=None):
+  """Return the journal key for one unit of a bulk job: prefix plus the
+  row's key_column value, or a hash of the whole row when no column is
+  named, so the same row always maps to the same key."""
+  if key_column is not None:
+    return '{} {}'.format(prefix, row[key_column])
+  blob = json.dumps(row, sort_keys=True, default=str).encode('utf-8')
+  return '{} {}'.format(prefix, hashlib.sha1(blob).hexdigest())
+
+
+_SEND_SURVEY_FIELDS = ('survey_id', 'message_id', 'mailing_list_id', 'from_email',
+                       'from_name', 'subject', 'message_library_id',
+                       'reply_to_email', 'link_type', 'send_time',
+                       'expiration_time')
+_SEND_REMINDER_FIELDS = ('parent_distribution_id', 'message_id', 'from_email',
+                         'from_name', 'subject', 'message_library_id',
+                         'reply_to_email', 'send_time')
+# update_user parameter -> field name in list_users elements
+_USER_FIELDS = {'username': 'username', 'email': 'email',
+                'first_name': 'firstName', 'last_name': 'lastName',
+                'user_type': 'userType', 'division_id': 'divisionId',
+                'status': 'accountStatus', 'language': 'language',
+                'time_zone': 'timeZone', 'permissions': 'permissions',
+                'account_expiration_date': 'accountExpirationDate'}
+# Methods that configure the client rather than call the API.
+_UNPROFILED_METHODS = ('add_request_hook', 'remove_request_hook',
+                       'enable_profiling', 'disable_profiling',
+                       'set_json_codec', 'attach_contact_mirror')
+# Keyword arguments naming what a profiled call works on, when it wasn't
+# passed positionally.
+_TARGET_ARGUMENTS = ('survey_id', 'list_id', 'ml_id', 'mailing_list_id',
+                     'distribution_id', 'user_id')
+_CREATE_USER_FIELDS = ('username', 'password', 'first_name', 'last_name',
+                       'user_type', 'email', 'division_id',
+                       'account_expiration_date', 'language')
+
+def _link_sink(sink):
+  """Return (write, close) functions for generate_links' sink argument."""
+  lock = threading.Lock()
+  if isinstance(sink, list):
+    def write(links):
+      with lock:
+        sink.extend(links)
+    return write, lambda: None
+  if callable(sink):
+    def write(links):
+      with lock:
+        sink(links)
+    return write, lambda: None
+  f = open(sink, 'w', newline='', encoding='utf-8')
+  state = {}
+
+  def write(links):
+    with lock:
+      if not links:
+        return
+      if 'writer' not in state:
+        state['writer'] = csv.DictWriter(f, list(links[0]), extrasaction='ignore')
+        state['writer'].writeheader()
+      state['writer'].writerows(links)
+      f.flush()
+  return write, f.close
+
 
 class QualtricsAPI:
 
-  def __init__(self, config_file_or_dict):
+  def __init__(self, config_file_or_dict, transport=None):
     self.config = self.APIConfig(config_file_or_dict)
+    self._transport = transport
+    self.contact_mirror = None
+    self.json_codec = None
+    self.metrics = Metrics()
+    self._pre_request_hooks = []
+    self._post_request_hooks = []
+    self._transport_lock = threading.Lock()
+    # Requests answered with one of retry_statuses are retried up to
+    # max_retries times, waiting Retry-After seconds when the server sends
+    # it and retry_backoff * 2**attempt seconds otherwise.
+    self.max_retries = 3
+    self.retry_backoff = 1.0
+    self.retry_statuses = (429, 503)
+    # Identical GETs issued while one is in flight share its response. Set
+    # single_flight.ttl to also reuse successful responses for that many
+    # seconds; any other request clears the cache.
+    self.coalesce_gets = True
+    self.single_flight = SingleFlight()
+    self.profiler = None
+    self._profiled = []
 
   class APIConfig:
 
@@ -29,15 +177,191 @@ class QualtricsAPI:
       self.data_center = cfg['data_center']
       self.default_survey_owner = cfg['default_survey_owner']
       self.default_library_owner = cfg['default_library_owner']
+      # Root of the v3 API; override to point the client at a proxy or a
+      # local stand-in such as py_qualtrics_api.testing.MockServer.
+      self.base_url = cfg.get('base_url',
+                              'https://{}.qualtrics.com/API/v3'.format(self.data_center))
+
+  @property
+  def transport(self):
+    """Anything with a request(method, url, headers, body) method; see
+    py_qualtrics_api.transport. Defaults to a RequestsTransport created on
+    first use."""
+    if self._transport is None:
+      with self._transport_lock:
+        if self._transport is None:
+          self._transport = RequestsTransport()
+    return self._transport
+
+  @transport.setter
+  def transport(self, transport):
+    self._transport = transport
+
+  def _request(self, method, base_url, headers, payload=None, page=None,
+               stream_to=None):
+    """Send a request and wrap the response in an ApiResult. Payloads are
+    encoded with this instance's JSON codec (see set_json_codec). Every
+    request is passed to the registered hooks and recorded in self.metrics.
+    GETs go through self.single_flight when coalesce_gets is set; callers
+    sharing a response each get their own copy, decoded separately. With
+    stream_to (a writable binary file), a 200 response body is written to
+    it as it arrives instead of being held in the result."""
+    if method != 'GET':
+      self.single_flight.clear()
+    elif self.coalesce_gets and stream_to is None:
+      return(self.single_flight.do(
+        base_url, lambda: self._send(method, base_url, headers, payload, page),
+        cacheable=lambda result: result.status_code == 200).copy())
+    return(self._send(method, base_url, headers, payload, page, stream_to))
+
+  def _send(self, method, base_url, headers, payload=None, page=None,
+            stream_to=None):
+    codec = self.json_codec if self.json_codec is not None else get_json_codec()
+    body = None
+    if payload is not None:
+      with self._phase('serialize'):
+        body = codec.dumps(payload)
+      if not any(k.lower() == 'content-type' for k in headers):
+        headers = dict(headers)
+        headers['Content-Type'] = 'application/json'
+    info = RequestInfo(method, base_url, len(body) if body else 0, page)
+    for hook in self._pre_request_hooks:
+      hook(info)
+    t0 = time.perf_counter()
+    while True:
+      try:
+        with self._phase('network'):
+          if stream_to is None:
+            response = self.transport.request(method, base_url, headers, body)
+          else:
+            stream_to.seek(0)
+            stream_to.truncate()
+            response = self.transport.download(method, base_url, stream_to,
+                                               headers, body)
+      except Exception as e:
+        info.error = e
+        self._finish_request(info, t0)
+        raise
+      if (response.status_code not in self.retry_statuses or
+          info.retries >= self.max_retries):
+        break
+      with self._phase('wait'):
+        time.sleep(self._retry_delay(response, info.retries))
+      info.retries += 1
+    result = ApiResult(response.status_code, response.content, response.headers,
+                       codec, raw=response)
+    info.status = result.status_code
+    info.bytes_received = len(result.content or b'')
+    if stream_to is not None:
+      info.bytes_received += stream_to.tell()
+    self._finish_request(info, t0)
+    return(result)
+
+  def _retry_delay(self, response, attempt):
+    try:
+      return float(response.headers.get('Retry-After'))
+    except (TypeError, ValueError):
+      return self.retry_backoff * 2 ** attempt
+
+  def _finish_request(self, info, t0):
+    info.latency = time.perf_counter() - t0
+    self.metrics.record(info)
+    if logger.isEnabledFor(logging.DEBUG):
+      logger.debug('%s %s -> %s in %.1f ms (%d B sent, %d B received)',
+                   info.method, info.url, info.status or info.error,
+                   info.latency * 1000.0, info.bytes_sent, info.bytes_received)
+    for hook in self._post_request_hooks:
+      hook(info)
+
+  def add_request_hook(self, pre=None, post=None):
+    """Register callables that receive a RequestInfo before each request is
+    sent (pre) and after it completes (post)."""
+    if pre is not None:
+      self._pre_request_hooks.append(pre)
+    if post is not None:
+      self._post_request_hooks.append(post)
+
+  def remove_request_hook(self, hook):
+    for hooks in [self._pre_request_hooks, self._post_request_hooks]:
+      while hook in hooks:
+        hooks.remove(hook)
+
+  def enable_profiling(self, trace_memory=True):
+    """Record every public method call on this instance with a breakdown of
+    its time into phases (payload building, serialization, network, polling
+    waits, download, decompression, parsing) and, with trace_memory, its
+    peak memory. Returns the py_qualtrics_api.profiling.Profiler holding
+    the results, also kept as self.profiler. While profiling is off, each
+    phase marker costs a single attribute check."""
+    from py_qualtrics_api.profiling import Profiler
+    import functools
+    import inspect
+    self.disable_profiling()
+    profiler = Profiler(trace_memory)
+
+    def wrap(name, method):
+      @functools.wraps(method)
+      def profiled(*args, **kwargs):
+        target = next((a for a in args if isinstance(a, str)), None)
+        if target is None:
+          target = next((kwargs[k] for k in _TARGET_ARGUMENTS
+                         if isinstance(kwargs.get(k), str)), None)
+        with profiler.operation(name, target):
+          return method(*args, **kwargs)
+      return profiled
+
+    for name, fn in inspect.getmembers(QualtricsAPI, inspect.isfunction):
+      if (name.startswith('_') or name.startswith('make_') or
+          name in _UNPROFILED_METHODS):
+        continue
+      setattr(self, name, wrap(name, getattr(self, name)))
+      self._profiled.append(name)
+    self.add_request_hook(post=profiler.on_request)
+    self.profiler = profiler
+    return(profiler)
+
+  def disable_profiling(self):
+    """Stop profiling and return the Profiler with what was recorded."""
+    profiler = self.profiler
+    for name in self._profiled:
+      self.__dict__.pop(name, None)
+    self._profiled = []
+    if profiler is not None:
+      self.remove_request_hook(profiler.on_request)
+      profiler.close()
+    self.profiler = None
+    return(profiler)
+
+  def _phase(self, name):
+    """Time the enclosed code as phase name of the current call when
+    profiling is enabled."""
+    if self.profiler is None:
+      return(_NO_PHASE)
+    return(self.profiler.phase(name))
+
+  def _print_request(self, method, base_url, headers, payload=None):
+    """Verbose output for a request: the API token is masked and large
+    payloads are summarized rather than printed."""
+    print("Sending request: {} {}".format(method, base_url))
+    print("Headers: {}".format(redact_headers(headers)))
+    if payload is not None:
+      body = str(payload)
+      if len(body) > 500:
+        body = '{}... ({} characters)'.format(body[:500], len(body))
+      print("Body: {}".format(body))
+
+  def set_json_codec(self, name_or_codec):
+    """Use the named codec ('json' or 'orjson') for this instance only."""
+    self.json_codec = make_codec(name_or_codec)
 
   def make_post_request(self, base_url: str, payload: dict, headers: dict, verbose=False):
-    response = requests.post(base_url, json=payload, headers=headers)
     if verbose == True:
-      print("Sending request:")
-      print(response.request.body)
-      print(response.request.headers)
+      self._print_request('POST', base_url, headers, payload)
+    response = self._request('POST', base_url, headers, payload)
+    with self._phase('parse'):
+      success = response.success
 
-    if response.json()['meta']['httpStatus'] != '200 - OK':
+    if not success:
       if verbose == True:
         print('\nError response:')
         print(response.json())
@@ -49,13 +373,13 @@ class QualtricsAPI:
       return((True, response))
 
   def make_put_request(self, base_url: str, payload: dict, headers: dict, verbose=False):
-    response = requests.put(base_url, json=payload, headers=headers)
     if verbose == True:
-      print("Sending request:")
-      print(response.request.body)
-      print(response.request.headers)
+      self._print_request('PUT', base_url, headers, payload)
+    response = self._request('PUT', base_url, headers, payload)
+    with self._phase('parse'):
+      success = response.success
 
-    if response.json()['meta']['httpStatus'] == '200 - OK':
+    if success:
       return(True)
     else:
       if verbose == True:
@@ -63,18 +387,16 @@ class QualtricsAPI:
         print(response.json())
       return(False)
 
-  def make_get_request(self, base_url: str, headers: dict, verbose=False):
-
-    response = requests.get(base_url, headers=headers)
+  def make_get_request(self, base_url: str, headers: dict, verbose=False, page=None):
     if verbose == True:
-      print("Sending request:")
-      print("URL: {}".format(base_url))
-      print("Body: {}".format(response.request.body))
-      print("Headers: {}".format(response.request.headers))
+      self._print_request('GET', base_url, headers)
+    response = self._request('GET', base_url, headers, page=page)
+    with self._phase('parse'):
+      success = response.success
 
     if verbose == True:
       print("Response : {}".format(response))
-    if response.json()['meta']['httpStatus'] == '200 - OK':
+    if success:
       if verbose == True:
         print("\n\nSuccess:")
         print(response.json())
@@ -85,12 +407,12 @@ class QualtricsAPI:
       return((False, response))
 
   def make_delete_request(self, base_url: str, headers: dict, verbose=False):
-    response = requests.delete(base_url, headers=headers)
     if verbose == True:
-      print("Sending request:")
-      print(response.request.body)
-      print(response.request.headers)
-    if response.json()['meta']['httpStatus'] == '200 - OK':
+      self._print_request('DELETE', base_url, headers)
+    response = self._request('DELETE', base_url, headers)
+    with self._phase('parse'):
+      success = response.success
+    if success:
       return(True)
     else:
       if verbose == True:
@@ -98,7 +420,7 @@ class QualtricsAPI:
         print(response.json())
       return(False)
 
-  def _prep_mailing_list_data(self, df:pd.DataFrame, unsubscribed=False,
+  def _prep_mailing_list_data(self, df: 'pd.DataFrame', unsubscribed=False,
                               language='en'):
     """Convert pandas dataframe to JSON normalized so the API will accept the
     records as mailing list contacts."""
@@ -137,21 +459,27 @@ class QualtricsAPI:
     return(retval)
 
 
-  def list_surveys(self, return_df=True, verbose=False):
-    base_url = "https://{0}.qualtrics.com/API/v3/surveys".format(self.config.data_center)
+  def list_surveys(self, return_df=True, verbose=False, as_records=False):
+    """Return all surveys as a DataFrame, a list of dicts (return_df=False)
+    or, without touching pandas, a Records table (as_records=True)."""
+    base_url = "{0}/surveys".format(self.config.base_url)
     headers = {"x-api-token": self.config.api_token}
     all_success = True
     surveys = []
+    page = 0
     while base_url is not None:
-      (success, response) = self.make_get_request(base_url, headers, verbose)
-      base_url = response.json()['result']['nextPage']
-      surveys += response.json()['result']['elements']
+      page += 1
+      (success, response) = self.make_get_request(base_url, headers, verbose, page)
+      base_url = response.next_page
+      surveys += response.elements
       if success == False:
         all_success = False
     if all_success == True:
       if verbose:
         print('Surveys retrieved')
-      if return_df:
+      if as_records:
+        retval = Records(surveys)
+      elif return_df:
         retval = pd.DataFrame.from_dict(surveys)
       else:
         retval = surveys
@@ -163,26 +491,27 @@ class QualtricsAPI:
 
   def find_survey_id(self, search_str, verbose=False):
     """Search the survey names for the given string and return ID."""
-    df = self.list_surveys(return_df=True)
-    df_filtered = df.loc[df['name'].str.contains(search_str), ]
-    if df_filtered.shape[0] == 1:
+    found = self.list_surveys(as_records=True).where(
+      lambda r: r.name is not None and re.search(search_str, r.name) is not None)
+    if found.shape[0] == 1:
       if verbose:
         print("The survey for which you seek is found.")
-      return(df_filtered['id'].values[0])
-    elif df_filtered.shape[0] > 1:
-      raise ValueError('Your search returned multiple surveys:\n {}'.format(df_filtered))
-    elif df_filtered.shape[0] == 0:
+      return(found['id'][0])
+    elif found.shape[0] > 1:
+      raise ValueError('Your search returned multiple surveys:\n {}'
+                       .format(list(zip(found['id'], found['name']))))
+    elif found.shape[0] == 0:
       raise ValueError('No surveys matched your search string.')
     else:
       raise ValueError("Something went wrong.")
 
   def get_survey(self, survey_id, verbose=False):
-    base_url = "https://{0}.qualtrics.com/API/v3/surveys/{1}".format(self.config.data_center,
-                                                                     survey_id)
+    base_url = "{0}/surveys/{1}".format(self.config.base_url,
+                                        survey_id)
     headers = {"x-api-token": self.config.api_token}
     (success, response) = self.make_get_request(base_url, headers, verbose)
     if success == True:
-      survey = response.json()["result"]
+      survey = response.result
       if verbose:
         print('\nRetrieved survey: {}'.format(survey))
       return(survey)
@@ -194,7 +523,7 @@ class QualtricsAPI:
   def copy_survey(self, survey_id: str, new_name: str, owner=None, verbose=False):
     if owner == None:
       owner = self.config.default_survey_owner
-    base_url = "https://{0}.qualtrics.com/API/v3/surveys".format(self.config.data_center)
+    base_url = "{0}/surveys".format(self.config.base_url)
     headers = {"CONTENT-TYPE": "application/json",
                "X-API-TOKEN": self.config.api_token,
                "X-COPY-SOURCE": survey_id,
@@ -203,7 +532,7 @@ class QualtricsAPI:
     payload = {"projectName": new_name}
     (success, response) = self.make_post_request(base_url, payload, headers, verbose)
     if success == True:
-      new_survey_id = response.json()["result"]["id"]
+      new_survey_id = response.result["id"]
       if verbose:
         print('\nNew survey id is: {}'.format(new_survey_id))
       return(new_survey_id)
@@ -211,18 +540,21 @@ class QualtricsAPI:
       return()
 
   def delete_survey(self, survey_id: str, verbose=False):
-    base_url = "https://{0}.qualtrics.com/API/v3/surveys/{1}".format(self.config.data_center, survey_id)
+    base_url = "{0}/surveys/{1}".format(self.config.base_url, survey_id)
     headers = {"X-API-TOKEN": self.config.api_token}
     success = self.make_delete_request(base_url, headers, verbose)
     if success == True and verbose == True:
       print('Survey successfully deleted')
     return(success)
 
-  def activate_survey(self, survey_id: str,
-                      start_date=datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"),
-                      end_date=(datetime.utcnow() + timedelta(days=130)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+  def activate_survey(self, survey_id: str, start_date=None, end_date=None,
                       verbose=False):
-    base_url = "https://{0}.qualtrics.com/API/v3/surveys/{1}".format(self.config.data_center, survey_id)
+    """Activate a survey. start_date defaults to now and end_date to 130 days
+    from now (evaluated per call); either may be a string, datetime or a
+    timedelta from now."""
+    start_date = _api_time(start_date)
+    end_date = _api_time(end_date, timedelta(days=130))
+    base_url = "{0}/surveys/{1}".format(self.config.base_url, survey_id)
     headers = {"CONTENT-TYPE": "application/json",
                "X-API-TOKEN": self.config.api_token}
     payload = {"isActive": True,
@@ -234,21 +566,27 @@ class QualtricsAPI:
       print('Survey successfully activated')
     return(success)
 
-  def list_mailing_lists(self, return_df=True, verbose=False):
-    base_url = "https://{0}.qualtrics.com/API/v3/mailinglists".format(self.config.data_center)
+  def list_mailing_lists(self, return_df=True, verbose=False, as_records=False):
+    """Return all mailing lists as a DataFrame, a list of dicts (return_df=False)
+    or, without touching pandas, a Records table (as_records=True)."""
+    base_url = "{0}/mailinglists".format(self.config.base_url)
     headers = {"x-api-token": self.config.api_token}
     all_success = True
     mlists = []
+    page = 0
     while base_url is not None:
-      (success, response) = self.make_get_request(base_url, headers, verbose)
-      base_url = response.json()['result']['nextPage']
-      mlists += response.json()['result']['elements']
+      page += 1
+      (success, response) = self.make_get_request(base_url, headers, verbose, page)
+      base_url = response.next_page
+      mlists += response.elements
       if success == False:
         all_success = False
     if all_success == True:
       if verbose:
         print('Mailing lists successfully retrieved.')
-      if return_df:
+      if as_records:
+        retval = Records(mlists)
+      elif return_df:
         retval = pd.DataFrame.from_dict(mlists)
       else:
         retval = mlists
@@ -260,15 +598,16 @@ class QualtricsAPI:
 
   def find_mailing_list_id(self, search_str, verbose=False):
     """Search the mailing list names for the given string and return ID."""
-    df = self.list_mailing_lists(return_df=True)
-    df_filtered = df.loc[df['name'].str.contains(search_str), ]
-    if df_filtered.shape[0] == 1:
+    found = self.list_mailing_lists(as_records=True).where(
+      lambda r: r.name is not None and re.search(search_str, r.name) is not None)
+    if found.shape[0] == 1:
       if verbose:
         print("The mailing list for which you seek is found.")
-      return(df_filtered['id'].values[0])
-    elif df_filtered.shape[0] > 1:
-      raise ValueError('Your search returned multiple mailing lists:\n {}'.format(df_filtered))
-    elif df_filtered.shape[0] == 0:
+      return(found['id'][0])
+    elif found.shape[0] > 1:
+      raise ValueError('Your search returned multiple mailing lists:\n {}'
+                       .format(list(zip(found['id'], found['name']))))
+    elif found.shape[0] == 0:
       raise ValueError('No mailing lists matched your search string.')
     else:
       raise ValueError("Something went wrong.")
@@ -282,13 +621,13 @@ class QualtricsAPI:
       payload["libraryId"] = owner
     if list_category != None:
       payload['category'] = list_category
-    base_url = ("https://{0}.qualtrics.com/API/v3/mailinglists"
-                .format(self.config.data_center))
+    base_url = ("{0}/mailinglists"
+                .format(self.config.base_url))
     headers = {"CONTENT-TYPE": "application/json",
                "X-API-TOKEN": self.config.api_token}
     (success, response) = self.make_post_request(base_url, payload, headers, verbose)
     if success == True:
-      new_ml_id = response.json()["result"]["id"]
+      new_ml_id = response.result["id"]
       if verbose == True:
         print('\nNew mailing list id is: {}'.format(new_ml_id))
       if (hasattr(records_to_add, 'shape') and
@@ -303,20 +642,20 @@ class QualtricsAPI:
     else:
       return()
 
-  def get_mailing_list(self, ml_id, return_df=True, verbose=False):
-    base_url = "https://{0}.qualtrics.com/API/v3/mailinglists/{1}".format(self.config.data_center,
-                                                                          ml_id)
+  def get_mailing_list(self, ml_id, return_df=True, verbose=False,
+                       as_records=False):
+    base_url = "{0}/mailinglists/{1}".format(self.config.base_url,
+                                             ml_id)
     headers = {"x-api-token": self.config.api_token}
     (success, response) = self.make_get_request(base_url, headers, verbose)
     if success == True:
-      if return_df:
-        try:
-          ml = pd.DataFrame.from_dict(response.json()["result"])
-        except:
-          resp = {k: [v,] for k, v in response.json()["result"].items()}
-          ml = pd.DataFrame.from_dict(resp)
+      if as_records:
+        ml = Records([response.result])
+      elif return_df:
+        # The result is a single mailing list, i.e. one row.
+        ml = pd.DataFrame([response.result])
       else:
-        ml = response.json()["result"]
+        ml = response.result
       if verbose:
         print('Retrieved mailing list: {}'.format(ml))
       return(ml)
@@ -325,26 +664,31 @@ class QualtricsAPI:
         print(response.json())
       return()
 
-  def get_contacts(self, ml_id, return_df=True, verbose=False):
-    url = ("https://{0}.qualtrics.com/API/v3/mailinglists/{1}/contacts"
-           .format(self.config.data_center, ml_id))
+  def get_contacts(self, ml_id, return_df=True, verbose=False, as_records=False):
+    url = ("{0}/mailinglists/{1}/contacts"
+           .format(self.config.base_url, ml_id))
     headers = {"x-api-token": self.config.api_token}
-    (success, response) = self.make_get_request(url, headers, verbose)
     all_success = True
     contacts = []
+    page = 0
     while url is not None:
-      (success, response) = self.make_get_request(url, headers, verbose)
+      page += 1
+      (success, response) = self.make_get_request(url, headers, verbose, page)
       if success == False:
         all_success = False
         url = None
       else:
-        url = response.json()['result']['nextPage']
-        contacts += response.json()['result']['elements']
+        url = response.next_page
+        contacts += response.elements
     if all_success == True:
-      if return_df:
+      if as_records:
+        contacts = Records(contacts)
+      elif return_df:
         contacts = pd.DataFrame.from_dict(contacts)
       if verbose:
-        if return_df:
+        if as_records:
+          print('Retrieved contacts: {}'.format(contacts))
+        elif return_df:
           if contacts.shape[0] > 25:
             print('Retrieved contacts: {}'.format(contacts.loc[:25, ]))
           else:
@@ -360,7 +704,33 @@ class QualtricsAPI:
         print(response.json())
       return()
 
-  def update_mailing_list(self, ml_id, records_to_add: pd.DataFrame,
+  def attach_contact_mirror(self, mirror):
+    """Keep a ContactMirror in step with this instance's successful contact
+    and mailing list changes."""
+    self.contact_mirror = mirror
+
+  def refresh_contact_mirror(self, mirror, ml_id, force=False, verbose=False):
+    """Bring ml_id up to date in mirror. The contacts are only re-read when
+    the mailing list's lastModifiedDate has changed since the last refresh
+    (or force is True). Returns the mirror's added/updated/removed counts."""
+    ml = self.get_mailing_list(ml_id, return_df=False, verbose=verbose)
+    if ml == ():
+      return()
+    last_modified = ml.get('lastModifiedDate')
+    if (not force and ml_id in mirror and last_modified is not None and
+        mirror.last_modified(ml_id) == str(last_modified)):
+      if verbose:
+        print('Mirror of {} is up to date.'.format(ml_id))
+      return({'added': 0, 'updated': 0, 'removed': 0})
+    contacts = self.get_contacts(ml_id, return_df=False, verbose=verbose)
+    if contacts == ():
+      return()
+    counts = mirror.replace_list(ml_id, contacts, last_modified)
+    if verbose:
+      print('Refreshed mirror of {}: {}'.format(ml_id, counts))
+    return(counts)
+
+  def update_mailing_list(self, ml_id, records_to_add: 'pd.DataFrame',
                           create=False, update=False, delete=False,
                           verbose=False):
     raise NotImplementedError("The update_mailing_list method is not fully implemented.")
@@ -377,63 +747,110 @@ class QualtricsAPI:
     return()
 
   def delete_mailing_list(self, list_id, verbose=False):
-    base_url = ("https://{0}.qualtrics.com/API/v3/mailinglists/{1}"
-                .format(self.config.data_center, list_id))
+    base_url = ("{0}/mailinglists/{1}"
+                .format(self.config.base_url, list_id))
     headers = {"X-API-TOKEN": self.config.api_token}
     success = self.make_delete_request(base_url, headers, verbose)
-    if success == True and verbose == True:
-      print('Mailing list successfully deleted')
+    if success == True:
+      if self.contact_mirror is not None:
+        self.contact_mirror.drop_list(list_id)
+      if verbose == True:
+        print('Mailing list successfully deleted')
     return(success)
 
   def delete_contact(self, list_id, contact_id, verbose=False):
-    base_url = ("https://{0}.qualtrics.com/API/v3/mailinglists/{1}/contacts/{2}"
-                .format(self.config.data_center, list_id, contact_id))
+    base_url = ("{0}/mailinglists/{1}/contacts/{2}"
+                .format(self.config.base_url, list_id, contact_id))
     headers = {"X-API-TOKEN": self.config.api_token}
     success = self.make_delete_request(base_url, headers, verbose)
-    if success == True and verbose == True:
-      print('Contact successfully deleted.')
+    if success == True:
+      if self.contact_mirror is not None:
+        self.contact_mirror.apply_delete(list_id, contact_id)
+      if verbose == True:
+        print('Contact successfully deleted.')
     return(success)
 
   def create_contact(self, list_id, json_rec, verbose=False):
     headers = {"CONTENT-TYPE": "application/json",
                "X-API-TOKEN": self.config.api_token}
-    base_url = ("https://{}.qualtrics.com/API/v3/mailinglists/{}/contacts"
-                .format(self.config.data_center, list_id))
+    base_url = ("{}/mailinglists/{}/contacts"
+                .format(self.config.base_url, list_id))
     (success, response) = self.make_post_request(base_url, json_rec, headers,
                                                  verbose)
     if success == True:
-      contact_id = response.json()["result"]["id"]
+      contact_id = response.result["id"]
+      if self.contact_mirror is not None:
+        self.contact_mirror.apply_create(list_id, contact_id, json_rec)
       if verbose:
         print('New contact id is: {}'.format(contact_id))
       return(contact_id)
     else:
       return()
 
-  def create_contacts_bulk(self, list_id, df: pd.DataFrame, verbose=False,
+  def create_contacts_bulk(self, list_id, df: 'pd.DataFrame', verbose=False,
                            **kwargs):
     headers = {"CONTENT-TYPE": "application/json",
                "X-API-TOKEN": self.config.api_token}
-    url = ("https://{}.qualtrics.com/API/v3/mailinglists/{}/contactimports"
-           .format(self.config.data_center, list_id))
-    lstdct = self._prep_mailing_list_data(df, **kwargs)
+    url = ("{}/mailinglists/{}/contactimports"
+           .format(self.config.base_url, list_id))
+    with self._phase('build'):
+      lstdct = self._prep_mailing_list_data(df, **kwargs)
     json_rec = {"contacts": lstdct}
     (success, response) = self.make_post_request(url, json_rec, headers,
                                                  verbose)
     if success == True:
-      progress_id = response.json()["result"]["id"]
+      progress_id = response.result["id"]
+      # The import runs asynchronously, so the mirror can't be updated yet.
+      if self.contact_mirror is not None:
+        self.contact_mirror.invalidate(list_id)
       if verbose:
         print('New progress id is: {}'.format(progress_id))
       return(progress_id)
     else:
       return()
 
+  def get_contact_import(self, list_id, import_id, verbose=False):
+    """Return the status of a contact import started by create_contacts_bulk:
+    a dict with 'status', 'percentComplete' and the 'contacts' counts."""
+    url = ("{}/mailinglists/{}/contactimports/{}"
+           .format(self.config.base_url, list_id, import_id))
+    headers = {"X-API-TOKEN": self.config.api_token}
+    (success, response) = self.make_get_request(url, headers, verbose)
+    if success == True:
+      return(response.result)
+    else:
+      return()
+
+  def wait_for_contact_import(self, list_id, import_id, poll_interval=1.0,
+                              timeout=600, verbose=False):
+    """Poll a contact import until it completes, so its contacts are in the
+    list. Returns the final status dict, or () if the import failed, its
+    status couldn't be read or timeout seconds passed."""
+    deadline = time.monotonic() + timeout
+    while True:
+      progress = self.get_contact_import(list_id, import_id, verbose)
+      if progress == () or progress.get('status') == 'failed':
+        return(())
+      if progress.get('status') == 'complete':
+        if self.contact_mirror is not None:
+          self.contact_mirror.invalidate(list_id)
+        return(progress)
+      if time.monotonic() + poll_interval > deadline:
+        if verbose:
+          print('Timed out waiting for contact import {}'.format(import_id))
+        return(())
+      with self._phase('wait'):
+        time.sleep(poll_interval)
+
   def update_contact(self, list_id, contact_id, json_rec, verbose=False):
     headers = {"CONTENT-TYPE": "application/json",
                "X-API-TOKEN": self.config.api_token}
-    base_url = ("https://{0}.qualtrics.com/API/v3/mailinglists/{1}/contacts/{2}"
-                .format(self.config.data_center, list_id, contact_id))
+    base_url = ("{0}/mailinglists/{1}/contacts/{2}"
+                .format(self.config.base_url, list_id, contact_id))
     success = self.make_put_request(base_url, json_rec, headers, verbose)
     if success == True:
+      if self.contact_mirror is not None:
+        self.contact_mirror.apply_update(list_id, contact_id, json_rec)
       if verbose:
         print('Contact updated successfully.')
       return(0)
@@ -441,56 +858,140 @@ class QualtricsAPI:
       return()
 
   def add_records_to_mailing_list(self, list_id: str,
-                                  records_to_add: pd.DataFrame, verbose=False,
-                                  **kwargs):
-    base_url = ("https://{0}.qualtrics.com/API/v3/mailinglists/{1}/contacts"
-                .format(self.config.data_center, list_id))
+                                  records_to_add: 'pd.DataFrame', verbose=False,
+                                  checkpoint=None, key_column=None, **kwargs):
+    """Add contacts to a mailing list one request at a time. With checkpoint
+    (a journal file path), each added contact is logged and skipped if the
+    call is repeated, so an interrupted import can be rerun without creating
+    duplicates. Contacts are identified by key_column ('email' or
+    'externalReference') or, by default, by their full record. Returns one
+    row per contact: its fields plus 'id' (None if it wasn't added) and
+    'error'."""
+    base_url = ("{0}/mailinglists/{1}/contacts"
+                .format(self.config.base_url, list_id))
     headers = {"CONTENT-TYPE": "application/json",
                "X-API-TOKEN": self.config.api_token}
-    reclst = self._prep_mailing_list_data(records_to_add, **kwargs)
-    for p in reclst:
+    with self._phase('build'):
+      reclst = self._prep_mailing_list_data(records_to_add, **kwargs)
+
+    def add(p):
       (success, response) = self.make_post_request(base_url, p, headers, verbose)
       if success == True:
+        if self.contact_mirror is not None:
+          self.contact_mirror.apply_create(list_id, response.result["id"], p)
         if verbose == True:
           print('Successfully added {} to mailing list.'.format(p['email']))
+        return(response.result["id"])
       else:
         if verbose == True:
           print('Failed to add {} to mailing list.'.format(p['email']))
-    return()
+        return(())
+
+    prefix = 'POST mailinglists/{}/contacts'.format(list_id)
+    return(self._run_bulk(reclst, add, 'id', max_workers=1,
+                          requests_per_second=None, verbose=False,
+                          checkpoint=checkpoint,
+                          key=lambda p: _idempotency_key(prefix, p, key_column)))
+
+  def get_distribution(self, distribution_id, survey_id, verbose=False):
+    """Return the distribution's details (including 'stats') as a dict."""
+    url = '{0}/distributions/{1}?surveyId={2}'.format(self.config.base_url,
+                                                      distribution_id,
+                                                      survey_id)
+    headers = {"X-API-TOKEN": self.config.api_token}
+    (success, response) = self.make_get_request(url, headers, verbose)
+    if success == True:
+      return(response.result)
+    else:
+      return()
 
-  def list_links_for_distribution(self, distribution_id, survey_id, verbose=False):
+  def wait_for_links(self, distribution_id, survey_id, expected=None,
+                     poll_interval=1.0, max_interval=15.0, settle=3,
+                     timeout=600, verbose=False):
+    """Poll a link distribution until its links have been generated and
+    return the number generated. Generation is taken to be complete once the
+    distribution's stats reach expected (when given) or report the same
+    non-zero count settle times in a row; a count of 0 means generation hasn't
+    started yet, so without expected an empty distribution is only given up
+    on at the timeout. The wait between polls starts at poll_interval and
+    grows by half each time up to max_interval. After timeout seconds the
+    latest count is returned as is; None is returned if the distribution
+    can't be read."""
+    deadline = time.monotonic() + timeout
+    interval = poll_interval
+    last, seen = None, 0
+    while True:
+      dist = self.get_distribution(distribution_id, survey_id, verbose)
+      if dist == ():
+        return(None)
+      stats = dist.get('stats') or {}
+      count = sum(stats.get(k) or 0 for k in ('sent', 'failed', 'skipped'))
+      seen = seen + 1 if count == last else 1
+      last = count
+      if expected is not None and count >= expected:
+        break
+      if count > 0 and seen >= settle:
+        break
+      if time.monotonic() + interval > deadline:
+        if verbose:
+          print('Timed out waiting for links for {}'.format(distribution_id))
+        break
+      with self._phase('wait'):
+        time.sleep(interval)
+      interval = min(max_interval, interval * 1.5)
+    if verbose:
+      print('{} links generated for {}'.format(count, distribution_id))
+    return(count)
+
+  def stream_links_for_distribution(self, distribution_id, survey_id, on_page,
+                                    verbose=False):
+    """Page through a distribution's links, calling on_page(links) with the
+    list of link dicts from each page as it arrives. Returns the number of
+    links, or None if a request failed."""
+    return(self.stream_pages('distributions/{0}/links?surveyId={1}'
+                             .format(distribution_id, survey_id),
+                             on_page, verbose))
+
+  def stream_pages(self, path, on_page, verbose=False):
+    """Page through any listing endpoint, e.g. 'surveys', 'users' or
+    'mailinglists/<id>/contacts', calling on_page(elements) with each page's
+    list of dicts as it arrives, so listings of any size can be processed in
+    bounded memory. Returns the number of elements, or None if a request
+    failed."""
     headers = {"X-API-TOKEN": self.config.api_token}
-    url = 'https://{0}.qualtrics.com/API/v3/distributions/{1}/links?surveyId={2}'.format(self.config.data_center,
-                                                                                         distribution_id,
-                                                                                         survey_id)
-    all_success = True
-    links = []
+    url = '{0}/{1}'.format(self.config.base_url, path)
+    count = 0
+    page = 0
     while url is not None:
-      (success, response) = self.make_get_request(url, headers, verbose)
-
+      page += 1
+      (success, response) = self.make_get_request(url, headers, verbose, page)
       if success == False:
-        all_success = False
-        url = None
-      else:
-        url = response.json()['result']['nextPage']
-        links += response.json()['result']['elements']
-
+        return(None)
+      url = response.next_page
+      elements = response.elements
+      count += len(elements)
+      on_page(elements)
+    return(count)
 
-    if all_success == True:
-      if verbose:
-        print('Links retrieved')
-    else:
-      if verbose:
-        print(response.json())
+  def list_links_for_distribution(self, distribution_id, survey_id, verbose=False):
+    links = []
+    count = self.stream_links_for_distribution(distribution_id, survey_id,
+                                               links.extend, verbose)
+    if count is None:
       return(None)
-
+    if verbose:
+      print('Links retrieved')
     links_df = pd.DataFrame(links)
     return(links_df)
 
-  def get_links_for_mailing_list(self, survey_id: str, mailing_list_id: str, days_to_expiry=130,
-                                 description="Survey distribution", link_type='Individual',
-                                 verbose=False):
-    base_url = "https://{0}.qualtrics.com/API/v3/distributions".format(self.config.data_center)
+  def create_link_distribution(self, survey_id: str, mailing_list_id: str,
+                               days_to_expiry=130,
+                               description="Survey distribution",
+                               link_type='Individual', verbose=False):
+    """Ask Qualtrics to generate survey links for every contact in a mailing
+    list. Returns the new distribution id; links are generated in the
+    background (see wait_for_links)."""
+    base_url = "{0}/distributions".format(self.config.base_url)
     headers = {"CONTENT-TYPE": "application/json", "X-API-TOKEN": self.config.api_token}
     expire_date = datetime.now() + timedelta(days=days_to_expiry)
     link_expiration = expire_date.strftime("%Y-%m-%d %H:%M:%S")
@@ -503,15 +1004,91 @@ class QualtricsAPI:
 
     (success, response) = self.make_post_request(base_url, payload, headers, verbose)
     if success == True:
-      distribution_id = response.json()["result"]["id"]
+      distribution_id = response.result["id"]
       if verbose == True:
         print('\nNew distribution id is: {}'.format(distribution_id))
-
+      return(distribution_id)
     else:
       return()
 
+  def _expected_links(self, mailing_list_id):
+    if self.contact_mirror is not None and mailing_list_id in self.contact_mirror:
+      return(len(self.contact_mirror.contacts(mailing_list_id)))
+    return(None)
+
+  def get_links_for_mailing_list(self, survey_id: str, mailing_list_id: str, days_to_expiry=130,
+                                 description="Survey distribution", link_type='Individual',
+                                 wait=True, poll_interval=1.0, timeout=600,
+                                 verbose=False):
+    """Create a link distribution and return its links as a DataFrame. With
+    wait=True the links are listed only once generation has finished; an
+    attached contact mirror supplies the expected number of links."""
+    distribution_id = self.create_link_distribution(survey_id, mailing_list_id,
+                                                    days_to_expiry, description,
+                                                    link_type, verbose)
+    if distribution_id == ():
+      return()
+    if wait:
+      self.wait_for_links(distribution_id, survey_id,
+                          self._expected_links(mailing_list_id),
+                          poll_interval=poll_interval, timeout=timeout,
+                          verbose=verbose)
     return(self.list_links_for_distribution(distribution_id, survey_id, verbose))
 
+  def generate_links(self, pairs, sink, max_workers=4, requests_per_second=None,
+                     days_to_expiry=130, description="Survey distribution",
+                     link_type='Individual', poll_interval=1.0, timeout=600,
+                     return_df=True, verbose=False):
+    """Generate personalized links for many (survey, mailing list) pairs at
+    once. pairs is a DataFrame, Records or iterable of dicts with survey_id
+    and mailing_list_id columns (and optionally days_to_expiry, description
+    and link_type, overriding the keyword arguments). Each pair's
+    distribution is created, waited on and paged through by one of
+    max_workers threads, and every page of links is passed to sink as it
+    arrives, with survey_id, mailing_list_id and distribution_id added to
+    each link. sink may be a CSV file path, a list to extend or a callable
+    taking a list of link dicts (called from one thread at a time).
+    Returns the input rows with 'distribution_id', 'links' and 'error'
+    columns."""
+    rows = _table_rows(pairs)
+    write, close = _link_sink(sink)
+    defaults = {'days_to_expiry': days_to_expiry, 'description': description,
+                'link_type': link_type}
+
+    def generate(row):
+      args = dict(defaults)
+      args.update((k, v) for k, v in row.items() if k in defaults and v is not None)
+      survey_id, ml_id = row['survey_id'], row['mailing_list_id']
+      distribution_id = self.create_link_distribution(survey_id, ml_id,
+                                                      verbose=verbose, **args)
+      if distribution_id == ():
+        return()
+      self.wait_for_links(distribution_id, survey_id, self._expected_links(ml_id),
+                          poll_interval=poll_interval, timeout=timeout,
+                          verbose=verbose)
+      pair = {'survey_id': survey_id, 'mailing_list_id': ml_id,
+              'distribution_id': distribution_id}
+
+      def on_page(links):
+        write([dict(pair, **link) for link in links])
+        row['links'] += len(links)
+
+      count = self.stream_links_for_distribution(distribution_id, survey_id,
+                                                 on_page, verbose)
+      if count is None:
+        raise RuntimeError('Listing links for {} failed after {} links'
+                           .format(distribution_id, row['links']))
+      return(distribution_id)
+
+    for row in rows:
+      row['links'] = 0
+    try:
+      results = self._run_bulk(rows, generate, 'distribution_id', max_workers,
+                               requests_per_second, verbose)
+    finally:
+      close()
+    return(self._bulk_result(results, return_df))
+
   def create_library_message(self, description, messages: dict,
                              category='invite', owner=None, verbose=False):
     """Create a message to be stored in owner's library. Parameter 'messages' is
@@ -527,11 +1104,11 @@ class QualtricsAPI:
     p['messages'] = messages
     p['category'] = category
     headers = {"CONTENT-TYPE": "application/json", "X-API-TOKEN": self.config.api_token}
-    base_url = ("https://{}.qualtrics.com/API/v3/libraries/{}/messages"
-                .format(self.config.data_center, lib_id))
+    base_url = ("{}/libraries/{}/messages"
+                .format(self.config.base_url, lib_id))
     (success, response) = self.make_post_request(base_url, p, headers, verbose)
     if success == True:
-      msg_id = response.json()["result"]["id"]
+      msg_id = response.result["id"]
       if verbose:
         print('\nNew message id is: {}'.format(msg_id))
       return(msg_id)
@@ -548,11 +1125,16 @@ class QualtricsAPI:
                   message_library_id=None,
                   reply_to_email=None,
                   link_type='Individual',
-                  send_time=datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"),
-                  expiration_time=(datetime.utcnow() + timedelta(days=130)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+                  send_time=None,
+                  expiration_time=None,
                   verbose=False):
+    """Send a survey to a mailing list. send_time defaults to now and
+    expiration_time to 130 days from now, evaluated per call; either may be
+    a string, datetime or a timedelta from now."""
+    send_time = _api_time(send_time)
+    expiration_time = _api_time(expiration_time, timedelta(days=130))
     headers = {"CONTENT-TYPE": "application/json", "X-API-TOKEN": self.config.api_token}
-    base_url = """https://{}.qualtrics.com/API/v3/distributions""".format(self.config.data_center)
+    base_url = """{}/distributions""".format(self.config.base_url)
 
     if reply_to_email == None:
       reply_to_email = from_email
@@ -567,7 +1149,7 @@ class QualtricsAPI:
 
     (success, response) = self.make_post_request(base_url, p, headers, verbose)
     if success == True:
-      dist_id = response.json()["result"]["id"]
+      dist_id = response.result["id"]
       if verbose:
         print('\nNew distribution id is: {}'.format(dist_id))
       return(dist_id)
@@ -582,11 +1164,14 @@ class QualtricsAPI:
                     subject,
                     message_library_id=None,
                     reply_to_email=None,
-                    send_time=datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"),
+                    send_time=None,
                     verbose=False):
+    """Send a reminder for a distribution. send_time defaults to now,
+    evaluated per call, and may be a string, datetime or a timedelta."""
+    send_time = _api_time(send_time)
     headers = {"CONTENT-TYPE": "application/json", "X-API-TOKEN": self.config.api_token}
-    base_url = """https://{}.qualtrics.com/API/v3/distributions/{}/reminders""".format(self.config.data_center,
-                                                                                       parent_distribution_id)
+    base_url = """{}/distributions/{}/reminders""".format(self.config.base_url,
+                                                          parent_distribution_id)
     if reply_to_email == None:
       reply_to_email = from_email
     if message_library_id == None:
@@ -598,13 +1183,226 @@ class QualtricsAPI:
 
     (success, response) = self.make_post_request(base_url, p, headers, verbose)
     if success == True:
-      dist_id = response.json()["result"]["distributionId"]
+      dist_id = response.result["distributionId"]
       if verbose:
         print('\nNew distribution id is: {}'.format(dist_id))
       return(dist_id)
     else:
       return()
 
+  def _run_bulk(self, rows, fn, id_column, max_workers, requests_per_second,
+                verbose, checkpoint=None, key=None):
+    """Call fn(row) for each row concurrently and return result rows: the
+    input row plus id_column (fn's return value, or None when it returned
+    () or raised) and 'error'. With a checkpoint (a journal path or
+    Journal), each success is recorded under key(row) and rows already
+    recorded are answered from the journal without calling fn."""
+    journal, owned = open_journal(checkpoint)
+    limiter = None
+    if requests_per_second is not None:
+      limiter = RateLimiter(requests_per_second)
+    outcomes = [None] * len(rows)
+    pending = []
+    for i, row in enumerate(rows):
+      if journal is not None and key(row) in journal:
+        outcomes[i] = (journal.get(key(row)), None)
+      else:
+        pending.append(i)
+
+    def on_result(i, result, exc):
+      if exc is not None:
+        outcomes[i] = (None, '{}: {}'.format(type(exc).__name__, exc))
+      elif result == () or result is None or result is False:
+        outcomes[i] = (None, 'request failed')
+      else:
+        outcomes[i] = (result, None)
+        if journal is not None:
+          journal.record(key(rows[i]), result)
+
+    try:
+      run_concurrently(lambda i: fn(rows[i]), pending, max_workers, limiter,
+                       on_result)
+    finally:
+      if owned:
+        journal.close()
+    retval = []
+    for row, (result, error) in zip(rows, outcomes):
+      out = dict(row)
+      out[id_column], out['error'] = result, error
+      retval.append(out)
+    if verbose:
+      failed = sum(1 for r in retval if r['error'] is not None)
+      print('{} of {} succeeded.'.format(len(retval) - failed, len(retval)))
+    return(retval)
+
+  def _bulk_result(self, rows, return_df):
+    if return_df:
+      return(pd.DataFrame(rows))
+    return(rows)
+
+  def send_surveys_bulk(self, distributions, max_workers=8,
+                        requests_per_second=None, return_df=True,
+                        checkpoint=None, key_column=None, verbose=False,
+                        **defaults):
+    """Create an email distribution for each row of distributions (a
+    DataFrame, Records or iterable of dicts). Columns use send_survey's
+    parameter names (survey_id, message_id, mailing_list_id, from_email,
+    from_name, subject and optionally message_library_id, reply_to_email,
+    link_type, send_time, expiration_time); keyword arguments fill in columns
+    that are missing or empty, e.g. send_time=timedelta(hours=1). Schedules
+    are computed as each distribution is created. Distributions are created
+    by up to max_workers threads, at most requests_per_second per second.
+    With checkpoint (a journal file path), created distributions are logged
+    and a rerun returns their ids instead of sending again; rows are
+    identified by key_column or, by default, by their contents.
+    Returns the input rows with 'distribution_id' and 'error' columns."""
+    rows = _table_rows(distributions)
+
+    def send(row):
+      args = dict((k, v) for k, v in defaults.items() if k in _SEND_SURVEY_FIELDS)
+      args.update((k, v) for k, v in row.items()
+                  if k in _SEND_SURVEY_FIELDS and v is not None)
+      return self.send_survey(**args)
+
+    results = self._run_bulk(rows, send, 'distribution_id', max_workers,
+                             requests_per_second, verbose, checkpoint,
+                             key=lambda row: _idempotency_key('POST distributions',
+                                                              dict(defaults, **row),
+                                                              key_column))
+    return(self._bulk_result(results, return_df))
+
+  def send_reminders_bulk(self, reminders, max_workers=8,
+                          requests_per_second=None, return_df=True,
+                          checkpoint=None, key_column=None, verbose=False,
+                          **defaults):
+    """Schedule a reminder for each row of reminders. Rows need a
+    parent_distribution_id; a 'distribution_id' column is used instead when
+    it is absent, so the result of send_surveys_bulk can be passed directly.
+    Other columns and keyword arguments are as for send_reminder. Rows with
+    no parent distribution are reported as errors without a request.
+    checkpoint and key_column are as for send_surveys_bulk.
+    Returns the input rows with 'reminder_id' and 'error' columns."""
+    rows = _table_rows(reminders)
+
+    def remind(row):
+      args = dict((k, v) for k, v in defaults.items() if k in _SEND_REMINDER_FIELDS)
+      args.update((k, v) for k, v in row.items()
+                  if k in _SEND_REMINDER_FIELDS and v is not None)
+      if args.get('parent_distribution_id') is None:
+        args['parent_distribution_id'] = row.get('distribution_id')
+      if args['parent_distribution_id'] is None:
+        raise ValueError('no parent distribution')
+      return self.send_reminder(**args)
+
+    for row in rows:
+      row.pop('error', None)
+    results = self._run_bulk(rows, remind, 'reminder_id', max_workers,
+                             requests_per_second, verbose, checkpoint,
+                             key=lambda row: _idempotency_key('POST reminders',
+                                                              dict(defaults, **row),
+                                                              key_column))
+    return(self._bulk_result(results, return_df))
+
+  def _delete_outcome(self, url, verbose=False):
+    """DELETE url and return 'deleted', or 'not found' for a 404 (the object
+    is gone either way). Other failures raise RuntimeError."""
+    headers = {"X-API-TOKEN": self.config.api_token}
+    if verbose == True:
+      self._print_request('DELETE', url, headers)
+    response = self._request('DELETE', url, headers)
+    if response.success:
+      return('deleted')
+    if response.status_code == 404:
+      return('not found')
+    raise RuntimeError(response.http_status or 'HTTP {}'.format(response.status_code))
+
+  def _delete_bulk(self, ids, path_for, on_deleted, max_workers,
+                   requests_per_second, checkpoint, return_df, verbose):
+    rows = [{'id': i} for i in ids]
+
+    def delete(row):
+      url = "{0}/{1}".format(self.config.base_url, path_for(row['id']))
+      outcome = self._delete_outcome(url, verbose)
+      if on_deleted is not None:
+        on_deleted(row['id'])
+      return(outcome)
+
+    results = self._run_bulk(rows, delete, 'outcome', max_workers,
+                             requests_per_second, verbose, checkpoint,
+                             key=lambda row: 'DELETE ' + path_for(row['id']))
+    return(self._bulk_result(results, return_df))
+
+  def _select_ids(self, ids, listing, where, predicate):
+    if ids is not None:
+      return(_table_ids(ids))
+    if not where and predicate is None:
+      raise ValueError('Pass ids, or a where/predicate filter selecting what to delete.')
+    records = listing()
+    if records == ():
+      raise RuntimeError('Listing failed; nothing was deleted.')
+    if len(records) == 0:
+      return([])
+    return(records.where(predicate, **(where or {})).column('id'))
+
+  def delete_surveys_bulk(self, survey_ids=None, where=None, predicate=None,
+                          max_workers=8, requests_per_second=None,
+                          checkpoint=None, return_df=True, verbose=False):
+    """Delete many surveys concurrently. survey_ids may be an id, an iterable
+    of ids or a table with an 'id' column; alternatively pass where (a dict
+    of column values, e.g. {'isActive': False}) and/or predicate (called with
+    each row of list_surveys) to select surveys from the current listing.
+    With checkpoint (a journal file path), deletions are logged as they
+    complete and a rerun skips them. Surveys that are already gone count as
+    'not found' rather than errors. Returns a table of 'id', 'outcome' and
+    'error'."""
+    ids = self._select_ids(survey_ids, lambda: self.list_surveys(as_records=True),
+                           where, predicate)
+    return(self._delete_bulk(ids, lambda i: "surveys/{}".format(i), None,
+                             max_workers, requests_per_second, checkpoint,
+                             return_df, verbose))
+
+  def delete_mailing_lists_bulk(self, list_ids=None, where=None, predicate=None,
+                                max_workers=8, requests_per_second=None,
+                                checkpoint=None, return_df=True, verbose=False):
+    """Delete many mailing lists concurrently, e.g. every test list with
+    delete_mailing_lists_bulk(where={'category': 'Test'}). Arguments and
+    result are as for delete_surveys_bulk, filtering list_mailing_lists."""
+    ids = self._select_ids(list_ids,
+                           lambda: self.list_mailing_lists(as_records=True),
+                           where, predicate)
+
+    def on_deleted(list_id):
+      if self.contact_mirror is not None:
+        self.contact_mirror.drop_list(list_id)
+
+    return(self._delete_bulk(ids, lambda i: "mailinglists/{}".format(i),
+                             on_deleted, max_workers, requests_per_second,
+                             checkpoint, return_df, verbose))
+
+  def delete_contacts_bulk(self, list_id, contact_ids=None, where=None,
+                           predicate=None, max_workers=8,
+                           requests_per_second=None, checkpoint=None,
+                           return_df=True, verbose=False):
+    """Delete many contacts from a mailing list concurrently. Arguments and
+    result are as for delete_surveys_bulk; where and predicate filter the
+    list's contacts, read from the attached contact mirror when it holds
+    the list and from get_contacts otherwise."""
+    def listing():
+      if self.contact_mirror is not None and list_id in self.contact_mirror:
+        return(Records(self.contact_mirror.contacts(list_id)))
+      return(self.get_contacts(list_id, as_records=True))
+
+    ids = self._select_ids(contact_ids, listing, where, predicate)
+
+    def on_deleted(contact_id):
+      if self.contact_mirror is not None:
+        self.contact_mirror.apply_delete(list_id, contact_id)
+
+    return(self._delete_bulk(ids,
+                             lambda i: "mailinglists/{}/contacts/{}".format(list_id, i),
+                             on_deleted, max_workers, requests_per_second,
+                             checkpoint, return_df, verbose))
+
   def create_user(self,
                   username,
                   password,
@@ -616,8 +1414,8 @@ class QualtricsAPI:
                   account_expiration_date=None,
                   language='en',
                   verbose=False):
-    base_url = """https://{}.qualtrics.com/API/v3/users""".format(
-      self.config.data_center)
+    base_url = """{}/users""".format(
+      self.config.base_url)
     headers = {
     "x-api-token": self.config.api_token,
     "Content-Type": "application/json"
@@ -637,22 +1435,26 @@ class QualtricsAPI:
 
     (success, response) = self.make_post_request(base_url, data, headers, verbose)
     if success == True:
-      user_id = response.json()["result"]["id"]
+      user_id = response.result["id"]
       if verbose:
         print('\nNew user id is: {}'.format(user_id))
       return(user_id)
     else:
       return()
 
-  def list_users(self, return_df=True, verbose=False):
-    base_url = "https://{0}.qualtrics.com/API/v3/users".format(self.config.data_center)
+  def list_users(self, return_df=True, verbose=False, as_records=False):
+    """Return all users as a DataFrame, a list of dicts (return_df=False)
+    or, without touching pandas, a Records table (as_records=True)."""
+    base_url = "{0}/users".format(self.config.base_url)
     headers = {"x-api-token": self.config.api_token}
     all_success = True
     users = []
+    page = 0
     while base_url is not None:
-      (success, response) = self.make_get_request(base_url, headers, verbose)
-      base_url = response.json()['result']['nextPage']
-      users += response.json()['result']['elements']
+      page += 1
+      (success, response) = self.make_get_request(base_url, headers, verbose, page)
+      base_url = response.next_page
+      users += response.elements
       if success == False:
         all_success = False
 
@@ -660,7 +1462,9 @@ class QualtricsAPI:
     if all_success == True:
       if verbose:
         print('Users retrieved')
-      if return_df:
+      if as_records:
+        retval = Records(users)
+      elif return_df:
         retval = pd.DataFrame.from_dict(users)
       else:
         retval = users
@@ -671,12 +1475,12 @@ class QualtricsAPI:
       return()
 
   def get_user(self, user_id, verbose=False):
-    base_url = "https://{0}.qualtrics.com/API/v3/users/{1}".format(self.config.data_center,
-                                                                  user_id)
+    base_url = "{0}/users/{1}".format(self.config.base_url,
+                                      user_id)
     headers = {"x-api-token": self.config.api_token}
     (success, response) = self.make_get_request(base_url, headers, verbose)
     if success == True:
-      user = response.json()["result"]
+      user = response.result
       if verbose:
         print('\nRetrieved user: {}'.format(user))
       return(user)
@@ -693,13 +1497,15 @@ class QualtricsAPI:
                   user_type=None,
                   division_id=None,
                   status=None,
-                  language='en',
+                  language=None,
                   time_zone=None,
                   permissions=None,
                   account_expiration_date=None,
-                  verbose=False):
-    base_url = "https://{0}.qualtrics.com/API/v3/users/{1}".format(self.config.data_center,
-                                                                  user_id)
+                  verbose=False,
+                  email=None):
+    """Update a user. Only the fields that are given are sent."""
+    base_url = "{0}/users/{1}".format(self.config.base_url,
+                                      user_id)
     headers = {"x-api-token": self.config.api_token}
     data = {}
     if username != None:
@@ -722,6 +1528,8 @@ class QualtricsAPI:
       data['permissions'] = permissions
     if account_expiration_date != None:
       data['accountExpirationDate'] = account_expiration_date
+    if email != None:
+      data['email'] = email
     success = self.make_put_request(base_url, data, headers, verbose)
 
     if verbose == True:
@@ -732,6 +1540,70 @@ class QualtricsAPI:
 
     return(success)
 
+  def sync_users(self, users, match_on='username', current=None,
+                 create_missing=True, max_workers=8, requests_per_second=None,
+                 return_df=True, verbose=False):
+    """Bring accounts in line with users, a DataFrame, Records or iterable of
+    dicts with one row per desired user. Columns use update_user's parameter
+    names (username, email, first_name, last_name, user_type, division_id,
+    status, language, time_zone, permissions, account_expiration_date);
+    empty values leave a field as it is. Rows are matched to existing
+    accounts on match_on ('username' or 'email') using current, a
+    list_users snapshot, or a fresh listing. Each existing user is sent a
+    PUT containing only the fields that differ; fields list_users doesn't
+    report (such as language) are sent whenever given. Unmatched rows are
+    created with create_user when create_missing is true, which needs
+    password, first_name, last_name, user_type and email columns.
+    Returns the input rows (less any password) with 'user_id', 'action'
+    ('created', 'updated' or 'unchanged'), 'changed' (the fields sent) and
+    'error' columns."""
+    if current is None:
+      current = self.list_users(as_records=True)
+      if current == ():
+        raise RuntimeError('Listing users failed; no changes were made.')
+    existing = dict((u.get(_USER_FIELDS[match_on]), u) for u in _table_rows(current))
+    rows = _table_rows(users)
+    for row in rows:
+      user = existing.get(row.get(match_on))
+      if user is None:
+        row['action'] = 'create' if create_missing else None
+        row['changed'] = None
+        continue
+      changes = dict((k, v) for k, v in row.items()
+                     if k in _USER_FIELDS and v is not None
+                     and user.get(_USER_FIELDS[k]) != v)
+      row['action'] = 'update' if changes else 'unchanged'
+      row['changed'] = ', '.join(sorted(changes)) or None
+      row['user_id'] = user['id']
+      row['_changes'] = changes
+
+    def apply(row):
+      if row['action'] is None:
+        raise ValueError('no user with {} {!r}'.format(match_on, row.get(match_on)))
+      if row['action'] == 'create':
+        args = dict((k, v) for k, v in row.items()
+                    if k in _CREATE_USER_FIELDS and v is not None)
+        missing = [k for k in _CREATE_USER_FIELDS[:6] if k not in args]
+        if missing:
+          raise ValueError('cannot create user without {}'.format(', '.join(missing)))
+        return(self.create_user(verbose=verbose, **args))
+      if self.update_user(row['user_id'], verbose=verbose, **row['_changes']):
+        return(row['user_id'])
+      return(())
+
+    todo = [row for row in rows if row['action'] != 'unchanged']
+    done = iter(self._run_bulk(todo, apply, 'user_id', max_workers,
+                               requests_per_second, verbose))
+    past = {'create': 'created', 'update': 'updated', 'unchanged': 'unchanged'}
+    results = []
+    for row in rows:
+      out = next(done) if row['action'] != 'unchanged' else dict(row, error=None)
+      out.pop('_changes', None)
+      out.pop('password', None)
+      out['action'] = past[out['action']] if out['error'] is None else None
+      results.append(out)
+    return(self._bulk_result(results, return_df))
+
   def create_response_export(self,
                              survey_id,
                              file_format='csv',
@@ -751,8 +1623,8 @@ class QualtricsAPI:
                              compress=None,
                              breakout_sets=None,
                              verbose=False):
-    base_url = 'https://{}.qualtrics.com/API/v3/surveys/{}/export-responses'.format(self.config.data_center,
-                                                                                    survey_id)
+    base_url = '{}/surveys/{}/export-responses'.format(self.config.base_url,
+                                                       survey_id)
     headers = {"x-api-token": self.config.api_token}
     data = {"format": file_format}
     for var, varname in [
@@ -775,7 +1647,7 @@ class QualtricsAPI:
         data[varname] = var
     (success, response) = self.make_post_request(base_url, data, headers, verbose)
     if success == True:
-      progress_id = response.json()["result"]["progressId"]
+      progress_id = response.result["progressId"]
       if verbose:
         print('\nProgress id is: {}'.format(progress_id))
       return(progress_id)
@@ -785,16 +1657,17 @@ class QualtricsAPI:
       return()
 
   def get_response_export_progress(self, survey_id, export_progress_id, verbose=False):
-    base_url = 'https://{}.qualtrics.com/API/v3/surveys/{}/export-responses/{}'.format(self.config.data_center,
-                                                                                       survey_id,
-                                                                                       export_progress_id)
+    base_url = '{}/surveys/{}/export-responses/{}'.format(self.config.base_url,
+                                                          survey_id,
+                                                          export_progress_id)
     headers = {"x-api-token": self.config.api_token}
     (success, response) = self.make_get_request(base_url, headers, verbose)
     if success == True:
-      percent_complete = response.json()["result"]["percentComplete"]
-      status = response.json()["result"]["status"]
+      result = response.result
+      percent_complete = result["percentComplete"]
+      status = result["status"]
       if status == 'complete':
-        file_id = response.json()["result"]["fileId"]
+        file_id = result["fileId"]
       else:
         file_id = None
       if verbose:
@@ -805,20 +1678,36 @@ class QualtricsAPI:
         print('Failed to retrieve export progress')
       return()
 
+  def _wait_for_export(self, survey_id, progress_id, poll_interval, verbose=False):
+    """Poll a response export until it completes and return its file id.
+    Raises RuntimeError if the export fails or its progress can't be read."""
+    while True:
+      progress = self.get_response_export_progress(survey_id, progress_id, verbose)
+      if progress == () or progress[0] == 'failed':
+        raise RuntimeError('Export {} did not complete'.format(progress_id))
+      status, file_id = progress
+      if status == 'complete':
+        return(file_id)
+      with self._phase('wait'):
+        time.sleep(poll_interval)
+
   def get_response_export_file_as_dataframe(self, survey_id, file_id,
                                             format='csv', verbose=False):
-    base_url = 'https://{}.qualtrics.com/API/v3/surveys/{}/export-responses/{}/file'.format(self.config.data_center,
-                                                                                       survey_id,
-                                                                                       file_id)
+    base_url = '{}/surveys/{}/export-responses/{}/file'.format(self.config.base_url,
+                                                               survey_id,
+                                                               file_id)
     headers = {"x-api-token": self.config.api_token}
-    download = requests.request("GET", base_url, headers=headers, stream=True)
+    with self._phase('download'):
+      download = self._request('GET', base_url, headers)
     try:
       zfobj = zipfile.ZipFile(io.BytesIO(download.content))
       for name in zfobj.namelist():
-        uncompressed = zfobj.read(name)
+        with self._phase('decompress'):
+          uncompressed = zfobj.read(name)
         if format=='csv':
-          df = pd.read_csv(io.StringIO(uncompressed.decode('utf-8')),
-                           skiprows=[1, 2])
+          with self._phase('parse'):
+            df = pd.read_csv(io.StringIO(uncompressed.decode('utf-8')),
+                             skiprows=[1, 2])
         else:
           raise Exception('The value of format is invalid.')
       return(df)
@@ -829,12 +1718,10 @@ class QualtricsAPI:
 
   def get_response_as_dataframe(self, poll_interval, **kwargs):
     xpt_id = self.create_response_export(**kwargs)
-    status = 'incomplete'
-    while status != 'complete':
-        time.sleep(poll_interval)
-        status, file_id = self.get_response_export_progress(kwargs['survey_id'],
-                                                            xpt_id)
+    if xpt_id == ():
+      return()
     try:
+      file_id = self._wait_for_export(kwargs['survey_id'], xpt_id, poll_interval)
       df = self.get_response_export_file_as_dataframe(kwargs['survey_id'],
                                                       file_id)
       return(df)
@@ -845,15 +1732,17 @@ class QualtricsAPI:
 
   def get_response_export_file_as_string(self, survey_id, file_id,
                                             format='xml', verbose=False):
-    base_url = 'https://{}.qualtrics.com/API/v3/surveys/{}/export-responses/{}/file'.format(self.config.data_center,
-                                                                                       survey_id,
-                                                                                       file_id)
+    base_url = '{}/surveys/{}/export-responses/{}/file'.format(self.config.base_url,
+                                                               survey_id,
+                                                               file_id)
     headers = {"x-api-token": self.config.api_token}
-    download = requests.request("GET", base_url, headers=headers, stream=True)
+    with self._phase('download'):
+      download = self._request('GET', base_url, headers)
     try:
       zfobj = zipfile.ZipFile(io.BytesIO(download.content))
       for name in zfobj.namelist():
-        uncompressed = zfobj.read(name)
+        with self._phase('decompress'):
+          uncompressed = zfobj.read(name)
         if format=='xml':
           df = uncompressed.decode('utf-8')
         else:
@@ -866,12 +1755,10 @@ class QualtricsAPI:
 
   def get_response_as_string(self, poll_interval, **kwargs):
     xpt_id = self.create_response_export(file_format='xml',**kwargs)
-    status = 'incomplete'
-    while status != 'complete':
-        time.sleep(poll_interval)
-        status, file_id = self.get_response_export_progress(kwargs['survey_id'],
-                                                            xpt_id)
+    if xpt_id == ():
+      return()
     try:
+      file_id = self._wait_for_export(kwargs['survey_id'], xpt_id, poll_interval)
       xml = self.get_response_export_file_as_string(kwargs['survey_id'], file_id)
       return(xml)
     except Exception as e:
@@ -879,14 +1766,139 @@ class QualtricsAPI:
         print(e)
       return()
 
+  def get_response(self, survey_id, response_id, verbose=False):
+    """Return one response as a dict with 'responseId', 'values' (keyed by
+    question id) and 'labels'."""
+    base_url = "{0}/surveys/{1}/responses/{2}".format(self.config.base_url,
+                                                      survey_id, response_id)
+    headers = {"x-api-token": self.config.api_token}
+    (success, response) = self.make_get_request(base_url, headers, verbose)
+    if success == True:
+      return(response.result)
+    else:
+      return()
+
+  def create_event_subscription(self, topics, publication_url, encrypt=False,
+                                verbose=False):
+    """Ask Qualtrics to POST events to publication_url. topics is e.g.
+    'surveyengine.completedResponse.SV_123'. Returns the subscription id."""
+    base_url = "{0}/eventsubscriptions".format(self.config.base_url)
+    headers = {"CONTENT-TYPE": "application/json",
+               "X-API-TOKEN": self.config.api_token}
+    payload = {"topics": topics,
+               "publicationUrl": publication_url,
+               "encrypt": encrypt}
+    (success, response) = self.make_post_request(base_url, payload, headers, verbose)
+    if success == True:
+      subscription_id = response.result["id"]
+      if verbose:
+        print('\nNew event subscription id is: {}'.format(subscription_id))
+      return(subscription_id)
+    else:
+      return()
+
+  def delete_event_subscription(self, subscription_id, verbose=False):
+    base_url = "{0}/eventsubscriptions/{1}".format(self.config.base_url,
+                                                   subscription_id)
+    headers = {"X-API-TOKEN": self.config.api_token}
+    success = self.make_delete_request(base_url, headers, verbose)
+    if success == True and verbose == True:
+      print('Event subscription successfully deleted')
+    return(success)
+
+  def load_responses_to_store(self, store, survey_id, poll_interval=5,
+                              full_refresh=False, verbose=False, **kwargs):
+    """Export responses for survey_id and upsert them into a ResponseStore.
+    The first load creates the survey's table from its questions; later loads
+    only export responses recorded since the last one unless full_refresh is
+    True. Remaining keyword arguments are passed to create_response_export.
+    Returns the store's insert/update counts, or () if the export failed."""
+    meta = store.get_meta(survey_id)
+    if meta is None:
+      questions = self.list_questions(survey_id, verbose)
+      if questions == ():
+        return()
+      meta = store.create_survey_table(survey_id, questions)
+    # RecordedDate is compared as a string, so keep every export in UTC.
+    kwargs.setdefault('time_zone', 'UTC')
+    if not full_refresh and meta['last_recorded_date'] and 'start_date' not in kwargs:
+      kwargs['start_date'] = (datetime.strptime(meta['last_recorded_date'][:19],
+                                                "%Y-%m-%d %H:%M:%S")
+                              .strftime("%Y-%m-%dT%H:%M:%SZ"))
+    progress_id = self.create_response_export(survey_id, verbose=verbose, **kwargs)
+    if progress_id == ():
+      return()
+    try:
+      file_id = self._wait_for_export(survey_id, progress_id, poll_interval, verbose)
+    except RuntimeError as e:
+      if verbose:
+        print(e)
+      return()
+    df = self.get_response_export_file_as_dataframe(survey_id, file_id,
+                                                    verbose=verbose)
+    if not hasattr(df, 'shape'):
+      return()
+    counts = store.upsert(survey_id, df)
+    if verbose:
+      print('Loaded responses for {}: {}'.format(survey_id, counts))
+    return(counts)
+
+  def export_responses_bulk(self, survey_ids, output_dir, file_format='csv',
+                            poll_interval=1.0, max_workers=4,
+                            requests_per_second=None, checkpoint=None,
+                            return_df=True, verbose=False, **kwargs):
+    """Export responses for many surveys concurrently, writing each survey's
+    file to output_dir as <survey id>.<file_format>. survey_ids may be an
+    iterable of ids or a table with an 'id' column (e.g. from list_surveys).
+    Remaining keyword arguments are passed to create_response_export. With
+    checkpoint (a journal file path), finished surveys are logged and
+    skipped when the job is rerun. Export archives are streamed to a
+    temporary file in output_dir and unzipped from there, so no file is
+    held in memory whole. Returns a table of 'id', 'path' and 'error'."""
+    os.makedirs(output_dir, exist_ok=True)
+    rows = [{'id': i} for i in _table_ids(survey_ids)]
+    headers = {"x-api-token": self.config.api_token}
+
+    def export(row):
+      survey_id = row['id']
+      progress_id = self.create_response_export(survey_id, file_format=file_format,
+                                                verbose=verbose, **kwargs)
+      if progress_id == ():
+        return(())
+      file_id = self._wait_for_export(survey_id, progress_id, poll_interval, verbose)
+      url = '{}/surveys/{}/export-responses/{}/file'.format(self.config.base_url,
+                                                            survey_id, file_id)
+      path = os.path.join(output_dir, '{}.{}'.format(survey_id, file_format))
+      with tempfile.TemporaryFile(dir=output_dir) as archive:
+        with self._phase('download'):
+          download = self._request('GET', url, headers, stream_to=archive)
+        if download.status_code != 200:
+          raise RuntimeError('Downloading {} failed with HTTP {}'
+                             .format(file_id, download.status_code))
+        with self._phase('decompress'), zipfile.ZipFile(archive) as zfobj:
+          with open(path + '.part', 'wb') as f:
+            for name in zfobj.namelist():
+              with zfobj.open(name) as member:
+                shutil.copyfileobj(member, f)
+      os.replace(path + '.part', path)
+      return(path)
+
+    options = dict(kwargs, file_format=file_format,
+                   output_dir=os.path.abspath(output_dir))
+    results = self._run_bulk(
+      rows, export, 'path', max_workers, requests_per_second, verbose,
+      checkpoint, key=lambda row: _idempotency_key('export {}'.format(row['id']),
+                                                   options))
+    return(self._bulk_result(results, return_df))
+
 
   def list_questions(self, survey_id, verbose=False):
-    base_url = "https://{0}.qualtrics.com/API/v3/survey-definitions/{1}/questions".format(self.config.data_center,
-                                                                  survey_id)
+    base_url = "{0}/survey-definitions/{1}/questions".format(self.config.base_url,
+                                                             survey_id)
     headers = {"x-api-token": self.config.api_token}
     (success, response) = self.make_get_request(base_url, headers, verbose)
     if success == True:
-      questions = response.json()["result"]
+      questions = response.result
       if verbose:
         print('\nRetrieved questions: {}'.format(questions))
       return(questions)
@@ -0,0 +1,181 @@
+#! /usr/local/bin python3
+"""HTTP transports used by QualtricsAPI.
+
+A transport turns (method, url, headers, body) into a TransportResponse.
+RequestsTransport is the default; InMemoryTransport calls a Python handler
+such as py_qualtrics_api.testing.MockQualtrics.handle without any sockets;
+RecordingTransport and ReplayTransport capture a session to a JSON lines
+file and play it back at full speed."""
+import base64
+import json
+import threading
+import time
+from collections import deque
+
+from py_qualtrics_api.instrument import redact_body, redact_headers
+
+
+class TransportResponse:
+
+  __slots__ = ('status_code', 'headers', 'content')
+
+  def __init__(self, status_code, headers, content):
+    self.status_code = status_code
+    self.headers = headers if headers is not None else {}
+    self.content = content
+
+  def __repr__(self):
+    return '<TransportResponse [{}]>'.format(self.status_code)
+
+
+class Transport:
+  """Base class. Subclasses implement request()."""
+
+  def request(self, method, url, headers=None, body=None):
+    raise NotImplementedError
+
+  def download(self, method, url, fileobj, headers=None, body=None):
+    """Like request(), but a 200 response body is written to fileobj and
+    the returned content is empty. Other responses are returned whole.
+    This default reads the body into memory first; transports that can
+    stream override it."""
+    response = self.request(method, url, headers, body)
+    if response.status_code != 200:
+      return response
+    fileobj.write(response.content or b'')
+    return TransportResponse(response.status_code, response.headers, b'')
+
+  def close(self):
+    pass
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *exc):
+    self.close()
+
+
+class RequestsTransport(Transport):
+  """Send requests with a shared requests.Session so connections are pooled
+  and reused (including across threads)."""
+
+  def __init__(self, pool_connections=10, pool_maxsize=32, timeout=None):
+    import requests
+    from requests.adapters import HTTPAdapter
+    self.timeout = timeout
+    self.session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_connections,
+                          pool_maxsize=pool_maxsize)
+    self.session.mount('https://', adapter)
+    self.session.mount('http://', adapter)
+
+  def request(self, method, url, headers=None, body=None):
+    response = self.session.request(method, url, headers=headers, data=body,
+                                    timeout=self.timeout)
+    return TransportResponse(response.status_code, response.headers,
+                             response.content)
+
+  def download(self, method, url, fileobj, headers=None, body=None,
+               chunk_size=1 << 20):
+    with self.session.request(method, url, headers=headers, data=body,
+                              timeout=self.timeout, stream=True) as response:
+      if response.status_code != 200:
+        return TransportResponse(response.status_code, response.headers,
+                                 response.content)
+      for chunk in response.iter_content(chunk_size):
+        fileobj.write(chunk)
+      return TransportResponse(response.status_code, response.headers, b'')
+
+  def close(self):
+    self.session.close()
+
+
+class InMemoryTransport(Transport):
+  """Pass each request to handler(method, url, headers, body), which returns
+  (status code, headers dict, body bytes)."""
+
+  def __init__(self, handler):
+    self.handler = handler
+
+  def request(self, method, url, headers=None, body=None):
+    status, resp_headers, content = self.handler(method, url, headers, body)
+    return TransportResponse(status, resp_headers, content)
+
+
+def _encode_content(content):
+  try:
+    return {'text': content.decode('utf-8')}
+  except UnicodeDecodeError:
+    return {'base64': base64.b64encode(content).decode('ascii')}
+
+
+def _decode_content(rec):
+  if 'text' in rec:
+    return rec['text'].encode('utf-8')
+  return base64.b64decode(rec['base64'])
+
+
+class RecordingTransport(Transport):
+  """Forward requests to another transport and append every exchange to a
+  JSON lines file. API tokens and passwords in request bodies are masked;
+  everything else, including contact details in responses, is kept."""
+
+  def __init__(self, inner, path):
+    self.inner = inner
+    self.path = path
+    self._lock = threading.Lock()
+    self._file = open(path, 'a', encoding='utf-8')
+
+  def request(self, method, url, headers=None, body=None):
+    t0 = time.perf_counter()
+    response = self.inner.request(method, url, headers, body)
+    rec = {'method': method, 'url': url,
+           'request_headers': redact_headers(headers),
+           'status': response.status_code,
+           'headers': dict(response.headers),
+           'elapsed': time.perf_counter() - t0}
+    if body is not None:
+      body = redact_body(body)
+      rec['request_body'] = _encode_content(body if isinstance(body, bytes)
+                                            else body.encode('utf-8'))
+    rec['content'] = _encode_content(response.content or b'')
+    line = json.dumps(rec) + '\n'
+    with self._lock:
+      self._file.write(line)
+      self._file.flush()
+    return response
+
+  def close(self):
+    self._file.close()
+    self.inner.close()
+
+
+class ReplayTransport(Transport):
+  """Answer requests from a file written by RecordingTransport. Exchanges are
+  matched on method and URL and replayed in recorded order; with
+  realtime=True each reply is delayed by its recorded elapsed time."""
+
+  def __init__(self, path, realtime=False):
+    self.realtime = realtime
+    self._lock = threading.Lock()
+    self._queues = {}
+    with open(path, encoding='utf-8') as f:
+      for line in f:
+        if not line.strip():
+          continue
+        rec = json.loads(line)
+        self._queues.setdefault((rec['method'], rec['url']), deque()).append(rec)
+
+  def remaining(self):
+    """Return the number of recorded exchanges not yet replayed."""
+    return sum(len(q) for q in self._queues.values())
+
+  def request(self, method, url, headers=None, body=None):
+    with self._lock:
+      queue = self._queues.get((method, url))
+      if not queue:
+        raise LookupError('No recorded response for {} {}'.format(method, url))
+      rec = queue.popleft()
+    if self.realtime:
+      time.sleep(rec.get('elapsed', 0))
+    return TransportResponse(rec['status'], rec['headers'], _decode_content(rec['content']))
@@ -1,6 +1,7 @@
 from setuptools import setup
 from codecs import open
 from os import path
+import re
 
 here = path.abspath(path.dirname(__file__))
 
@@ -8,9 +9,13 @@ here = path.abspath(path.dirname(__file__))
 with open(path.join(here, 'README.rst'), encoding='utf-8') as f:
     long_description = f.read()
 
+# Read the version without importing the package (and its dependencies)
+with open(path.join(here, 'py_qualtrics_api', '_version.py'), encoding='utf-8') as f:
+    version = re.search(r"^__version__ = '([^']+)'", f.read(), re.M).group(1)
+
 setup(
     name='py_qualtrics_api',
-    version='0.3.2',
+    version=version,
     description='Library for facilitating survey administration with Qualtrics. Requires Qualtrics API.',
     long_description=long_description,
     url='https://github.com/blueogive/py_qualtrics_api',
@@ -32,5 +37,7 @@ setup(
     keywords='python qualtrics api survey_administration',
     packages=['py_qualtrics_api'],
     install_requires=['requests', 'PyYAML', 'pandas'],
+    extras_require={'fast': ['orjson'], 'parquet': ['pyarrow']},
+    entry_points={'console_scripts': ['py-qualtrics=py_qualtrics_api.cli:main']},
     data_files=[('config', ['config_sample.yml'])]
 )
@@ -1,6 +1,9 @@
 #!/usr/bin/env python
 
+import pandas as pd
 import pytest
+import py_qualtrics_api as pqa
+from py_qualtrics_api.testing import MockQualtrics
 
 def pytest_addoption(parser):
     parser.addoption(
@@ -17,3 +20,40 @@ def survey_id(request):
 @pytest.fixture
 def ml_id(request):
     return request.config.getoption("--ml_id")
+
+@pytest.fixture
+def offline_api():
+    return pqa.QualtricsAPI({'api_token': 'x' * 40, 'data_center': 'co1',
+                             'default_survey_owner': 'UR_1',
+                             'default_library_owner': 'UR_1'})
+
+@pytest.fixture
+def mock_args():
+    """MockQualtrics arguments; override this fixture in a test module."""
+    return {}
+
+@pytest.fixture
+def mock_populate():
+    """MockQualtrics.populate arguments; override this fixture in a test module."""
+    return {'surveys': 1}
+
+@pytest.fixture
+def mock_app(mock_args, mock_populate):
+    app = MockQualtrics(**mock_args)
+    app.populate(**mock_populate)
+    return app
+
+@pytest.fixture
+def mock_api(offline_api, mock_app):
+    offline_api.transport = pqa.InMemoryTransport(mock_app.handle)
+    offline_api.retry_backoff = 0
+    return offline_api
+
+@pytest.fixture
+def mail_list_recs():
+    em = ['joe.sample@example.com', 'sally.smith@somewhere.net']
+    fn = ['Joe', 'Sally']
+    ln = ['Sample', 'Smith']
+    xref = ['123-45-6789', '987-65-4321']
+    return pd.DataFrame.from_dict({'email': em, 'firstName': fn,
+                                   'lastName': ln, 'externalReference': xref})
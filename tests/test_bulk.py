@@ -0,0 +1,190 @@
+#!/usr/bin/env python
+
+from datetime import datetime, timedelta
+import time
+import pandas as pd
+import pytest
+import py_qualtrics_api as pqa
+from py_qualtrics_api.concurrency import RateLimiter, run_concurrently
+
+
+@pytest.fixture
+def mock_args():
+    return {'page_size': 2}
+
+@pytest.fixture
+def mock_populate():
+    return {'surveys': 2, 'mailing_lists': 3, 'contacts_per_list': 2}
+
+def test_run_concurrently_keeps_order_and_captures_errors():
+    def fn(x):
+        if x == 3:
+            raise ValueError('bad')
+        return x * 2
+    results = run_concurrently(fn, range(6), max_workers=4)
+    assert [r[1] for r in results] == [0, 2, 4, None, 8, 10]
+    assert isinstance(results[3][2], ValueError)
+
+def test_rate_limiter():
+    limiter = RateLimiter(50, burst=1)
+    t0 = time.monotonic()
+    for _ in range(6):
+        limiter.acquire()
+    assert time.monotonic() - t0 >= 0.09
+
+def test_send_surveys_bulk(mock_api, mock_app):
+    sid = mock_app.survey_ids()[0]
+    rows = pd.DataFrame({'mailing_list_id': mock_app.mailing_list_ids() + ['ML_missing'],
+                         'site': ['a', 'b', 'c', 'd']})
+    results = mock_api.send_surveys_bulk(rows, survey_id=sid, message_id='MS_1',
+                                         from_email='a@b.c', from_name='A',
+                                         subject='Hi',
+                                         send_time=timedelta(hours=1),
+                                         max_workers=3, requests_per_second=100)
+    assert list(results['site']) == ['a', 'b', 'c', 'd']
+    assert results['distribution_id'][:3].str.startswith('EMD_').all()
+    assert results['error'][:3].isnull().all()
+    sent = [d for d in mock_app.distributions.values() if 'sendDate' in d]
+    assert len(sent) == 3
+    assert all(d['sendDate'] > datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")
+               for d in sent)
+
+    reminders = mock_api.send_reminders_bulk(results, message_id='MS_2',
+                                             from_email='a@b.c', from_name='A',
+                                             subject='Reminder', return_df=False)
+    assert [r['reminder_id'] is not None for r in reminders] == [True, True, True, False]
+    assert reminders[3]['error'].startswith('ValueError')
+
+def test_schedule_defaults_evaluated_per_call(mock_api, mock_app):
+    sid = mock_app.survey_ids()[0]
+    ml_id = mock_app.mailing_list_ids()[0]
+    did = mock_api.send_survey(sid, 'MS_1', ml_id, 'a@b.c', 'A', 'Hi')
+    sent = datetime.strptime(mock_app.distributions[did]['sendDate'],
+                             "%Y-%m-%dT%H:%M:%SZ")
+    assert abs((datetime.utcnow() - sent).total_seconds()) < 5
+
+def test_delete_mailing_lists_bulk_by_filter(mock_api, mock_app):
+    keep = mock_api.create_mailing_list('Keep', [], list_category='Production')
+    mirror = pqa.ContactMirror()
+    mock_api.attach_contact_mirror(mirror)
+    test_lists = mock_app.mailing_list_ids()[:3]
+    mock_api.refresh_contact_mirror(mirror, test_lists[0])
+    results = mock_api.delete_mailing_lists_bulk(where={'category': 'Test'},
+                                                 max_workers=2)
+    assert sorted(results['id']) == sorted(test_lists)
+    assert (results['outcome'] == 'deleted').all()
+    assert mock_app.mailing_list_ids() == [keep]
+    assert test_lists[0] not in mirror
+    with pytest.raises(ValueError):
+        mock_api.delete_mailing_lists_bulk()
+
+def test_delete_by_filter_on_missing_column(mock_api, mock_app):
+    surveys = mock_app.survey_ids()
+    results = mock_api.delete_surveys_bulk(where={'noSuchField': 'x'},
+                                           return_df=False)
+    assert results == []
+    assert mock_app.survey_ids() == surveys
+
+def test_delete_contacts_bulk_resumes(mock_api, mock_app, tmp_path):
+    ml_id = mock_app.mailing_list_ids()[0]
+    contacts = mock_api.get_contacts(ml_id)
+    checkpoint = str(tmp_path / 'cleanup.jsonl')
+    first = mock_api.delete_contacts_bulk(ml_id, contacts[:1], checkpoint=checkpoint)
+    assert list(first['outcome']) == ['deleted']
+
+    before = mock_app.request_count
+    results = mock_api.delete_contacts_bulk(ml_id, list(contacts['id']) + ['CID_gone'],
+                                            checkpoint=checkpoint, return_df=False)
+    assert [r['outcome'] for r in results] == ['deleted', 'deleted', 'not found']
+    assert mock_app.request_count - before == 2
+    assert mock_app.contacts[ml_id] == {}
+
+def test_delete_surveys_bulk_reports_errors(mock_api, mock_app):
+    sids = mock_app.survey_ids()
+    handle = mock_app.handle
+
+    def failing(method, url, headers=None, body=None):
+        if method == 'DELETE' and sids[0] in url:
+            return 500, {}, b'{"meta": {"httpStatus": "500 - Internal Server Error"}}'
+        return handle(method, url, headers, body)
+
+    mock_api.transport = pqa.InMemoryTransport(failing)
+    results = mock_api.delete_surveys_bulk(sids, return_df=False)
+    assert [r['outcome'] for r in results] == [None, 'deleted']
+    assert results[0]['error'] == 'RuntimeError: 500 - Internal Server Error'
+
+def test_sync_users(mock_api, mock_app):
+    mock_app.populate(users=3)
+    uids = list(mock_app.users)
+    desired = pd.DataFrame({
+        'username': ['user0', 'user1', 'user2', 'newbie', 'nopass'],
+        'first_name': ['First0', 'Renamed', None, 'New', 'No'],
+        'last_name': ['Last0', 'Last1', None, 'Person', 'Pass'],
+        'language': [None, None, 'fr', 'en', None],
+        'user_type': ['UT_BASIC'] * 5,
+        'email': ['user0@example.com', 'user1@example.com', None,
+                  'new@example.com', 'np@example.com'],
+        'password': [None, None, None, 's3cret!', None]})
+    before = mock_app.request_count
+    results = mock_api.sync_users(desired, return_df=False)
+    assert [r['action'] for r in results] == ['unchanged', 'updated', 'updated',
+                                              'created', None]
+    assert [r['changed'] for r in results][:3] == [None, 'first_name', 'language']
+    assert results[4]['error'].startswith('ValueError: cannot create user without password')
+    assert all('password' not in r for r in results)
+    # two pages of users, two updates and one create
+    assert mock_app.request_count - before == 5
+    assert mock_app.users[uids[1]]['firstName'] == 'Renamed'
+    assert mock_app.users[uids[2]]['language'] == 'fr'
+    assert mock_app.users[results[3]['user_id']]['email'] == 'new@example.com'
+
+def test_add_records_to_mailing_list_checkpoint(mock_api, mock_app, mail_list_recs,
+                                                tmp_path):
+    ml_id = mock_app.mailing_list_ids()[0]
+    checkpoint = str(tmp_path / 'adds.jsonl')
+    mock_api.add_records_to_mailing_list(ml_id, mail_list_recs[:1],
+                                         checkpoint=checkpoint, key_column='email')
+    assert len(mock_app.contacts[ml_id]) == 3
+    results = mock_api.add_records_to_mailing_list(ml_id, mail_list_recs,
+                                                   checkpoint=checkpoint,
+                                                   key_column='email')
+    assert len(mock_app.contacts[ml_id]) == 4
+    assert [r['email'] for r in results] == list(mail_list_recs['email'])
+    assert all(r['id'].startswith('MLRP_') and r['error'] is None for r in results)
+    assert len(pqa.Journal(checkpoint)) == 2
+
+def test_send_surveys_bulk_checkpoint(mock_api, mock_app, tmp_path):
+    sid = mock_app.survey_ids()[0]
+    rows = [{'mailing_list_id': ml} for ml in mock_app.mailing_list_ids()]
+    args = dict(survey_id=sid, message_id='MS_1', from_email='a@b.c',
+                from_name='A', subject='Hi', return_df=False,
+                checkpoint=str(tmp_path / 'send.jsonl'))
+    first = mock_api.send_surveys_bulk(rows[:2], **args)
+    second = mock_api.send_surveys_bulk(rows, **args)
+    assert [r['distribution_id'] for r in second[:2]] == \
+        [r['distribution_id'] for r in first]
+    assert len(mock_app.distributions) == 3
+
+def test_export_responses_bulk(mock_api, mock_app, tmp_path):
+    mock_app.populate(surveys=1, responses_per_survey=5)
+    sids = mock_app.survey_ids()
+    checkpoint = str(tmp_path / 'exports.jsonl')
+    results = mock_api.export_responses_bulk(sids + ['SV_missing'], str(tmp_path / 'out'),
+                                             poll_interval=0, checkpoint=checkpoint)
+    assert results['error'][:3].isnull().all()
+    assert results['error'][3] == 'request failed'
+    df = pd.read_csv(results['path'][2], skiprows=[1, 2])
+    assert df.shape[0] == 5
+
+    before = mock_app.request_count
+    again = mock_api.export_responses_bulk(sids, str(tmp_path / 'out'),
+                                           poll_interval=0, checkpoint=checkpoint)
+    assert list(again['path']) == list(results['path'][:3])
+    assert mock_app.request_count == before
+
+    # other options are a different job
+    other = mock_api.export_responses_bulk(sids, str(tmp_path / 'json'), 'json',
+                                           poll_interval=0, checkpoint=checkpoint)
+    assert other['error'].isnull().all()
+    assert all(p.endswith('.json') for p in other['path'])
+    assert mock_app.request_count > before
@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+
+import csv
+import json
+import os
+import pandas as pd
+import pytest
+from py_qualtrics_api.cli import main
+
+
+@pytest.fixture
+def mock_args():
+    return {'page_size': 3}
+
+@pytest.fixture
+def mock_populate():
+    return {'surveys': 3, 'responses_per_survey': 4, 'mailing_lists': 2,
+            'contacts_per_list': 5, 'users': 4}
+
+def run(api, *argv):
+    return main(list(argv) + ['--quiet'], api=api)
+
+def test_export_resumes_from_checkpoint(mock_api, mock_app, tmp_path):
+    out, journal = str(tmp_path / 'out'), str(tmp_path / 'export.jsonl')
+    assert run(mock_api, 'export', '--all', '-o', out, '--poll-interval', '0',
+               '--checkpoint', journal, '--report', str(tmp_path / 'r.csv')) == 0
+    assert sorted(os.listdir(out)) == sorted(s + '.csv' for s in mock_app.survey_ids())
+    with open(str(tmp_path / 'r.csv')) as f:
+        assert len(list(csv.DictReader(f))) == 3
+    before = mock_app.request_count
+    assert run(mock_api, 'export', *mock_app.survey_ids(), '-o', out,
+               '--checkpoint', journal) == 0
+    assert mock_app.request_count == before
+
+def test_export_to_parquet(mock_api, mock_app, tmp_path):
+    pytest.importorskip('pyarrow')
+    sid = mock_app.survey_ids()[0]
+    assert run(mock_api, 'export', sid, '-o', str(tmp_path), '--format', 'parquet',
+               '--poll-interval', '0', '--chunk-size', '3') == 0
+    df = pd.read_parquet(str(tmp_path / (sid + '.parquet')))
+    assert len(df) == 4
+    assert not os.path.exists(str(tmp_path / (sid + '.csv')))
+
+def test_export_failure_sets_exit_status(mock_api, tmp_path):
+    assert run(mock_api, 'export', 'SV_missing', '-o', str(tmp_path)) == 1
+
+def test_contacts_import_in_chunks(mock_api, mock_app, tmp_path):
+    ml_id = mock_app.mailing_list_ids()[0]
+    path, journal = str(tmp_path / 'c.csv'), str(tmp_path / 'import.jsonl')
+    pd.DataFrame({'email': ['n{}@x.org'.format(i) for i in range(7)],
+                  'firstName': 'N', 'unsubscribed': 'false'}).to_csv(path, index=False)
+    assert run(mock_api, 'contacts', 'import', ml_id, path, '--chunk-size', '3',
+               '--checkpoint', journal) == 0
+    assert len(mock_app.contacts[ml_id]) == 12
+    assert run(mock_api, 'contacts', 'import', ml_id, path, '--chunk-size', '3',
+               '--checkpoint', journal) == 0
+    assert len(mock_app.contacts[ml_id]) == 12
+
+def test_contacts_sync(mock_api, mock_app, tmp_path, capsys):
+    ml_id = mock_app.mailing_list_ids()[0]
+    path = str(tmp_path / 'c.csv')
+    pd.DataFrame({'email': ['person0@example.com', 'PERSON1@example.com', 'new@x.org'],
+                  'firstName': ['First0', 'Changed', 'New'],
+                  'lastName': ['Last0', 'Last1', 'Person']}).to_csv(path, index=False)
+    assert run(mock_api, 'contacts', 'sync', ml_id, path, '--delete-missing',
+               '--workers', '2') == 0
+    assert '1 created, 1 updated, 1 unchanged, 3 deleted' in capsys.readouterr().out
+    contacts = sorted(mock_app.contacts[ml_id].values(), key=lambda c: c['email'].lower())
+    assert [c['firstName'] for c in contacts] == ['New', 'First0', 'Changed']
+    assert contacts[1]['unsubscribed'] is False
+
+def test_dump(mock_api, mock_app, tmp_path):
+    users = str(tmp_path / 'users.csv')
+    assert run(mock_api, 'dump', 'users', '-o', users) == 0
+    assert len(pd.read_csv(users)) == 4
+    out = str(tmp_path / 'contacts')
+    assert run(mock_api, 'dump', 'contacts', '--all', '-o', out, '--format', 'jsonl') == 0
+    for ml_id in mock_app.mailing_list_ids():
+        with open(os.path.join(out, ml_id + '.jsonl')) as f:
+            assert len([json.loads(line) for line in f]) == 5
+
+def test_delete(mock_api, mock_app, tmp_path, capsys):
+    sids = mock_app.survey_ids()
+    assert run(mock_api, 'delete', 'surveys', '--where', 'name=Survey 1',
+               '--dry-run') == 0
+    assert capsys.readouterr().out.split() == [sids[1]]
+    assert run(mock_api, 'delete', 'surveys', sids[0]) == 1
+    assert len(mock_app.surveys) == 3
+    ids_file = str(tmp_path / 'ids.txt')
+    with open(ids_file, 'w') as f:
+        f.write('\n'.join(sids[:2]) + '\n')
+    assert run(mock_api, 'delete', 'surveys', '--ids-file', ids_file, '--yes',
+               '--chunk-size', '1') == 0
+    assert list(mock_app.surveys) == sids[2:]
+    ml_id = mock_app.mailing_list_ids()[1]
+    assert run(mock_api, 'delete', 'contacts', '--list', ml_id,
+               '--where', 'firstName=First2', '--yes') == 0
+    assert len(mock_app.contacts[ml_id]) == 4
+
+def test_usage_errors(mock_api, tmp_path):
+    with pytest.raises(SystemExit) as e:
+        main(['export', '--workers', '0'], api=mock_api)
+    assert e.value.code == 2
+    assert main(['dump', 'users', '--config', str(tmp_path / 'none.yml')]) == 1
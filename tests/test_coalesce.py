@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+
+import threading
+import time
+import pytest
+from py_qualtrics_api.coalesce import SingleFlight
+from py_qualtrics_api.concurrency import run_concurrently
+
+
+def test_single_flight_shares_calls_and_errors():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        release.wait()
+        return 'value'
+
+    threads = [threading.Thread(target=lambda: results.append(flight.do('k', slow)))
+               for _ in range(5)]
+    results = []
+    for t in threads:
+        t.start()
+    while flight.stats()['calls'] + flight.stats()['shared'] < 5:
+        time.sleep(0.001)
+    release.set()
+    for t in threads:
+        t.join()
+    assert results == ['value'] * 5 and len(calls) == 1
+
+    def fail():
+        raise ValueError('boom')
+    with pytest.raises(ValueError):
+        flight.do('k', fail)
+    assert flight.do('k', lambda: 'again') == 'again'
+
+def test_single_flight_ttl_cache():
+    flight = SingleFlight(ttl=60)
+    assert flight.do('a', lambda: 1) == 1
+    assert flight.do('a', lambda: 2) == 1
+    assert flight.do('b', lambda: None, cacheable=lambda v: v is not None) is None
+    assert flight.do('b', lambda: 3) == 3
+    flight.clear()
+    assert flight.do('a', lambda: 4) == 4
+    assert flight.stats()['cache_hits'] == 1
+
+@pytest.fixture
+def mock_args():
+    return {'page_size': 2, 'latency': 0.02}
+
+@pytest.fixture
+def mock_populate():
+    return {'surveys': 3}
+
+def test_concurrent_identical_gets_are_coalesced(mock_api, mock_app):
+    sid = mock_app.survey_ids()[0]
+    results = run_concurrently(lambda i: mock_api.get_survey(sid), range(16),
+                               max_workers=16)
+    assert all(r[1]['id'] == sid for r in results)
+    assert mock_app.request_count < 16
+    assert mock_api.single_flight.stats()['shared'] == 16 - mock_app.request_count
+
+    mock_api.coalesce_gets = False
+    before = mock_app.request_count
+    run_concurrently(lambda i: mock_api.get_survey(sid), range(4), max_workers=4)
+    assert mock_app.request_count - before == 4
+
+def test_coalesced_results_are_not_shared(mock_api, mock_app):
+    mock_api.single_flight.ttl = 60
+    sid = mock_app.survey_ids()[0]
+    results = run_concurrently(lambda i: mock_api.get_survey(sid), range(8),
+                               max_workers=8)
+    surveys = [r[1] for r in results]
+    assert len(set(map(id, surveys))) == 8
+    surveys[0]['name'] = 'Changed'
+    assert all(s['name'] == 'Survey 0' for s in surveys[1:])
+    assert mock_api.get_survey(sid)['name'] == 'Survey 0'
+    assert mock_api.single_flight.stats()['cache_hits'] == 1
+
+def test_get_cache_is_cleared_by_writes(mock_api, mock_app):
+    mock_api.single_flight.ttl = 60
+    sid = mock_app.survey_ids()[0]
+    assert mock_api.find_survey_id('Survey 0') == sid
+    before = mock_app.request_count
+    assert mock_api.find_survey_id('Survey 0') == sid
+    assert mock_app.request_count == before
+    assert mock_api.delete_survey(sid)
+    with pytest.raises(ValueError):
+        mock_api.find_survey_id('Survey 0')
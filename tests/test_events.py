@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+
+import urllib.error
+import urllib.request
+import pytest
+import py_qualtrics_api as pqa
+from py_qualtrics_api.events import response_row
+from py_qualtrics_api.testing import send_event
+
+
+@pytest.fixture
+def mock_args():
+    return {'questions_per_survey': 3}
+
+def test_response_row_matches_export_columns(mock_api, mock_app):
+    sid = mock_app.survey_ids()[0]
+    rid = mock_app.add_responses(sid, 1)[0]
+    row = response_row(mock_api.get_response(sid, rid),
+                       {'QID1': 'Q1', 'QID2': 'Q2', 'QID3': 'Q3'})
+    assert row == mock_app.responses[sid][0]
+
+def test_receiver_loads_responses_from_events(mock_api, mock_app):
+    sid = mock_app.survey_ids()[0]
+    store = pqa.ResponseStore()
+    batches = []
+    receiver = pqa.ResponseEventReceiver(mock_api, store, secret='s3cret',
+                                         max_delay=1.0, export_threshold=10,
+                                         export_poll_interval=0.01,
+                                         on_batch=lambda s, c: batches.append(c))
+    with receiver:
+        receiver.subscribe(sid)
+        assert list(mock_app.subscriptions.values())[0]['publicationUrl'] == receiver.url
+        idle = mock_app.request_count
+        assert receiver.flush(timeout=5)
+        assert mock_app.request_count == idle
+
+        mock_app.complete_responses(sid, 3)
+        assert receiver.flush(timeout=5)
+        assert receiver.stats()['fetched'] == 3
+        assert store.query('SELECT COUNT(*) FROM {}'.format(store.table_name(sid)))[0][0] == 3
+
+        # a burst larger than export_threshold is loaded with one export
+        mock_app.complete_responses(sid, 12)
+        assert receiver.flush(timeout=5)
+        assert receiver.stats()['exported'] == 12
+        assert store.get_meta(sid)['row_count'] == 15
+        df = store.read_dataframe(sid)
+        assert set(df['Q1']) == set(r['Q1'] for r in mock_app.responses[sid])
+
+        url = receiver.url.split('?')[0]
+        with pytest.raises(urllib.error.HTTPError) as e:
+            send_event(url, sid, 'R_1')
+        assert e.value.code == 403
+    assert mock_app.subscriptions == {}
+    assert sum(c['inserted'] for c in batches) == 15
+
+def test_receiver_retries_then_gives_up(mock_api, mock_app):
+    sid = mock_app.survey_ids()[0]
+    receiver = pqa.ResponseEventReceiver(mock_api, pqa.ResponseStore(),
+                                         max_delay=0.01, max_attempts=2)
+    with receiver:
+        send_event(receiver.url, sid, 'R_missing')
+        assert receiver.flush(timeout=5)
+    assert receiver.failed == [(sid, 'R_missing')]
+
+def test_receiver_retries_after_a_failed_load(mock_api, mock_app):
+    sid = mock_app.survey_ids()[0]
+    store = pqa.ResponseStore()
+    upsert = store.upsert
+    calls = []
+
+    def flaky_upsert(*args):
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError('database is locked')
+        return upsert(*args)
+
+    store.upsert = flaky_upsert
+    receiver = pqa.ResponseEventReceiver(mock_api, store, max_delay=0.01)
+    with receiver:
+        receiver.subscribe(sid)
+        mock_app.complete_responses(sid, 2)
+        assert receiver.flush(timeout=5)
+    assert receiver.stats()['errors'] == 1
+    assert receiver.stats()['fetched'] == 2
+    assert receiver.failed == []
+    assert store.get_meta(sid)['row_count'] == 2
+
+def test_receiver_rejects_malformed_json(mock_api):
+    receiver = pqa.ResponseEventReceiver(mock_api, pqa.ResponseStore())
+    with receiver:
+        for body in (b'{not json', b'[1, 2]'):
+            request = urllib.request.Request(receiver.url, data=body,
+                                             headers={'Content-Type': 'application/json'})
+            with pytest.raises(urllib.error.HTTPError) as e:
+                urllib.request.urlopen(request, timeout=5)
+            assert e.value.code == 400
+    assert receiver.stats()['received'] == 0
+
+def test_stop_without_start(mock_api):
+    receiver = pqa.ResponseEventReceiver(mock_api, pqa.ResponseStore())
+    receiver.stop()
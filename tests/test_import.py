@@ -0,0 +1,25 @@
+#!/usr/bin/env python
+
+import subprocess
+import sys
+
+
+def loaded_after(code):
+    probe = (code + '; import sys; print(",".join(m for m in ["pandas", "yaml", '
+             '"requests", "sqlite3", "pkg_resources"] if m in sys.modules))')
+    out = subprocess.check_output([sys.executable, '-c', probe])
+    return [m for m in out.decode().strip().split(',') if m]
+
+def test_import_is_lightweight():
+    assert loaded_after('import py_qualtrics_api') == []
+
+def test_construct_from_dict_is_lightweight():
+    assert loaded_after("import py_qualtrics_api as pqa; "
+                        "pqa.QualtricsAPI({'api_token': 'x', 'data_center': 'co1', "
+                        "'default_survey_owner': 'UR_1', "
+                        "'default_library_owner': 'UR_1'})") == []
+
+def test_lazy_attributes():
+    import py_qualtrics_api as pqa
+    assert pqa.ResponseStore.__name__ == 'ResponseStore'
+    assert pqa.__version__ == '0.3.2'
@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+
+import logging
+import pytest
+import py_qualtrics_api as pqa
+from py_qualtrics_api.instrument import endpoint_name, redact_headers
+
+
+@pytest.fixture
+def fake_requests(offline_api):
+    ok = b'{"meta": {"httpStatus": "200 - OK"}, "result": {"id": "SV_2"}}'
+    offline_api.transport = pqa.InMemoryTransport(
+        lambda method, url, headers, body: (200, {}, ok))
+
+def test_endpoint_name():
+    assert (endpoint_name('get', 'https://co1.qualtrics.com/API/v3/surveys/'
+                          'SV_bBqGx44QtiQben3/export-responses/ES_abc123?x=1')
+            == 'GET /surveys/{id}/export-responses/{id}')
+    assert (endpoint_name('POST', 'https://co1.qualtrics.com/API/v3/mailinglists')
+            == 'POST /mailinglists')
+
+def test_redact_headers():
+    assert redact_headers({'X-API-TOKEN': 'secret', 'Accept': 'a'}) == {
+        'X-API-TOKEN': '<redacted>', 'Accept': 'a'}
+
+def test_hooks_and_metrics(offline_api, fake_requests):
+    seen = []
+    offline_api.add_request_hook(pre=lambda info: seen.append(('pre', info.status)),
+                                 post=lambda info: seen.append(('post', info.status)))
+    offline_api.copy_survey('SV_1', 'Copy')
+    offline_api.get_survey('SV_1')
+    assert seen == [('pre', None), ('post', 200), ('pre', None), ('post', 200)]
+    stats = offline_api.metrics.snapshot()
+    assert stats['POST /surveys']['count'] == 1
+    assert stats['POST /surveys']['bytes_sent'] > 0
+    assert stats['GET /surveys/{id}']['errors'] == 0
+    assert offline_api.metrics.summary()[0]['endpoint'] in stats
+
+def test_verbose_output_hides_token(offline_api, fake_requests, capsys, caplog):
+    caplog.set_level(logging.DEBUG, logger='py_qualtrics_api')
+    offline_api.get_survey('SV_1', verbose=True)
+    out = capsys.readouterr().out
+    assert offline_api.config.api_token not in out
+    assert '<redacted>' in out
+    assert 'GET https://co1.qualtrics.com/API/v3/surveys/SV_1 -> 200' in caplog.text
@@ -0,0 +1,26 @@
+#!/usr/bin/env python
+
+from py_qualtrics_api.journal import Journal, open_journal
+
+
+def test_journal_round_trip(tmp_path):
+    path = str(tmp_path / 'job.jsonl')
+    with Journal(path) as journal:
+        journal.record('a', 'deleted')
+        journal.record('b', {'id': 'X'})
+        assert 'a' in journal and 'c' not in journal
+    with open(path, 'a') as f:
+        f.write('{"key": "c", "res')
+    with Journal(path) as journal:
+        assert len(journal) == 2
+        assert journal.get('b') == {'id': 'X'}
+        journal.record('c', 1)
+    with Journal(path) as journal:
+        assert journal.get('c') == 1
+
+def test_open_journal(tmp_path):
+    assert open_journal(None) == (None, False)
+    journal, owned = open_journal(str(tmp_path / 'j.jsonl'))
+    assert owned
+    assert open_journal(journal) == (journal, False)
+    journal.close()
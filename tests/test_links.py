@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+
+import csv
+from collections import Counter
+import pandas as pd
+import pytest
+import py_qualtrics_api as pqa
+
+
+@pytest.fixture
+def mock_args():
+    return {'page_size': 3, 'link_polls': 4}
+
+@pytest.fixture
+def mock_populate():
+    return {'surveys': 2, 'mailing_lists': 3, 'contacts_per_list': 7}
+
+def test_wait_for_links(mock_api, mock_app):
+    sid, ml_id = mock_app.survey_ids()[0], mock_app.mailing_list_ids()[0]
+    did = mock_api.create_link_distribution(sid, ml_id)
+    assert len(mock_api.list_links_for_distribution(did, sid)) == 0
+    assert mock_api.wait_for_links(did, sid, poll_interval=0) == 7
+    assert len(mock_api.list_links_for_distribution(did, sid)) == 7
+    assert mock_api.wait_for_links('EMD_missing', sid, poll_interval=0) is None
+
+def test_wait_for_links_uses_expected_count(mock_api, mock_app):
+    sid, ml_id = mock_app.survey_ids()[0], mock_app.mailing_list_ids()[0]
+    did = mock_api.create_link_distribution(sid, ml_id)
+    before = mock_app.request_count
+    assert mock_api.wait_for_links(did, sid, expected=7, poll_interval=0) == 7
+    assert mock_app.request_count - before == 4
+
+def test_get_links_for_mailing_list_waits(mock_api, mock_app):
+    sid, ml_id = mock_app.survey_ids()[0], mock_app.mailing_list_ids()[0]
+    mirror = pqa.ContactMirror()
+    mock_api.attach_contact_mirror(mirror)
+    mock_api.refresh_contact_mirror(mirror, ml_id)
+    before = mock_app.request_count
+    links = mock_api.get_links_for_mailing_list(sid, ml_id, poll_interval=0)
+    assert links.shape[0] == 7
+    # create, four polls, three pages of links
+    assert mock_app.request_count - before == 8
+    assert links['link'].str.contains(sid).all()
+
+def test_wait_for_links_when_generation_starts_late(mock_api, mock_app):
+    mock_app.link_delay = 5
+    sid, ml_id = mock_app.survey_ids()[0], mock_app.mailing_list_ids()[0]
+    links = mock_api.get_links_for_mailing_list(sid, ml_id, poll_interval=0)
+    assert links.shape[0] == 7
+    did = mock_api.create_link_distribution(sid, ml_id)
+    assert mock_api.wait_for_links(did, sid, poll_interval=0, timeout=0) == 0
+
+def test_generate_links(mock_api, mock_app, tmp_path):
+    pairs = pd.DataFrame({'survey_id': mock_app.survey_ids() + mock_app.survey_ids()[:1],
+                          'mailing_list_id': mock_app.mailing_list_ids()[:2] + ['ML_missing'],
+                          'site': ['a', 'b', 'c']})
+    links = []
+    summary = mock_api.generate_links(pairs, links, poll_interval=0, max_workers=3)
+    assert list(summary['site']) == ['a', 'b', 'c']
+    assert list(summary['links']) == [7, 7, 0]
+    assert summary['error'][:2].isnull().all()
+    assert summary['error'][2] == 'request failed'
+    assert len(links) == 14
+    assert set(l['distribution_id'] for l in links) == set(summary['distribution_id'][:2])
+
+    path = tmp_path / 'links.csv'
+    summary = mock_api.generate_links(pairs[:2], str(path), poll_interval=0,
+                                      return_df=False)
+    with open(path, newline='') as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == 14
+    # Sites finish in any order, so compare link counts per survey.
+    assert (Counter(r['survey_id'] for r in rows) ==
+            Counter(dict((sid, 7) for sid in pairs['survey_id'][:2])))
+    assert [r['error'] for r in summary] == [None, None]
+
+    pages = []
+    mock_api.generate_links(pairs[:1], pages.append, poll_interval=0)
+    assert [len(p) for p in pages] == [3, 3, 1]
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+
+import pytest
+import py_qualtrics_api as pqa
+
+
+@pytest.fixture
+def contacts():
+    return [{'id': 'MLRP_1', 'email': 'Joe.Sample@example.com',
+             'firstName': 'Joe', 'externalDataReference': '123-45-6789'},
+            {'id': 'MLRP_2', 'email': 'sally.smith@somewhere.net',
+             'firstName': 'Sally', 'externalDataReference': '987-65-4321'}]
+
+def test_lookups(ml_id, contacts):
+    mirror = pqa.ContactMirror()
+    assert mirror.replace_list(ml_id, contacts, '2020-01-01') == {
+        'added': 2, 'updated': 0, 'removed': 0}
+    assert mirror.find_contact_id(ml_id, email='joe.sample@EXAMPLE.com') == 'MLRP_1'
+    assert mirror.find_contact_id(ml_id, external_reference='987-65-4321') == 'MLRP_2'
+    assert mirror.get(ml_id, 'MLRP_2')['firstName'] == 'Sally'
+    with pytest.raises(ValueError, match=r"^No contacts matched"):
+        mirror.find_contact_id(ml_id, email='nobody@example.com')
+
+def test_persistence_and_diff(tmp_path, ml_id, contacts):
+    path = str(tmp_path / 'mirror.db')
+    mirror = pqa.ContactMirror(path)
+    mirror.replace_list(ml_id, contacts, '2020-01-01')
+    mirror.close()
+    mirror = pqa.ContactMirror(path)
+    assert mirror.last_modified(ml_id) == '2020-01-01'
+    changed = [dict(contacts[0], firstName='Joseph')]
+    assert mirror.replace_list(ml_id, changed, '2020-01-02') == {
+        'added': 0, 'updated': 1, 'removed': 1}
+    assert mirror.find(ml_id, external_reference='987-65-4321') == []
+
+def test_refresh_skips_unmodified_list(offline_api, ml_id, contacts):
+    calls = []
+    offline_api.get_mailing_list = lambda *a, **kw: {'id': ml_id,
+                                                     'lastModifiedDate': '2020-01-01'}
+    offline_api.get_contacts = lambda *a, **kw: calls.append(1) or contacts
+    mirror = pqa.ContactMirror()
+    offline_api.refresh_contact_mirror(mirror, ml_id)
+    offline_api.refresh_contact_mirror(mirror, ml_id)
+    assert len(calls) == 1
+    mirror.invalidate(ml_id)
+    offline_api.refresh_contact_mirror(mirror, ml_id)
+    assert len(calls) == 2
+
+@pytest.fixture
+def mock_populate():
+    return {'mailing_lists': 1, 'contacts_per_list': 3}
+
+def test_refresh_after_reopening(tmp_path, mock_api, mock_app):
+    path = str(tmp_path / 'mirror.db')
+    ml_id = mock_app.mailing_list_ids()[0]
+    mirror = pqa.ContactMirror(path)
+    mock_api.refresh_contact_mirror(mirror, ml_id)
+    mirror.close()
+    mirror = pqa.ContactMirror(path)
+    before = mock_app.request_count
+    assert mock_api.refresh_contact_mirror(mirror, ml_id) == {
+        'added': 0, 'updated': 0, 'removed': 0}
+    assert mock_app.request_count - before == 1
+
+def test_attached_mirror_tracks_changes(offline_api, ml_id, contacts):
+    mirror = pqa.ContactMirror()
+    mirror.replace_list(ml_id, contacts)
+    offline_api.attach_contact_mirror(mirror)
+    offline_api.make_put_request = lambda *a, **kw: True
+    offline_api.make_delete_request = lambda *a, **kw: True
+    offline_api.update_contact(ml_id, 'MLRP_1', {'email': 'joe@example.org'})
+    assert mirror.find_contact_id(ml_id, email='joe@example.org') == 'MLRP_1'
+    assert mirror.find(ml_id, email='joe.sample@example.com') == []
+    offline_api.delete_contact(ml_id, 'MLRP_2')
+    assert mirror.get(ml_id, 'MLRP_2') is None
@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+
+import threading
+import time
+import pandas as pd
+import pytest
+import py_qualtrics_api as pqa
+from py_qualtrics_api.pipeline import campaign_pipeline
+
+
+def test_values_flow_to_dependents():
+    p = pqa.Pipeline()
+    p.add('a', lambda: 2)
+    p.add('b', lambda: 3)
+    p.add('c', lambda a, b: a * b, requires=['a', 'b'])
+    p.add('d', lambda c: c + 1, requires=['c'], after=['a'])
+    results = p.run()
+    assert [r.status for r in results.values()] == ['ok'] * 4
+    assert results['d'].value == 7
+    assert results['c'].duration >= 0
+
+def test_independent_steps_run_concurrently():
+    barrier = threading.Barrier(3, timeout=5)
+    p = pqa.Pipeline(max_workers=3)
+    for name in 'abc':
+        p.add(name, lambda: barrier.wait() is not None)
+    assert all(r.status == 'ok' for r in p.run().values())
+
+def test_failure_skips_only_dependents():
+    def boom():
+        raise RuntimeError('no')
+    p = pqa.Pipeline()
+    p.add('bad', boom)
+    p.add('empty', lambda: ())
+    p.add('child', lambda x: x, requires=['bad'])
+    p.add('grandchild', lambda: 1, after=['child'])
+    p.add('other', lambda: 1)
+    with pytest.raises(pqa.PipelineError) as e:
+        p.run()
+    results = e.value.results
+    assert results['bad'].status == 'failed'
+    assert isinstance(results['bad'].error.__cause__, RuntimeError)
+    assert results['empty'].status == 'failed'
+    assert isinstance(results['empty'].error, pqa.StepFailed)
+    assert results['child'].status == results['grandchild'].status == 'skipped'
+    assert results['other'].status == 'ok'
+    results = p.run(raise_on_error=False)
+    assert results['other'].value == 1
+
+def test_fail_fast_stops_new_steps():
+    p = pqa.Pipeline()
+    p.add('bad', lambda: False)
+    p.add('slow', lambda: time.sleep(0.05) or 1)
+    p.add('later', lambda: 1, after=['slow'])
+    results = p.run(raise_on_error=False, fail_fast=True)
+    assert results['later'].status == 'skipped'
+
+def test_check_none_accepts_any_value():
+    p = pqa.Pipeline()
+    p.add('a', lambda: (), check=None)
+    assert p.run()['a'].value == ()
+
+def test_invalid_graphs():
+    p = pqa.Pipeline()
+    p.add('a', lambda: 1)
+    with pytest.raises(ValueError):
+        p.add('a', lambda: 1)
+    p.add('b', lambda a: a, requires=['missing'])
+    with pytest.raises(ValueError):
+        p.run()
+    p = pqa.Pipeline()
+    p.add('a', lambda b: b, requires=['b'])
+    p.add('b', lambda a: a, requires=['a'])
+    with pytest.raises(ValueError, match='cycle'):
+        p.run()
+
+def test_campaign_pipeline(mock_api, mock_app):
+    template = mock_app.survey_ids()[0]
+    sites = dict(('site{}'.format(i),
+                  pd.DataFrame({'firstName': ['A', 'B'], 'lastName': ['X', 'Y'],
+                                'email': ['a{}@x.org'.format(i), 'b{}@x.org'.format(i)]}))
+                 for i in range(5))
+    mock_app.import_polls = 3
+    p = campaign_pipeline(mock_api, sites, template, {'en': 'Hello'},
+                          'from@x.org', 'Team', 'Survey', import_poll_interval=0)
+    results = p.run()
+    assert len(mock_app.messages) == 1
+    assert len(mock_app.distributions) == 5
+    for site in sites:
+        sid = results[site + '/survey'].value
+        assert mock_app.surveys[sid]['isActive']
+        assert mock_app.surveys[sid]['name'] == site + ' survey'
+        ml_id = results[site + '/list'].value
+        assert len(mock_app.contacts[ml_id]) == 2
+        did = results[site + '/send'].value
+        assert mock_app.distributions[did]['recipients']['mailingListId'] == ml_id
+        assert results[site + '/imported'].value['status'] == 'complete'
+        assert results[site + '/imported'].finished <= results[site + '/send'].started
+
+def test_wait_for_contact_import(mock_api, mock_app):
+    ml_id = mock_api.create_mailing_list('List')
+    mock_app.import_polls = 2
+    import_id = mock_api.create_contacts_bulk(ml_id, pd.DataFrame({'email': ['a@x.org']}))
+    assert mock_app.contacts[ml_id] == {}
+    assert mock_api.get_contact_import(ml_id, import_id)['status'] == 'inProgress'
+    done = mock_api.wait_for_contact_import(ml_id, import_id, poll_interval=0)
+    assert done['contacts']['count']['added'] == 1
+    assert len(mock_app.contacts[ml_id]) == 1
+    assert mock_api.wait_for_contact_import(ml_id, 'PGRS_missing', poll_interval=0) == ()
+
+def test_campaign_pipeline_reports_failures(mock_api, mock_app):
+    p = campaign_pipeline(mock_api, {'a': pd.DataFrame({'email': ['a@x.org']})},
+                          'SV_missing', {'en': 'Hello'}, 'from@x.org', 'Team', 'Survey')
+    results = p.run(raise_on_error=False)
+    assert results['a/survey'].status == 'failed'
+    assert results['a/activate'].status == results['a/send'].status == 'skipped'
+    assert results['a/list'].status == results['message'].status == 'ok'
+    assert mock_app.distributions == {}
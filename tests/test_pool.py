@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+
+import threading
+import pytest
+import py_qualtrics_api as pqa
+
+
+def make_config(token):
+    return {'api_token': token * 40, 'data_center': 'co1',
+            'default_survey_owner': 'UR_1', 'default_library_owner': 'UR_1'}
+
+@pytest.fixture
+def mock_args():
+    return {'page_size': 2}
+
+@pytest.fixture
+def mock_populate():
+    return {'surveys': 3, 'mailing_lists': 1, 'contacts_per_list': 1}
+
+def token_counting(app, throttled=()):
+    counts = {}
+    lock = threading.Lock()
+
+    def handle(method, url, headers=None, body=None):
+        token = headers['X-API-TOKEN'][0] if 'X-API-TOKEN' in headers \
+            else headers['x-api-token'][0]
+        with lock:
+            counts[token] = counts.get(token, 0) + 1
+        if token in throttled:
+            return 429, {}, b'{"meta": {"httpStatus": "429 - Too Many Requests"}}'
+        return app.handle(method, url, headers, body)
+    return handle, counts
+
+def make_pool(app, tokens, throttled=(), **kwargs):
+    handle, counts = token_counting(app, throttled)
+    pool = pqa.ClientPool(dict((t, make_config(t)) for t in tokens),
+                          transport=pqa.InMemoryTransport(handle), **kwargs)
+    for client in pool.clients:
+        client.retry_backoff = 0
+    return pool, counts
+
+def test_reads_are_spread_across_tokens(mock_app):
+    mock_app.latency = 0.005
+    pool, counts = make_pool(mock_app, 'abc')
+    sid = mock_app.survey_ids()[0]
+    results = pool.map(lambda client, i: client.get_survey(sid), range(30),
+                       max_workers=6)
+    assert all(exc is None for _, _, exc in results)
+    assert sorted(counts) == ['a', 'b', 'c']
+    assert min(counts.values()) >= 5
+    pool.list_surveys()
+    assert sum(h['calls'] for h in pool.health()) == 31
+
+def test_writes_stay_pinned(mock_app):
+    pool, counts = make_pool(mock_app, 'ab', pin='b')
+    for i in range(3):
+        pool.create_mailing_list('List {}'.format(i), [])
+    assert counts == {'b': 3}
+    pool.client('a').create_mailing_list('Other', [])
+    assert counts == {'b': 3, 'a': 1}
+    with pytest.raises(KeyError):
+        pool.client('z')
+    with pytest.raises(AttributeError):
+        pool.no_such_method
+
+def test_throttled_token_cools_down(mock_app):
+    pool, counts = make_pool(mock_app, 'ab', throttled='a')
+    sid = mock_app.survey_ids()[0]
+    # the first call goes to 'a' and is still throttled after its retries
+    assert pool.get_survey(sid) == ()
+    for _ in range(4):
+        assert pool.get_survey(sid)['id'] == sid
+    health = dict((h['name'], h) for h in pool.health())
+    assert not health['a']['available'] and health['a']['throttled'] == 1
+    assert health['b']['available'] and health['b']['calls'] == 4
+    assert counts == {'a': 4, 'b': 4}
@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+
+import json
+import tracemalloc
+import pytest
+from py_qualtrics_api.cli import main
+
+
+@pytest.fixture
+def mock_args():
+    return {'page_size': 5, 'export_polls': 2}
+
+@pytest.fixture
+def mock_populate():
+    return {'surveys': 2, 'responses_per_survey': 30, 'mailing_lists': 1,
+            'contacts_per_list': 12}
+
+def test_phases_and_nesting(mock_api, mock_app, tmp_path):
+    prof = mock_api.enable_profiling()
+    sid = mock_app.survey_ids()[0]
+    df = mock_api.get_response_as_dataframe(0, survey_id=sid, verbose=False)
+    assert len(df) == 30
+    ops = dict((op['path'], op) for op in prof.operations())
+    top = ops['get_response_as_dataframe']
+    assert top['target'] == sid and top['peak_memory'] > 0
+    assert 'wait' in top['phases']
+    fetch = ops['get_response_as_dataframe;get_response_export_file_as_dataframe']
+    for phase in ['download', 'decompress', 'parse', 'other']:
+        assert phase in fetch['phases']
+    assert fetch['requests'] == 1 and fetch['bytes_received'] > 0
+    assert ops['get_response_as_dataframe;create_response_export']['target'] == sid
+    assert sum(top['phases'].values()) <= top['duration']
+
+def test_bulk_calls_nest_across_threads(mock_api, mock_app, tmp_path):
+    prof = mock_api.enable_profiling(trace_memory=False)
+    mock_api.export_responses_bulk(mock_app.survey_ids(), str(tmp_path),
+                                   poll_interval=0, max_workers=2)
+    summary = dict((r['operation'], r) for r in prof.summary())
+    assert summary['create_response_export']['count'] == 2
+    assert summary['export_responses_bulk']['phases']['download'] > 0
+    assert summary['export_responses_bulk']['peak_memory'] is None
+    paths = set(op['path'] for op in prof.operations())
+    assert 'export_responses_bulk;create_response_export' in paths
+    lines = prof.folded().splitlines()
+    assert all(int(line.rsplit(' ', 1)[1]) > 0 for line in lines)
+    assert any(line.startswith('export_responses_bulk;download ') for line in lines)
+
+def test_disable_profiling(mock_api, mock_app):
+    was_tracing = tracemalloc.is_tracing()
+    prof = mock_api.enable_profiling()
+    mock_api.get_contacts(mock_app.mailing_list_ids()[0])
+    assert mock_api.disable_profiling() is prof
+    assert tracemalloc.is_tracing() == was_tracing
+    assert mock_api.profiler is None
+    assert 'get_contacts' not in mock_api.__dict__
+    mock_api.get_contacts(mock_app.mailing_list_ids()[0])
+    assert len(prof.operations()) == 1
+    assert prof.operations()[0]['requests'] == 3
+
+def test_errors_are_recorded(mock_api):
+    prof = mock_api.enable_profiling(trace_memory=False)
+    with pytest.raises(ValueError):
+        mock_api.find_survey_id('No such survey')
+    op = prof.operations()[-1]
+    assert op['operation'] == 'find_survey_id'
+    assert op['error'].startswith('ValueError: ')
+    assert [r['errors'] for r in prof.summary() if r['operation'] == 'find_survey_id'] == [1]
+
+def test_cli_profile(mock_api, mock_app, tmp_path):
+    path = str(tmp_path / 'profile.json')
+    assert main(['dump', 'users', '-o', str(tmp_path / 'u.csv'), '--quiet',
+                 '--profile', path], api=mock_api) == 0
+    with open(path) as f:
+        report = json.load(f)
+    assert report['summary'][0]['operation'] == 'stream_pages'
+    assert mock_api.profiler is None
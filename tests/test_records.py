@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+
+import subprocess
+import sys
+import pytest
+import py_qualtrics_api as pqa
+
+
+@pytest.fixture
+def elements():
+    return [{'id': 'ML_1', 'name': 'Staff', 'category': 'Test'},
+            {'id': 'ML_2', 'name': 'Team A', 'category': None, 'folder': 'f'},
+            {'id': 'ML_3', 'name': 'Team B', 'category': 'Test'}]
+
+@pytest.fixture
+def mock_args():
+    return {'page_size': 2}
+
+@pytest.fixture
+def mock_populate():
+    return {'surveys': 3, 'mailing_lists': 3, 'contacts_per_list': 3, 'users': 2}
+
+def test_records_columns_and_rows(elements):
+    recs = pqa.Records(elements)
+    assert recs.shape == (3, 4)
+    assert recs['id'] == ['ML_1', 'ML_2', 'ML_3']
+    assert recs[1].folder == 'f'
+    assert recs[0].folder is None
+    assert [r.name for r in recs] == ['Staff', 'Team A', 'Team B']
+    assert recs.where(category='Test')['id'] == ['ML_1', 'ML_3']
+    assert recs.where(owner='UR_1').shape == (0, 4)
+    assert recs.where(owner=None)['id'] == ['ML_1', 'ML_2', 'ML_3']
+    assert len(pqa.Records().where(category='Test')) == 0
+    assert recs.to_dicts()[2] == {'id': 'ML_3', 'name': 'Team B',
+                                  'category': 'Test', 'folder': None}
+
+def test_records_to_dataframe(elements):
+    df = pqa.Records(elements).to_dataframe()
+    assert df.shape == (3, 4)
+    assert list(df.columns) == ['id', 'name', 'category', 'folder']
+
+def test_endpoints_return_records(mock_api):
+    assert mock_api.list_surveys(as_records=True).shape[0] == 3
+    assert mock_api.list_users(as_records=True).shape[0] == 2
+    mlists = mock_api.list_mailing_lists(as_records=True)
+    ml_id = mlists['id'][0]
+    assert len(mock_api.get_contacts(ml_id, as_records=True)) == 3
+    assert mock_api.get_mailing_list(ml_id, as_records=True)['id'] == [ml_id]
+    assert mock_api.get_mailing_list(ml_id).shape[0] == 1
+
+def test_find_ids_with_records(mock_api):
+    assert mock_api.find_survey_id('Survey 1$').startswith('SV_')
+    with pytest.raises(ValueError, match=r"multiple surveys"):
+        mock_api.find_survey_id('Survey')
+    with pytest.raises(ValueError, match=r"^No mailing lists matched"):
+        mock_api.find_mailing_list_id('orange')
+
+def test_records_path_does_not_import_pandas():
+    code = ('import sys, py_qualtrics_api as pqa; '
+            'from py_qualtrics_api.testing import MockQualtrics; '
+            'app = MockQualtrics(); app.populate(surveys=2); '
+            "q = pqa.QualtricsAPI({'api_token': 'x', 'data_center': 'co1', "
+            "'default_survey_owner': 'UR_1', 'default_library_owner': 'UR_1'}, "
+            'transport=pqa.InMemoryTransport(app.handle)); '
+            'assert len(q.list_surveys(as_records=True)) == 2; '
+            "print('pandas' in sys.modules)")
+    out = subprocess.check_output([sys.executable, '-c', code])
+    assert out.decode().strip() == 'False'
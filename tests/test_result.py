@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+
+import numpy as np
+import pytest
+import py_qualtrics_api as pqa
+from py_qualtrics_api.codec import JSONCodec, available_codecs, make_codec
+
+
+class CountingCodec(JSONCodec):
+
+    def __init__(self):
+        self.decodes = 0
+
+    def loads(self, data):
+        self.decodes += 1
+        return super().loads(data)
+
+@pytest.fixture
+def page():
+    return (b'{"meta": {"httpStatus": "200 - OK"}, "result": {"elements": '
+            b'[{"id": "SV_1"}, {"id": "SV_2"}], "nextPage": "https://next"}}')
+
+def test_envelope_decodes_once(page):
+    codec = CountingCodec()
+    rslt = pqa.ApiResult(200, page, codec=codec)
+    assert rslt.success
+    assert [e['id'] for e in rslt.elements] == ['SV_1', 'SV_2']
+    assert rslt.next_page == 'https://next'
+    assert rslt.json()['result']['nextPage'] == 'https://next'
+    assert codec.decodes == 1
+
+def test_envelope_error():
+    rslt = pqa.ApiResult(404, b'{"meta": {"httpStatus": "404 - Not Found"}}')
+    assert not rslt.success
+    assert rslt.elements == []
+    assert rslt.next_page is None
+
+@pytest.mark.parametrize('name', available_codecs())
+def test_codecs_round_trip_numpy_scalars(name):
+    codec = make_codec(name)
+    payload = {'contacts': [{'email': 'a@b.c', 'unsubscribed': np.bool_(False),
+                             'embeddedData': {'n': np.int64(3)}}]}
+    assert codec.loads(codec.dumps(payload)) == {
+        'contacts': [{'email': 'a@b.c', 'unsubscribed': False,
+                      'embeddedData': {'n': 3}}]}
+
+def test_unknown_codec():
+    with pytest.raises(ValueError, match=r"^Unknown JSON codec"):
+        make_codec('yaml')
+
+def test_paging_uses_envelope(offline_api):
+    pages = {'https://co1.qualtrics.com/API/v3/surveys':
+                 b'{"meta": {"httpStatus": "200 - OK"}, "result": {"elements": '
+                 b'[{"id": "SV_1"}], "nextPage": "https://p2"}}',
+             'https://p2':
+                 b'{"meta": {"httpStatus": "200 - OK"}, "result": {"elements": '
+                 b'[{"id": "SV_2"}], "nextPage": null}}'}
+
+    offline_api.transport = pqa.InMemoryTransport(
+        lambda method, url, headers, body: (200, {}, pages[url]))
+    offline_api.set_json_codec(CountingCodec())
+    surveys = offline_api.list_surveys(return_df=False)
+    assert [s['id'] for s in surveys] == ['SV_1', 'SV_2']
+    assert offline_api.json_codec.decodes == 2
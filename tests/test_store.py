@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+
+import pandas as pd
+import pytest
+import py_qualtrics_api as pqa
+
+
+@pytest.fixture
+def store():
+    s = pqa.ResponseStore(batch_size=2)
+    yield s
+    s.close()
+
+@pytest.fixture
+def questions():
+    return {'elements': [
+        {'QuestionID': 'QID1', 'DataExportTag': 'Q1', 'QuestionType': 'MC'},
+        {'QuestionID': 'QID2', 'DataExportTag': 'Q2', 'QuestionType': 'Slider'}]}
+
+@pytest.fixture
+def responses():
+    return pd.DataFrame.from_dict({
+        'ResponseId': ['R_1', 'R_2', 'R_3'],
+        'RecordedDate': ['2020-01-01 10:00:00', '2020-01-02 10:00:00',
+                         '2020-01-03 10:00:00'],
+        'Q1': ['Yes', 'No', None],
+        'Q2': [1.5, 2.0, float('nan')]})
+
+def test_create_survey_table(store, survey_id, questions):
+    meta = store.create_survey_table(survey_id, questions)
+    cols = dict((n, t) for n, t in meta['columns'])
+    assert cols['Q1'] == 'TEXT'
+    assert cols['Q2'] == 'REAL'
+    assert meta['row_count'] == 0
+
+def test_upsert_inserts_then_skips_unchanged(store, survey_id, questions,
+                                             responses):
+    store.create_survey_table(survey_id, questions)
+    assert store.upsert(survey_id, responses) == {'inserted': 3, 'updated': 0,
+                                                  'unchanged': 0}
+    assert store.upsert(survey_id, responses) == {'inserted': 0, 'updated': 0,
+                                                  'unchanged': 3}
+    meta = store.get_meta(survey_id)
+    assert meta['row_count'] == 3
+    assert meta['last_recorded_date'] == '2020-01-03 10:00:00'
+
+def test_upsert_updates_changed_rows(store, survey_id, responses):
+    store.upsert(survey_id, responses)
+    changed = responses.copy()
+    changed.loc[0, 'Q1'] = 'Maybe'
+    changed['Q3_1'] = ['a', 'b', 'c']
+    counts = store.upsert(survey_id, changed)
+    assert counts == {'inserted': 0, 'updated': 3, 'unchanged': 0}
+    df = store.read_dataframe(survey_id)
+    assert df.shape[0] == 3
+    assert df.loc[df['ResponseId'] == 'R_1', 'Q1'].values[0] == 'Maybe'
+    assert 'Q3_1' in df.columns
+
+def test_upsert_requires_response_id(store, survey_id):
+    with pytest.raises(ValueError, match=r"ResponseId"):
+        store.upsert(survey_id, [{'Q1': 'Yes'}])
+
+@pytest.fixture
+def mock_populate():
+    return {'surveys': 1, 'responses_per_survey': 3}
+
+def test_load_responses_to_store(mock_api, mock_app):
+    sid = mock_app.survey_ids()[0]
+    store = pqa.ResponseStore()
+    assert mock_api.load_responses_to_store(store, sid, poll_interval=0) == {
+        'inserted': 3, 'updated': 0, 'unchanged': 0}
+    mock_api.get_response_export_progress = lambda *a, **kw: ('failed', None)
+    assert mock_api.load_responses_to_store(store, sid, poll_interval=0) == ()
+    mock_api.get_response_export_progress = lambda *a, **kw: ()
+    assert mock_api.load_responses_to_store(store, sid, poll_interval=0) == ()
+
+def test_failed_exports_end_the_poll(mock_api, mock_app):
+    sid = mock_app.survey_ids()[0]
+    assert mock_api.get_response_as_dataframe(0, survey_id='SV_missing',
+                                              verbose=False) == ()
+    mock_api.get_response_export_progress = lambda *a, **kw: ('failed', None)
+    assert mock_api.get_response_as_dataframe(0, survey_id=sid, verbose=False) == ()
+    assert mock_api.get_response_as_string(0, survey_id=sid, verbose=False) == ()
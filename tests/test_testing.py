@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+
+import pandas as pd
+import pytest
+import py_qualtrics_api as pqa
+from py_qualtrics_api.testing import MockServer
+
+
+@pytest.fixture
+def mock_args():
+    return {'page_size': 3}
+
+@pytest.fixture
+def mock_populate():
+    return {'surveys': 7, 'responses_per_survey': 4, 'mailing_lists': 2,
+            'contacts_per_list': 5, 'users': 4}
+
+@pytest.fixture
+def mock_api(mock_app):
+    with MockServer(mock_app) as server:
+        yield pqa.QualtricsAPI(server.config())
+
+def test_paged_listings(mock_api, mock_app):
+    assert mock_api.list_surveys().shape[0] == 7
+    assert mock_api.list_users().shape[0] == 4
+    ml_id = mock_app.mailing_list_ids()[0]
+    assert mock_api.get_contacts(ml_id).shape[0] == 5
+    assert mock_api.metrics.snapshot()['GET /mailinglists/{id}/contacts']['count'] == 2
+
+def test_survey_crud(mock_api, mock_app):
+    sid = mock_api.copy_survey(mock_app.survey_ids()[0], 'Copy')
+    assert sid.startswith('SV_')
+    assert mock_api.activate_survey(sid)
+    assert mock_api.get_survey(sid)['isActive']
+    assert mock_api.delete_survey(sid)
+    assert not mock_api.delete_survey(sid)
+
+def test_mailing_list_and_links(mock_api, mail_list_recs):
+    ml_id = mock_api.create_mailing_list('My test list', mail_list_recs,
+                                         list_category='Test')
+    assert ml_id.startswith('ML_')
+    links = mock_api.get_links_for_mailing_list('SV_1', ml_id, poll_interval=0)
+    assert links.shape[0] == 2
+    assert set(links['email']) == set(mail_list_recs['email'])
+
+def test_response_export(mock_api, mock_app):
+    sid = mock_app.survey_ids()[0]
+    df = mock_api.get_response_as_dataframe(0, survey_id=sid, verbose=False)
+    assert df.shape == (4, 19)
+
+def test_throttling(mock_app):
+    mock_app.throttle_rate = 1.0
+    with MockServer(mock_app) as server:
+        api = pqa.QualtricsAPI(server.config())
+        api.retry_backoff = 0
+        assert api.list_surveys() == ()
+    assert mock_app.throttled_count == api.max_retries + 1
+
+def test_throttled_requests_are_retried(mock_app):
+    mock_app.throttle_rate = 0.5
+    with MockServer(mock_app) as server:
+        api = pqa.QualtricsAPI(server.config())
+        api.retry_backoff = 0
+        api.max_retries = 20
+        assert api.list_surveys().shape[0] == 7
+    assert mock_app.throttled_count > 0
+
+def test_export_download_is_streamed_to_disk(mock_api, mock_app, tmp_path):
+    sid = mock_app.survey_ids()[0]
+    results = mock_api.export_responses_bulk([sid], str(tmp_path), poll_interval=0,
+                                             return_df=False)
+    assert results[0]['error'] is None
+    assert pd.read_csv(results[0]['path'], skiprows=[1, 2]).shape[0] == 4
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['{}.csv'.format(sid)]
+    snapshot = mock_api.metrics.snapshot()
+    assert [v['bytes_received'] > 0 for k, v in snapshot.items() if k.endswith('/file')] == [True]
+
+def test_server_stop_without_start(mock_app):
+    MockServer(mock_app).stop()
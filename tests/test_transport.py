@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+
+import pytest
+import py_qualtrics_api as pqa
+from py_qualtrics_api.testing import MockServer
+
+
+@pytest.fixture
+def mock_args():
+    return {'page_size': 2}
+
+@pytest.fixture
+def mock_populate():
+    return {'surveys': 3, 'responses_per_survey': 2, 'mailing_lists': 1,
+            'contacts_per_list': 3}
+
+@pytest.fixture
+def config():
+    return {'api_token': 'x' * 40, 'data_center': 'co1',
+            'default_survey_owner': 'UR_1', 'default_library_owner': 'UR_1'}
+
+def test_in_memory_transport(mock_app, config):
+    api = pqa.QualtricsAPI(config, transport=pqa.InMemoryTransport(mock_app.handle))
+    assert api.list_surveys().shape[0] == 3
+    ml_id = mock_app.mailing_list_ids()[0]
+    assert api.get_contacts(ml_id, return_df=False)[0]['id'].startswith('MLRP_')
+    sid = mock_app.survey_ids()[0]
+    df = api.get_response_as_dataframe(0, survey_id=sid, verbose=False)
+    assert df.shape[0] == 2
+
+def test_requests_transport_against_mock_server(mock_app):
+    with MockServer(mock_app) as server:
+        api = pqa.QualtricsAPI(server.config(),
+                               transport=pqa.RequestsTransport(pool_maxsize=4))
+        assert api.list_surveys(return_df=False)[0]['id'].startswith('SV_')
+
+def test_record_and_replay(tmp_path, mock_app, config):
+    path = str(tmp_path / 'session.jsonl')
+    recorder = pqa.RecordingTransport(pqa.InMemoryTransport(mock_app.handle), path)
+    api = pqa.QualtricsAPI(config, transport=recorder)
+    sid = mock_app.survey_ids()[0]
+    live = api.get_response_as_dataframe(0, survey_id=sid, verbose=False)
+    surveys = api.list_surveys(return_df=False)
+    recorder.close()
+    assert config['api_token'] not in open(path).read()
+
+    replay = pqa.ReplayTransport(path)
+    api = pqa.QualtricsAPI(config, transport=replay)
+    assert api.get_response_as_dataframe(0, survey_id=sid,
+                                         verbose=False).equals(live)
+    assert api.list_surveys(return_df=False) == surveys
+    assert replay.remaining() == 0
+    with pytest.raises(LookupError, match=r"^No recorded response"):
+        api.get_survey(sid)
+
+def test_recording_masks_passwords(tmp_path, mock_app, config):
+    path = str(tmp_path / 'session.jsonl')
+    recorder = pqa.RecordingTransport(pqa.InMemoryTransport(mock_app.handle), path)
+    api = pqa.QualtricsAPI(config, transport=recorder)
+    assert api.create_user('new.user', 'hunter2-secret', 'New', 'User',
+                           'UT_1', 'new@example.com')
+    recorder.close()
+    captured = open(path).read()
+    assert 'hunter2-secret' not in captured
+    assert 'new.user' in captured